@@ -1,37 +1,117 @@
 """FastAPI Security Middleware - Biblioteca de segurança adaptável."""
-from os_fastapi_middleware.providers.base import (
-    BaseAPIKeyProvider,
-    BaseRateLimitProvider,
-    BaseIPWhitelistProvider,
-    BaseRequestLogProvider,
-)
-from os_fastapi_middleware.providers.memory import (
-    InMemoryAPIKeyProvider,
-    InMemoryRateLimitProvider,
-    InMemoryIPWhitelistProvider
-)
-from .config import (
-    SecurityConfig,
-    APIKeyConfig,
-    RateLimitConfig,
-    IPWhitelistConfig
-)
-from .dependencies.api_key import APIKeyDependency
-from .dependencies.ip_whitelist import IPWhitelistDependency
-from .dependencies.rate_limit import RateLimitDependency
-from .dependencies.admin_ip_bypass import AdminIPBypassDependency
-from .exceptions import (
-    SecurityException,
-    UnauthorizedException,
-    ForbiddenException,
-    RateLimitExceededException,
-    IPNotAllowedException
-)
-from .middleware.api_key import APIKeyMiddleware
-from .middleware.ip_whitelist import IPWhitelistMiddleware
-from .middleware.rate_limit import RateLimitMiddleware
-from .middleware.request_logger import RequestLoggingMiddleware
-from .middleware.admin_ip_bypass import AdminIPBypassMiddleware
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
+# Public names are imported on first access, so `import os_fastapi_middleware`
+# does not pull in FastAPI, pydantic or the middlewares until they are used.
+_EXPORTS = {
+    # Providers
+    "BaseAPIKeyProvider": ".providers.base",
+    "BaseRateLimitProvider": ".providers.base",
+    "BaseIPWhitelistProvider": ".providers.base",
+    "BaseRequestLogProvider": ".providers.base",
+    "InMemoryAPIKeyProvider": ".providers.memory",
+    "InMemoryRateLimitProvider": ".providers.memory",
+    "InMemoryIPWhitelistProvider": ".providers.memory",
+
+    # Config
+    "SecurityConfig": ".config",
+    "APIKeyConfig": ".config",
+    "RateLimitConfig": ".config",
+    "IPWhitelistConfig": ".config",
+    "AdminIPBypassConfig": ".config",
+    "RedisConfig": ".config",
+    "RoutePolicy": ".config",
+
+    # Dependencies
+    "APIKeyDependency": ".dependencies.api_key",
+    "IPWhitelistDependency": ".dependencies.ip_whitelist",
+    "RateLimitDependency": ".dependencies.rate_limit",
+    "AdminIPBypassDependency": ".dependencies.admin_ip_bypass",
+
+    # Exceptions
+    "SecurityException": ".exceptions",
+    "UnauthorizedException": ".exceptions",
+    "ForbiddenException": ".exceptions",
+    "RateLimitExceededException": ".exceptions",
+    "IPNotAllowedException": ".exceptions",
+
+    # Middlewares
+    "APIKeyMiddleware": ".middleware.api_key",
+    "APIKeyASGIMiddleware": ".middleware.api_key",
+    "IPWhitelistMiddleware": ".middleware.ip_whitelist",
+    "IPWhitelistASGIMiddleware": ".middleware.ip_whitelist",
+    "RateLimitMiddleware": ".middleware.rate_limit",
+    "RateLimitASGIMiddleware": ".middleware.rate_limit",
+    "RequestLoggingMiddleware": ".middleware.request_logger",
+    "RequestLoggingASGIMiddleware": ".middleware.request_logger",
+    "AdminIPBypassMiddleware": ".middleware.admin_ip_bypass",
+    "AdminIPBypassASGIMiddleware": ".middleware.admin_ip_bypass",
+    "SecurityPipeline": ".middleware.pipeline",
+    "ServerTimingMiddleware": ".middleware.server_timing",
+
+    # Policies
+    "PolicyRegistry": ".policies",
+    "security_policy": ".policies",
+
+    # Request context
+    "SecurityContext": ".context",
+    "get_security_context": ".context",
+
+    # Metrics
+    "SecurityMetrics": ".metrics",
+    "MetricsRegistry": ".metrics",
+    "metrics_endpoint": ".metrics",
+    "HeavyHitterTracker": ".heavy_hitters",
+    "heavy_hitters_endpoint": ".heavy_hitters",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, globals(), _EXPORTS)
+
+if TYPE_CHECKING:
+    from os_fastapi_middleware.providers.base import (
+        BaseAPIKeyProvider,
+        BaseRateLimitProvider,
+        BaseIPWhitelistProvider,
+        BaseRequestLogProvider,
+    )
+    from os_fastapi_middleware.providers.memory import (
+        InMemoryAPIKeyProvider,
+        InMemoryRateLimitProvider,
+        InMemoryIPWhitelistProvider
+    )
+    from .config import (
+        SecurityConfig,
+        APIKeyConfig,
+        RateLimitConfig,
+        IPWhitelistConfig,
+        AdminIPBypassConfig,
+        RedisConfig,
+        RoutePolicy
+    )
+    from .dependencies.api_key import APIKeyDependency
+    from .dependencies.ip_whitelist import IPWhitelistDependency
+    from .dependencies.rate_limit import RateLimitDependency
+    from .dependencies.admin_ip_bypass import AdminIPBypassDependency
+    from .exceptions import (
+        SecurityException,
+        UnauthorizedException,
+        ForbiddenException,
+        RateLimitExceededException,
+        IPNotAllowedException
+    )
+    from .middleware.api_key import APIKeyMiddleware, APIKeyASGIMiddleware
+    from .middleware.ip_whitelist import IPWhitelistMiddleware, IPWhitelistASGIMiddleware
+    from .middleware.rate_limit import RateLimitMiddleware, RateLimitASGIMiddleware
+    from .middleware.request_logger import RequestLoggingMiddleware, RequestLoggingASGIMiddleware
+    from .middleware.admin_ip_bypass import AdminIPBypassMiddleware, AdminIPBypassASGIMiddleware
+    from .middleware.pipeline import SecurityPipeline
+    from .middleware.server_timing import ServerTimingMiddleware
+    from .policies import PolicyRegistry, security_policy
+    from .context import SecurityContext, get_security_context
+    from .metrics import SecurityMetrics, MetricsRegistry, metrics_endpoint
+    from .heavy_hitters import HeavyHitterTracker, heavy_hitters_endpoint
 
 __version__ = "1.1.1"
 
@@ -43,6 +123,15 @@ __all__ = [
     "RequestLoggingMiddleware",
     "AdminIPBypassMiddleware",
 
+    # Pure ASGI middlewares
+    "APIKeyASGIMiddleware",
+    "RateLimitASGIMiddleware",
+    "IPWhitelistASGIMiddleware",
+    "RequestLoggingASGIMiddleware",
+    "AdminIPBypassASGIMiddleware",
+    "SecurityPipeline",
+    "ServerTimingMiddleware",
+
     # Dependencies
     "APIKeyDependency",
     "RateLimitDependency",
@@ -71,4 +160,22 @@ __all__ = [
     "APIKeyConfig",
     "RateLimitConfig",
     "IPWhitelistConfig",
+    "AdminIPBypassConfig",
+    "RedisConfig",
+    "RoutePolicy",
+
+    # Policies
+    "PolicyRegistry",
+    "security_policy",
+
+    # Request context
+    "SecurityContext",
+    "get_security_context",
+
+    # Metrics
+    "SecurityMetrics",
+    "MetricsRegistry",
+    "metrics_endpoint",
+    "HeavyHitterTracker",
+    "heavy_hitters_endpoint",
 ]
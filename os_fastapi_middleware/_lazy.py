@@ -0,0 +1,49 @@
+"""Lazy attribute loading for package `__init__` modules (PEP 562)."""
+
+import importlib
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+def lazy_exports(
+    package: str,
+    namespace: Dict[str, Any],
+    exports: Dict[str, str],
+    optional: Iterable[str] = (),
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build module-level `__getattr__`/`__dir__` that import exports on first access.
+
+    Usage example (in a package __init__):
+        __getattr__, __dir__ = lazy_exports(__name__, globals(), {"Foo": ".foo"})
+
+    Args:
+        package: `__name__` of the package
+        namespace: `globals()` of the package; loaded values are cached there
+        exports: Public name -> module path (relative to the package) defining it
+        optional: Names from optional dependencies; a failed import is
+            reported as AttributeError, as if the name did not exist
+
+    Returns:
+        Tuple (__getattr__, __dir__)
+    """
+    optional = frozenset(optional)
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        try:
+            module = importlib.import_module(module_name, package)
+        except ImportError as e:
+            if name in optional:
+                raise AttributeError(f"module {package!r} has no attribute {name!r} ({e})") from e
+            raise
+        value = getattr(module, name)
+        # Cache it, so later lookups never reach __getattr__ again
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,603 @@
+"""Benchmarks for the middleware stacks and providers, with regression gating.
+
+Middleware stacks are driven directly through ASGI: each request is a scope
+dict handed to the stack in-process, with no server, socket or HTTP client in
+the way, so the numbers are the middleware overhead itself. Providers are
+microbenchmarked at several key cardinalities (API keys stored, IP entries
+listed, distinct rate limit keys).
+
+Every benchmark takes `samples` timed samples. A sample is the mean time of
+`batch` consecutive operations (1 for stacks, 100 for providers, so the
+timer's own cost does not dominate sub-microsecond lookups). p50 and p99 are
+taken over the samples; ops/sec is the total operations over the total time.
+
+Run with the CLI entry point:
+
+    os-fastapi-benchmark --save baseline.json
+    os-fastapi-benchmark --compare baseline.json --threshold 0.25
+
+With `--compare`, the exit status is 1 when any benchmark regressed by more
+than the threshold, so the command can gate CI. Redis providers are included
+when `--redis-url` is given (requires the `redis` extra), or against the
+in-process FakeRedis with `--fake-redis LATENCY_MS`, which shows how the
+providers' round trips add up at a given network latency.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+from time import perf_counter_ns
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Operation = Callable[[int], Awaitable[Any]]
+Teardown = Optional[Callable[[], Awaitable[None]]]
+Setup = Callable[[], Awaitable[Tuple[Operation, Teardown]]]
+
+BASELINE_VERSION = 1
+DEFAULT_CARDINALITIES = (100, 10_000, 100_000)
+METRICS = ("p50_us", "p99_us", "ops_per_sec")
+
+API_KEY = "bench-key-00000000"
+
+
+class Benchmark:
+    """A named operation, built by an async `setup()` returning (operation, teardown)."""
+
+    def __init__(self, name: str, setup: Setup, batch: int = 1, max_samples: Optional[int] = None):
+        """
+        Args:
+            name: Unique name, used as the key in baseline files
+            setup: Coroutine function returning the operation (called with the
+                operation index) and an optional teardown coroutine function
+            batch: Operations timed together per sample
+            max_samples: Upper bound on samples, for slow benchmarks
+        """
+        self.name = name
+        self.setup = setup
+        self.batch = batch
+        self.max_samples = max_samples
+
+
+class BenchmarkResult:
+    __slots__ = ("name", "ops", "p50_us", "p99_us", "ops_per_sec")
+
+    def __init__(self, name: str, ops: int, p50_us: float, p99_us: float, ops_per_sec: float):
+        self.name = name
+        self.ops = ops
+        self.p50_us = p50_us
+        self.p99_us = p99_us
+        self.ops_per_sec = ops_per_sec
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ops": self.ops,
+            "p50_us": round(self.p50_us, 3),
+            "p99_us": round(self.p99_us, 3),
+            "ops_per_sec": round(self.ops_per_sec, 1),
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "BenchmarkResult":
+        return cls(name, data["ops"], data["p50_us"], data["p99_us"], data["ops_per_sec"])
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    # Nearest rank
+    rank = max(1, min(len(ordered), -(-q * len(ordered) // 100)))
+    return ordered[int(rank) - 1]
+
+
+async def measure(benchmark: Benchmark, samples: int = 200, warmup: int = 20) -> BenchmarkResult:
+    """Run one benchmark on the running event loop."""
+    operation, teardown = await benchmark.setup()
+    try:
+        if benchmark.max_samples is not None:
+            samples = min(samples, benchmark.max_samples)
+            warmup = min(warmup, samples)
+        batch = benchmark.batch
+        index = 0
+        for _ in range(warmup * batch):
+            await operation(index)
+            index += 1
+
+        timings: List[float] = []
+        total = 0
+        for _ in range(samples):
+            started = perf_counter_ns()
+            for _ in range(batch):
+                await operation(index)
+                index += 1
+            elapsed = perf_counter_ns() - started
+            total += elapsed
+            timings.append(elapsed / batch)
+    finally:
+        if teardown is not None:
+            await teardown()
+
+    timings.sort()
+    ops = samples * batch
+    return BenchmarkResult(
+        benchmark.name,
+        ops,
+        _percentile(timings, 50) / 1000,
+        _percentile(timings, 99) / 1000,
+        ops * 1e9 / total if total else 0.0,
+    )
+
+
+# ASGI driving
+
+
+async def _endpoint(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+class ASGIDriver:
+    """
+    Sends requests to an ASGI app in-process, without a server or network.
+
+    Request `i` comes from client IP `10.0.x.y` number `i % clients`, so rate
+    limit keys and IP lookups are spread over `clients` distinct values.
+    """
+
+    def __init__(self, app, path: str = "/", headers: Optional[Dict[str, str]] = None, clients: int = 1000):
+        self.app = app
+        self.path = path
+        self.headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in (headers or {}).items()]
+        self.clients = [client_ip(i) for i in range(max(1, clients))]
+
+    async def request(self, i: int = 0) -> int:
+        """Send one GET request and return the response status."""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": self.path,
+            "raw_path": self.path.encode("latin-1"),
+            "root_path": "",
+            "query_string": b"",
+            "headers": self.headers,
+            "client": (self.clients[i % len(self.clients)], 50000),
+            "server": ("benchmark", 80),
+        }
+        status = 0
+        complete = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Only disconnect once the response is complete, like a real client
+            await complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                complete.set()
+
+        await self.app(scope, receive, send)
+        return status
+
+
+def client_ip(i: int) -> str:
+    return f"10.0.{(i >> 8) & 255}.{i & 255}"
+
+
+def _stack_benchmark(name: str, build: Callable[[], Any], clients: int, headers: Optional[Dict[str, str]] = None) -> Benchmark:
+    async def setup():
+        driver = ASGIDriver(build(), headers=headers, clients=clients)
+        status = await driver.request(0)
+        if status != 200:
+            raise RuntimeError(f"{name}: stack answered {status} instead of 200")
+        return driver.request, None
+
+    return Benchmark(name, setup)
+
+
+def stack_benchmarks(clients: int = 1000) -> List[Benchmark]:
+    """Middleware stacks, each in its BaseHTTPMiddleware and pure ASGI variant."""
+    from .config import AdminIPBypassConfig, APIKeyConfig, IPWhitelistConfig, RateLimitConfig, SecurityConfig
+    from .middleware import (
+        AdminIPBypassASGIMiddleware,
+        AdminIPBypassMiddleware,
+        APIKeyASGIMiddleware,
+        APIKeyMiddleware,
+        IPWhitelistASGIMiddleware,
+        IPWhitelistMiddleware,
+        RateLimitASGIMiddleware,
+        RateLimitMiddleware,
+        RequestLoggingASGIMiddleware,
+        RequestLoggingMiddleware,
+        SecurityPipeline,
+    )
+    from .providers import InMemoryAPIKeyProvider, InMemoryIPWhitelistProvider, InMemoryRateLimitProvider
+    from .providers.base import BaseRequestLogProvider
+
+    class NullLogProvider(BaseRequestLogProvider):
+        accepts_compact_records = True
+
+        async def log(self, record) -> None:
+            pass
+
+    keys = {"account_bench": API_KEY}
+    allowed = ["10.0.0.0/16"]
+    admin = ["192.0.2.1"]
+    # High enough that no benchmark hits the limit
+    limit = 1_000_000_000
+    headers = {"X-API-Key": API_KEY}
+
+    variants = {
+        "base_http": (APIKeyMiddleware, IPWhitelistMiddleware, RateLimitMiddleware,
+                      AdminIPBypassMiddleware, RequestLoggingMiddleware),
+        "asgi": (APIKeyASGIMiddleware, IPWhitelistASGIMiddleware, RateLimitASGIMiddleware,
+                 AdminIPBypassASGIMiddleware, RequestLoggingASGIMiddleware),
+    }
+    benchmarks = [_stack_benchmark("stack.baseline", lambda: _endpoint, clients)]
+    for variant, (api_key, ip_whitelist, rate_limit, admin_bypass, request_logging) in variants.items():
+        def build_full(api_key=api_key, ip_whitelist=ip_whitelist, rate_limit=rate_limit, admin_bypass=admin_bypass):
+            app = rate_limit(_endpoint, provider=InMemoryRateLimitProvider(), requests_per_window=limit)
+            app = api_key(app, provider=InMemoryAPIKeyProvider(keys))
+            app = ip_whitelist(app, provider=InMemoryIPWhitelistProvider(allowed))
+            return admin_bypass(app, admin_ips=admin)
+
+        benchmarks += [
+            _stack_benchmark(
+                f"stack.api_key.{variant}",
+                lambda api_key=api_key: api_key(_endpoint, provider=InMemoryAPIKeyProvider(keys)),
+                clients, headers,
+            ),
+            _stack_benchmark(
+                f"stack.ip_whitelist.{variant}",
+                lambda ip_whitelist=ip_whitelist: ip_whitelist(_endpoint, provider=InMemoryIPWhitelistProvider(allowed)),
+                clients,
+            ),
+            _stack_benchmark(
+                f"stack.rate_limit.{variant}",
+                lambda rate_limit=rate_limit: rate_limit(
+                    _endpoint, provider=InMemoryRateLimitProvider(), requests_per_window=limit),
+                clients,
+            ),
+            _stack_benchmark(
+                f"stack.request_logging.{variant}",
+                lambda request_logging=request_logging: request_logging(_endpoint, provider=NullLogProvider()),
+                clients,
+            ),
+            _stack_benchmark(f"stack.full.{variant}", build_full, clients, headers),
+        ]
+
+    config = SecurityConfig(
+        admin_bypass=AdminIPBypassConfig(admin_ips=admin),
+        ip_whitelist=IPWhitelistConfig(allowed_ips=allowed),
+        api_key=APIKeyConfig(),
+        rate_limit=RateLimitConfig(requests_per_window=limit),
+    )
+    benchmarks.append(_stack_benchmark(
+        "stack.full.pipeline",
+        lambda: SecurityPipeline(
+            _endpoint,
+            config=config,
+            api_key_provider=InMemoryAPIKeyProvider(keys),
+            rate_limit_provider=InMemoryRateLimitProvider(),
+        ),
+        clients, headers,
+    ))
+    return benchmarks
+
+
+# Providers
+
+
+def _api_keys(n: int) -> Dict[str, str]:
+    return {f"account_{i}": f"key-{i:08d}" for i in range(n)}
+
+
+def _ip_entries(n: int) -> List[str]:
+    # Half single hosts, half /24 networks, spread over the IPv4 space
+    rng = random.Random(n)
+    entries = []
+    for i in range(n):
+        address = rng.getrandbits(32)
+        if i % 2:
+            entries.append(f"{address >> 24}.{(address >> 16) & 255}.{(address >> 8) & 255}.0/24")
+        else:
+            entries.append(f"{address >> 24}.{(address >> 16) & 255}.{(address >> 8) & 255}.{address & 255}")
+    return entries
+
+
+def _ip_lookups(entries: List[str], count: int = 1024) -> List[str]:
+    # Alternate listed and (most likely) unlisted addresses
+    rng = random.Random(len(entries))
+    lookups = []
+    for i in range(count):
+        if i % 2:
+            lookups.append(".".join(str(rng.randrange(256)) for _ in range(4)))
+        else:
+            lookups.append(entries[rng.randrange(len(entries))].split("/")[0])
+    return lookups
+
+
+def provider_benchmarks(cardinalities: Iterable[int] = DEFAULT_CARDINALITIES) -> List[Benchmark]:
+    """In-process providers at each cardinality."""
+    from .iprange import compile_ip_ranges
+    from .providers import (
+        ApproximateRateLimitProvider,
+        InMemoryAPIKeyProvider,
+        InMemoryIPWhitelistProvider,
+        InMemoryRateLimitProvider,
+        MMapIPWhitelistProvider,
+    )
+
+    benchmarks = []
+    for n in cardinalities:
+        async def memory_api_key(n=n):
+            keys = list(_api_keys(n).values())
+            provider = InMemoryAPIKeyProvider(_api_keys(n))
+            return (lambda i: provider.validate_key(keys[i % n])), None
+
+        async def memory_ip(n=n):
+            entries = _ip_entries(n)
+            lookups = _ip_lookups(entries)
+            provider = InMemoryIPWhitelistProvider(entries)
+            return (lambda i: provider.is_ip_allowed(lookups[i & 1023])), None
+
+        async def mmap_ip(n=n):
+            entries = _ip_entries(n)
+            lookups = _ip_lookups(entries)
+            fd, path = tempfile.mkstemp(suffix=".ipr")
+            os.close(fd)
+            compile_ip_ranges(entries, path)
+            provider = MMapIPWhitelistProvider(path, check_interval=None)
+
+            async def teardown():
+                provider.close()
+                os.unlink(path)
+
+            return (lambda i: provider.is_ip_allowed(lookups[i & 1023])), teardown
+
+        async def memory_rate_limit(n=n):
+            provider = InMemoryRateLimitProvider()
+            return (lambda i: provider.check_rate_limit(f"client:{i % n}", 1_000_000_000, 60)), None
+
+        async def approximate_rate_limit(n=n):
+            provider = ApproximateRateLimitProvider()
+            return (lambda i: provider.check_rate_limit(f"client:{i % n}", 1_000_000_000, 60)), None
+
+        benchmarks += [
+            Benchmark(f"provider.memory.validate_key[n={n}]", memory_api_key, batch=100),
+            Benchmark(f"provider.memory.is_ip_allowed[n={n}]", memory_ip, batch=100),
+            Benchmark(f"provider.mmap.is_ip_allowed[n={n}]", mmap_ip, batch=100),
+            Benchmark(f"provider.memory.check_rate_limit[n={n}]", memory_rate_limit, batch=100),
+            Benchmark(f"provider.approximate.check_rate_limit[n={n}]", approximate_rate_limit, batch=100),
+        ]
+    return benchmarks
+
+
+def redis_benchmarks(client_factory: Callable[[], Any], cardinalities: Iterable[int] = DEFAULT_CARDINALITIES) -> List[Benchmark]:
+    """
+    Redis providers at each cardinality, against clients from `client_factory()`.
+
+    Keys are written under a unique prefix and deleted afterwards.
+    """
+    from .providers.redis import RedisAPIKeyProvider, RedisRateLimitProvider
+
+    benchmarks = []
+    for n in cardinalities:
+        async def redis_api_key(n=n):
+            client = client_factory()
+            prefix = f"bench:{os.getpid()}:{n}:apikey:"
+            provider = RedisAPIKeyProvider(client, key_prefix=prefix)
+            keys = _api_keys(n)
+            items = list(keys.items())
+            for start in range(0, n, 1000):
+                await client.mset({f"{prefix}{account}": key for account, key in items[start:start + 1000]})
+            values = list(keys.values())
+
+            async def teardown():
+                for start in range(0, n, 1000):
+                    await client.delete(*[f"{prefix}{account}" for account, _ in items[start:start + 1000]])
+                await provider.close()
+
+            # Validation stops at the first match: spread lookups over the whole keyspace
+            return (lambda i: provider.validate_key(values[i * 7919 % n])), teardown
+
+        async def redis_rate_limit(n=n):
+            client = client_factory()
+            prefix = f"bench:{os.getpid()}:{n}:rl:"
+            provider = RedisRateLimitProvider(client)
+
+            async def teardown():
+                for start in range(0, n, 1000):
+                    await client.delete(*[f"{prefix}{i}" for i in range(start, min(n, start + 1000))])
+                await provider.close()
+
+            return (lambda i: provider.check_rate_limit(f"{prefix}{i % n}", 1_000_000_000, 60)), teardown
+
+        benchmarks += [
+            # Validation scans every stored key: keep the sample count low
+            Benchmark(f"provider.redis.validate_key[n={n}]", redis_api_key, max_samples=50),
+            Benchmark(f"provider.redis.check_rate_limit[n={n}]", redis_rate_limit, batch=10),
+        ]
+    return benchmarks
+
+
+async def run_benchmarks(
+    benchmarks: Sequence[Benchmark],
+    samples: int = 200,
+    warmup: int = 20,
+    progress: Optional[Callable[[BenchmarkResult], Any]] = None,
+) -> Dict[str, BenchmarkResult]:
+    """Run benchmarks one after another, on the running event loop."""
+    results: Dict[str, BenchmarkResult] = {}
+    for benchmark in benchmarks:
+        result = await measure(benchmark, samples=samples, warmup=warmup)
+        results[result.name] = result
+        if progress is not None:
+            progress(result)
+    return results
+
+
+# Baselines
+
+
+def save_baseline(path: str, results: Dict[str, BenchmarkResult]) -> None:
+    data = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {name: result.to_dict() for name, result in sorted(results.items())},
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2)
+        fh.write("\n")
+
+
+def load_baseline(path: str) -> Dict[str, BenchmarkResult]:
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path}: unsupported baseline version {data.get('version')!r}")
+    return {name: BenchmarkResult.from_dict(name, values) for name, values in data["results"].items()}
+
+
+def compare(
+    results: Dict[str, BenchmarkResult],
+    baseline: Dict[str, BenchmarkResult],
+    threshold: float = 0.25,
+    metric: str = "p50_us",
+) -> List[Tuple[str, float, float, float]]:
+    """
+    Find regressions against a baseline.
+
+    Latencies regress when they grow by more than `threshold` (0.25 = 25%),
+    ops/sec when it drops by more than that. Benchmarks missing from either
+    side are ignored.
+
+    Returns:
+        (name, baseline value, current value, relative change) per regression
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {METRICS}")
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        old, new = getattr(previous, metric), getattr(result, metric)
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if metric == "ops_per_sec" else change
+        if worse > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def _format_row(result: BenchmarkResult, previous: Optional[BenchmarkResult], metric: str) -> str:
+    row = f"{result.name:<48} {result.p50_us:>10.2f} {result.p99_us:>10.2f} {result.ops_per_sec:>14,.0f}"
+    if previous is not None and getattr(previous, metric):
+        change = (getattr(result, metric) - getattr(previous, metric)) / getattr(previous, metric)
+        row += f" {change:>+8.1%}"
+    return row
+
+
+def _parse_cardinalities(value: str) -> List[int]:
+    try:
+        cardinalities = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected comma-separated integers")
+    if not cardinalities or min(cardinalities) < 1:
+        raise argparse.ArgumentTypeError("cardinalities must be positive")
+    return cardinalities
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point: run the benchmarks, save or compare a baseline."""
+    parser = argparse.ArgumentParser(
+        prog="os-fastapi-benchmark",
+        description="Benchmark the middleware stacks (in-process ASGI) and providers.",
+    )
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="Only run benchmarks whose name contains this text (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    parser.add_argument("--samples", type=int, default=200, help="Timed samples per benchmark (default: 200)")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed samples per benchmark (default: 20)")
+    parser.add_argument("--cardinalities", type=_parse_cardinalities, default=list(DEFAULT_CARDINALITIES),
+                        help="Provider key cardinalities (default: 100,10000,100000)")
+    parser.add_argument("--clients", type=int, default=1000, help="Distinct client IPs in stack benchmarks")
+    parser.add_argument("--redis-url", help="Also benchmark the Redis providers against this server")
+    parser.add_argument("--fake-redis", type=float, metavar="LATENCY_MS",
+                        help="Also benchmark the Redis providers against FakeRedis with this round-trip latency")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with a JSON baseline; exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative regression (default: 0.25 = 25%%)")
+    parser.add_argument("--metric", choices=METRICS, default="p50_us", help="Metric compared (default: p50_us)")
+    args = parser.parse_args(argv)
+
+    benchmarks = stack_benchmarks(args.clients) + provider_benchmarks(args.cardinalities)
+    if args.redis_url:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            parser.error("--redis-url needs the redis package (pip install os-fastapi-middleware[redis])")
+        benchmarks += redis_benchmarks(
+            lambda: redis.from_url(args.redis_url, decode_responses=True), args.cardinalities)
+    elif args.fake_redis is not None:
+        from .testing import FakeRedis
+
+        benchmarks += redis_benchmarks(lambda: FakeRedis(latency=args.fake_redis / 1000), args.cardinalities)
+    if args.filter:
+        benchmarks = [b for b in benchmarks if any(text in b.name for text in args.filter)]
+    if args.list:
+        for benchmark in benchmarks:
+            print(benchmark.name)
+        return 0
+    if not benchmarks:
+        parser.error("no benchmark matches the filter")
+
+    baseline: Dict[str, BenchmarkResult] = {}
+    if args.compare:
+        try:
+            baseline = load_baseline(args.compare)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"cannot read baseline: {e}")
+
+    header = f"{'benchmark':<48} {'p50 us':>10} {'p99 us':>10} {'ops/sec':>14}"
+    print(header + (f" {'change':>8}" if baseline else ""))
+    results = asyncio.run(run_benchmarks(
+        benchmarks,
+        samples=args.samples,
+        warmup=args.warmup,
+        progress=lambda result: print(_format_row(result, baseline.get(result.name), args.metric), flush=True),
+    ))
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"Wrote {args.save}: {len(results)} results")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold, args.metric)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%} in {args.metric}:")
+            for name, old, new, change in regressions:
+                print(f"  {name}: {old:,.2f} -> {new:,.2f} ({change:+.1%})")
+            return 1
+        print(f"\nNo regression over {args.threshold:.0%} in {args.metric}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,7 @@ class APIKeyConfig(BaseModel):
     header_name: str = Field(default="X-API-Key", description="Nome do header da API key")
     exempt_paths: List[str] = Field(
         default=["/health", "/docs", "/redoc", "/openapi.json"],
-        description="Paths that don't require an API key"
+        description="Paths that don't require an API key (exact, '/prefix/**', globs, 're:' regexes)"
     )
     include_metadata: bool = Field(
         default=False,
@@ -59,11 +59,101 @@ class IPWhitelistConfig(BaseModel):
     )
 
 
+class AdminIPBypassConfig(BaseModel):
+    
+    admin_ips: List[str] = Field(
+        default=[],
+        description="Admin IP addresses that bypass all checks (supports CIDR)"
+    )
+    exempt_paths: List[str] = Field(
+        default=[],
+        description="Paths where admin bypass is not evaluated"
+    )
+    trust_proxy_headers: bool = Field(
+        default=True,
+        description="If true trust X-Forwarded-For and X-Real-IP headers"
+    )
+
+
+class RoutePolicy(BaseModel):
+    
+    ip_whitelist: bool = Field(
+        default=True,
+        description="If true apply the IP whitelist to the route"
+    )
+    api_key: bool = Field(
+        default=True,
+        description="If true require an API key for the route"
+    )
+    rate_limit: bool = Field(
+        default=True,
+        description="If true apply rate limiting to the route"
+    )
+    requests_per_window: Optional[int] = Field(
+        default=None,
+        description="Requests allowed per window for the route (defaults to the global limit)"
+    )
+    window_seconds: Optional[int] = Field(
+        default=None,
+        description="Window size in seconds for the route (defaults to the global window)"
+    )
+    tier: Optional[str] = Field(
+        default=None,
+        description="Rate limit bucket name; routes with the same tier share counters "
+                    "(without one, routes share counters per limit and window)"
+    )
+
+
+class RedisConfig(BaseModel):
+
+    url: str = Field(
+        default="redis://localhost:6379/0",
+        description="Redis URL (redis://, rediss:// or unix://)"
+    )
+    max_connections: int = Field(
+        default=20,
+        ge=1,
+        description="Size of the connection pool shared by all Redis providers"
+    )
+    pool_timeout: Optional[float] = Field(
+        default=1.0,
+        description="Seconds to wait for a free connection when the pool is exhausted; None waits forever"
+    )
+    warm_connections: int = Field(
+        default=4,
+        ge=0,
+        description="Connections opened at startup, so the first requests do not pay for the handshake"
+    )
+    socket_timeout: Optional[float] = Field(
+        default=1.0,
+        description="Seconds to wait for a command reply"
+    )
+    socket_connect_timeout: Optional[float] = Field(
+        default=1.0,
+        description="Seconds to wait for a new connection"
+    )
+    health_check_interval: int = Field(
+        default=30,
+        description="Idle seconds after which a connection is checked before reuse (0 disables)"
+    )
+
+    @classmethod
+    def from_env(cls):
+        import os
+
+        config = cls()
+        config.url = os.getenv("SECURITY_REDIS_URL", config.url)
+        config.max_connections = int(os.getenv("SECURITY_REDIS_MAX_CONNECTIONS", config.max_connections))
+        config.warm_connections = int(os.getenv("SECURITY_REDIS_WARM_CONNECTIONS", config.warm_connections))
+        return config
+
+
 class SecurityConfig(BaseModel):
     
     api_key: Optional[APIKeyConfig] = None
     rate_limit: Optional[RateLimitConfig] = None
     ip_whitelist: Optional[IPWhitelistConfig] = None
+    admin_bypass: Optional[AdminIPBypassConfig] = None
     
     @classmethod
     def from_env(cls):
@@ -88,5 +178,11 @@ class SecurityConfig(BaseModel):
             config.ip_whitelist = IPWhitelistConfig(
                 allowed_ips=[ip.strip() for ip in allowed_ips if ip.strip()]
             )
+
+        if os.getenv("SECURITY_ADMIN_BYPASS_ENABLED", "false").lower() == "true":
+            admin_ips = os.getenv("SECURITY_ADMIN_IPS", "").split(",")
+            config.admin_bypass = AdminIPBypassConfig(
+                admin_ips=[ip.strip() for ip in admin_ips if ip.strip()]
+            )
         
         return config
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""Per-request security context shared by middlewares and dependencies."""
+
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from starlette.requests import HTTPConnection
+from starlette.types import Scope
+
+STATE_KEY = "security_context"
+
+# Returned by SecurityContext.cached() for checks that did not run yet
+UNDECIDED: Any = object()
+
+
+class SecurityContext:
+    """
+    Security facts about the current request, attached once to its state.
+
+    Holds the resolved client IP, the validated API key and its metadata,
+    and the result of every provider check made so far. Middlewares and
+    dependencies consult it before calling a provider, so a route protected
+    by both the global middleware and a per-route dependency validates the
+    key (or checks the IP, or counts the rate limit hit) only once.
+
+    Results are keyed by check name, provider and arguments: a dependency
+    with a different provider, key or limit still runs its own check.
+    Provider errors are never memoised.
+
+    `timings` accumulates the time spent in each security stage
+    ("ip_resolve", "admin_bypass", "ip_whitelist", "api_key", "rate_limit"),
+    in nanoseconds from `time.perf_counter_ns()`. It is reported by
+    ServerTimingMiddleware and in RequestLoggingMiddleware records.
+
+    When a middleware was given `metrics=`, decide()/decide_sync() also
+    record context hits and provider latency there, including for
+    dependencies running later in the same request.
+
+    Available as `request.state.security_context`, or via
+    `get_security_context(request)`.
+    """
+
+    __slots__ = ("client_ip", "api_key", "api_key_metadata", "timings", "metrics", "_decisions")
+
+    def __init__(self):
+        self.client_ip: Optional[str] = None
+        self.api_key: Optional[str] = None
+        self.api_key_metadata: Optional[dict] = None
+        self.timings: Dict[str, int] = {}
+        # SecurityMetrics of the instrumented middleware that attached it, if any
+        self.metrics: Any = None
+        self._decisions: Dict[Tuple, Any] = {}
+
+    def add_timing(self, stage: str, elapsed_ns: int) -> None:
+        """Add time spent in a security stage (stages may run more than once)."""
+        self.timings[stage] = self.timings.get(stage, 0) + elapsed_ns
+
+    def timings_ms(self) -> Dict[str, float]:
+        """Stage timings in milliseconds, with microsecond resolution."""
+        return {stage: round(elapsed / 1_000_000, 3) for stage, elapsed in self.timings.items()}
+
+    def server_timing(self) -> str:
+        """Stage timings formatted as a Server-Timing header value."""
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in self.timings_ms().items())
+
+    def cached(self, check: str, provider: Any, *args: Any) -> Any:
+        """Return the memoised result of a check, or UNDECIDED."""
+        return self._decisions.get((check, id(provider), args), UNDECIDED)
+
+    def remember(self, check: str, provider: Any, args: Tuple, result: Any) -> Any:
+        """Memoise the result of a check and return it."""
+        self._decisions[(check, id(provider), args)] = result
+        return result
+
+    def decide_sync(self, check: str, provider: Any, method: Callable, *args: Any) -> Any:
+        """
+        Run a synchronous provider method at most once per request.
+
+        Args:
+            check: Check name, e.g. "validate_key"
+            provider: Provider the method belongs to
+            method: Sync provider method
+            *args: Method arguments
+        """
+        result = self._decisions.get((check, id(provider), args), UNDECIDED)
+        metrics = self.metrics
+        if metrics is None:
+            if result is UNDECIDED:
+                result = self._decisions[(check, id(provider), args)] = method(*args)
+            return result
+
+        metrics.context_lookup(check, result is not UNDECIDED)
+        if result is UNDECIDED:
+            started = perf_counter_ns()
+            try:
+                result = self._decisions[(check, id(provider), args)] = method(*args)
+            finally:
+                metrics.provider_call(provider, check, perf_counter_ns() - started)
+        return result
+
+    async def decide(self, check: str, provider: Any, method: Callable, *args: Any) -> Any:
+        """Async counterpart of decide_sync()."""
+        result = self._decisions.get((check, id(provider), args), UNDECIDED)
+        metrics = self.metrics
+        if metrics is None:
+            if result is UNDECIDED:
+                result = self._decisions[(check, id(provider), args)] = await method(*args)
+            return result
+
+        metrics.context_lookup(check, result is not UNDECIDED)
+        if result is UNDECIDED:
+            started = perf_counter_ns()
+            try:
+                result = self._decisions[(check, id(provider), args)] = await method(*args)
+            finally:
+                metrics.provider_call(provider, check, perf_counter_ns() - started)
+        return result
+
+
+def get_security_context(request: Union[HTTPConnection, Scope]) -> SecurityContext:
+    """
+    Return the SecurityContext of a request, attaching a new one on first use.
+
+    Args:
+        request: Request/WebSocket, or a raw ASGI scope
+    """
+    scope = request.scope if isinstance(request, HTTPConnection) else request
+    state = scope.setdefault("state", {})
+    context = state.get(STATE_KEY)
+    if context is None:
+        context = state[STATE_KEY] = SecurityContext()
+    return context
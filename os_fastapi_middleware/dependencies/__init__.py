@@ -1,7 +1,22 @@
-from .api_key import APIKeyDependency, get_api_key_metadata
-from .ip_whitelist import IPWhitelistDependency
-from .rate_limit import RateLimitDependency
-from .admin_ip_bypass import AdminIPBypassDependency
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "APIKeyDependency": ".api_key",
+    "get_api_key_metadata": ".api_key",
+    "IPWhitelistDependency": ".ip_whitelist",
+    "RateLimitDependency": ".rate_limit",
+    "AdminIPBypassDependency": ".admin_ip_bypass",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, globals(), _EXPORTS)
+
+if TYPE_CHECKING:
+    from .api_key import APIKeyDependency, get_api_key_metadata
+    from .ip_whitelist import IPWhitelistDependency
+    from .rate_limit import RateLimitDependency
+    from .admin_ip_bypass import AdminIPBypassDependency
 
 __all__ = [
     "APIKeyDependency",
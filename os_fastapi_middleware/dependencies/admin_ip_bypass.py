@@ -3,7 +3,10 @@ from typing import Optional, Callable, List, Union
 
 from fastapi import Request
 
+from os_fastapi_middleware.context import get_security_context
 from os_fastapi_middleware.exceptions import ForbiddenException
+from os_fastapi_middleware.providers.base import BaseIPWhitelistProvider, resolve_sync_method
+from os_fastapi_middleware.utils import IPNetworkMatcher
 
 
 class AdminIPBypassDependency:
@@ -17,6 +20,9 @@ class AdminIPBypassDependency:
     - If no match, returns False by default.
     - If auto_error=True and no match, raises ForbiddenException("Admin IP required").
 
+    Admin IPs may be single addresses or CIDR networks, or come from any
+    BaseIPWhitelistProvider passed as `provider`.
+
     It never blocks matching admin requests and does not modify responses.
     """
 
@@ -26,11 +32,15 @@ class AdminIPBypassDependency:
         trust_proxy_headers: bool = True,
         on_match: Optional[Callable[[Request, str], None]] = None,
         auto_error: bool = False,
+        provider: Optional[BaseIPWhitelistProvider] = None,
     ): 
         if isinstance(admin_ips, str):
             self.admin_ips = {admin_ips}
         else:
             self.admin_ips = set(admin_ips or [])
+        self.provider = provider
+        self._is_ip_allowed_sync = resolve_sync_method(provider, "is_ip_allowed") if provider else None
+        self._matcher = IPNetworkMatcher(self.admin_ips)
         self.trust_proxy_headers = trust_proxy_headers
         self.on_match = on_match
         self.auto_error = auto_error
@@ -54,14 +64,27 @@ class AdminIPBypassDependency:
         except ValueError:
             return "127.0.0.1"
 
+    async def _is_admin(self, client_ip: str) -> bool:
+        if client_ip in self._matcher:
+            return True
+        if self.provider is None:
+            return False
+        try:
+            if self._is_ip_allowed_sync is not None:
+                return bool(self._is_ip_allowed_sync(client_ip))
+            return bool(await self.provider.is_ip_allowed(client_ip))
+        except Exception:
+            return False
+
     async def __call__(self, request: Request):
         client_ip = self._get_client_ip(request)
 
         # Always propagate the current client_ip for this request
         request.state.client_ip = client_ip
+        get_security_context(request).client_ip = client_ip
 
         # Reset and set admin_bypass strictly based on current request IP
-        is_admin = client_ip in self.admin_ips
+        is_admin = await self._is_admin(client_ip)
         request.state.admin_bypass = bool(is_admin)
 
         if is_admin:
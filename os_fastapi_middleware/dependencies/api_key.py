@@ -1,7 +1,8 @@
 from typing import Optional
 from fastapi import Header, Depends, Request
 
-from os_fastapi_middleware.providers.base import BaseAPIKeyProvider
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.providers.base import BaseAPIKeyProvider, resolve_sync_method
 from os_fastapi_middleware.exceptions import UnauthorizedException, ForbiddenException
 
 
@@ -14,6 +15,7 @@ class APIKeyDependency:
         auto_error: bool = True
     ):
         self.provider = provider
+        self._validate_key_sync = resolve_sync_method(provider, "validate_key")
         self.header_name = header_name
         self.auto_error = auto_error
     
@@ -27,20 +29,33 @@ class APIKeyDependency:
                 raise UnauthorizedException(f"API key required in '{self.header_name}' header")
             return None
         
-        is_valid = await self.provider.validate_key(api_key)
+        # Skip the provider if a middleware already validated this key
+        context = get_security_context(request)
+        if self._validate_key_sync is not None:
+            is_valid = context.decide_sync("validate_key", self.provider, self._validate_key_sync, api_key)
+        else:
+            is_valid = await context.decide("validate_key", self.provider, self.provider.validate_key, api_key)
         
         if not is_valid:
             if self.auto_error:
                 raise ForbiddenException("Invalid API key")
             return None
         
+        context.api_key = api_key
         return api_key
 
 
 def get_api_key_metadata(provider: BaseAPIKeyProvider):
     
-    async def dependency(api_key: str = Depends(APIKeyDependency(provider))):
-        metadata = await provider.get_key_metadata(api_key)
+    get_key_metadata_sync = resolve_sync_method(provider, "get_key_metadata")
+
+    async def dependency(request: Request, api_key: str = Depends(APIKeyDependency(provider))):
+        context = get_security_context(request)
+        if get_key_metadata_sync is not None:
+            metadata = context.decide_sync("get_key_metadata", provider, get_key_metadata_sync, api_key)
+        else:
+            metadata = await context.decide("get_key_metadata", provider, provider.get_key_metadata, api_key)
+        context.api_key_metadata = metadata
         return metadata
     
     return dependency
\ No newline at end of file
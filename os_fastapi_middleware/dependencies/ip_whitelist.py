@@ -1,6 +1,7 @@
 import ipaddress
 from fastapi import Request
-from os_fastapi_middleware.providers.base import BaseIPWhitelistProvider
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.providers.base import BaseIPWhitelistProvider, resolve_sync_method
 from os_fastapi_middleware.exceptions import IPNotAllowedException
 
 
@@ -8,6 +9,7 @@ class IPWhitelistDependency:
     
     def __init__(self, provider: BaseIPWhitelistProvider):
         self.provider = provider
+        self._is_ip_allowed_sync = resolve_sync_method(provider, "is_ip_allowed")
     
     def _get_client_ip(self, request: Request) -> str:
         forwarded_for = request.headers.get("X-Forwarded-For")
@@ -42,7 +44,13 @@ class IPWhitelistDependency:
             # Shouldn't happen due to default, but keep explicit guard
             raise IPNotAllowedException("unknown")
         
-        is_allowed = await self.provider.is_ip_allowed(client_ip)
+        # Skip the provider if a middleware already checked this IP
+        context = get_security_context(request)
+        context.client_ip = client_ip
+        if self._is_ip_allowed_sync is not None:
+            is_allowed = context.decide_sync("is_ip_allowed", self.provider, self._is_ip_allowed_sync, client_ip)
+        else:
+            is_allowed = await context.decide("is_ip_allowed", self.provider, self.provider.is_ip_allowed, client_ip)
         
         if not is_allowed:
             raise IPNotAllowedException(client_ip)
@@ -2,7 +2,8 @@ from typing import Callable, Optional
 from fastapi import Request
 
 from os_fastapi_middleware.exceptions import RateLimitExceededException
-from os_fastapi_middleware.providers.base import BaseRateLimitProvider
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.providers.base import BaseRateLimitProvider, resolve_sync_method
 
 
 class RateLimitDependency:
@@ -15,6 +16,7 @@ class RateLimitDependency:
             key_func: Optional[Callable[[Request], str]] = None
     ):
         self.provider = provider
+        self._check_rate_limit_sync = resolve_sync_method(provider, "check_rate_limit")
         self.requests_per_window = requests_per_window
         self.window_seconds = window_seconds
         self.key_func = key_func or self._default_key_func
@@ -42,11 +44,18 @@ class RateLimitDependency:
 
         key = self.key_func(request)
 
-        within_limit = await self.provider.check_rate_limit(
-            key=key,
-            limit=self.requests_per_window,
-            window_seconds=self.window_seconds
-        )
+        # The same limit is counted once per request, even if a middleware checked it already
+        context = get_security_context(request)
+        if self._check_rate_limit_sync is not None:
+            within_limit = context.decide_sync(
+                "check_rate_limit", self.provider, self._check_rate_limit_sync,
+                key, self.requests_per_window, self.window_seconds
+            )
+        else:
+            within_limit = await context.decide(
+                "check_rate_limit", self.provider, self.provider.check_rate_limit,
+                key, self.requests_per_window, self.window_seconds
+            )
 
         if not within_limit:
             raise RateLimitExceededException(
@@ -0,0 +1,385 @@
+"""Fixed-memory tracking of the rate limit keys that drive the most traffic."""
+
+import math
+import time
+from array import array
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_GOLDEN64 = 0x9E3779B97F4A7C15
+
+
+class CountMinSketch:
+    """
+    Approximate counts of any number of keys in `width * depth` counters.
+
+    Estimates never undercount. With conservative update (only the counters
+    at the current minimum grow), an estimate exceeds the true count by at
+    most e / width of the total count with probability 1 - exp(-depth):
+    0.13% of the traffic for the default width of 2048. The bound needs the
+    rows to fail independently, so each row hashes keys with its own seed.
+
+    Counters are a list by default; pass an array typecode (e.g. "I" for
+    4-byte unsigned counters) for large sketches where memory matters.
+    Sketches of the same width and depth map a key to the same cells, so
+    `cells(key)` can be hashed once and used on several of them.
+    """
+
+    __slots__ = ("width", "depth", "total", "typecode", "_table", "_rows")
+
+    def __init__(self, width: int = 2048, depth: int = 4, typecode: Optional[str] = None):
+        """
+        Args:
+            width: Counters per row; the error bound is e / width of the total
+            depth: Rows; the bound fails with probability exp(-depth)
+            typecode: Optional array typecode of the counters (a list of ints by default)
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.typecode = typecode
+        self.total = 0
+        self._table = self._new_table()
+        # (seed of the row hash, offset of the row in the table)
+        self._rows = [((row + 1) * _GOLDEN64 & _MASK64, row * width) for row in range(depth)]
+
+    def _new_table(self):
+        size = self.width * self.depth
+        if self.typecode is None:
+            return [0] * size
+        table = array(self.typecode)
+        table.frombytes(bytes(size * table.itemsize))
+        return table
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the counters (the list's pointers for list tables)."""
+        if self.typecode is None:
+            return len(self._table) * 8
+        return len(self._table) * self._table.itemsize
+
+    def cells(self, key: Hashable) -> List[int]:
+        """Table positions of `key`, one per row."""
+        # Each row mixes hash(key) with its own seed (splitmix64 finaliser), so keys
+        # sharing a cell in one row are no more likely to share one in the others
+        h = hash(key)
+        width = self.width
+        cells = []
+        for seed, offset in self._rows:
+            z = (h + seed) & _MASK64
+            z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+            z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK64
+            cells.append(offset + (z ^ (z >> 31)) % width)
+        return cells
+
+    def add(self, key: Hashable, count: int = 1) -> int:
+        """Count `key` and return its new estimate."""
+        return self.add_cells(self.cells(key), count)
+
+    def add_cells(self, cells: List[int], count: int = 1) -> int:
+        table = self._table
+        estimate = min([table[cell] for cell in cells]) + count
+        for cell in cells:
+            if table[cell] < estimate:
+                table[cell] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        return self.estimate_cells(self.cells(key))
+
+    def estimate_cells(self, cells: List[int]) -> int:
+        table = self._table
+        return min([table[cell] for cell in cells])
+
+    def clear(self) -> None:
+        self.total = 0
+        self._table = self._new_table()
+
+
+class SpaceSaving:
+    """
+    Top-k keys of a stream with at most `capacity` counters (Metwally et al.).
+
+    A new key replaces the key with the smallest count and inherits that
+    count as its possible overestimate (`error`). Any key seen more than
+    total / capacity times is guaranteed to be tracked. Counters are kept in
+    buckets by count (the "stream summary"), so a unit increment and an
+    eviction are both O(1).
+    """
+
+    __slots__ = ("capacity", "_counts", "_errors", "_buckets", "_min")
+
+    def __init__(self, capacity: int = 100):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        # count -> keys with that count (dict used as an ordered set)
+        self._buckets: Dict[int, Dict[Hashable, None]] = {}
+        self._min = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._counts
+
+    def add(self, key: Hashable) -> None:
+        counts = self._counts
+        count = counts.get(key)
+        if count is None:
+            if len(counts) < self.capacity:
+                count = 0
+                self._errors[key] = 0
+                # The new key's count of 1 is the smallest possible
+                self._min = 1
+            else:
+                # Evict the oldest key with the smallest count
+                count = self._min
+                bucket = self._buckets[count]
+                evicted = next(iter(bucket))
+                self._detach(evicted, count)
+                del counts[evicted]
+                del self._errors[evicted]
+                self._errors[key] = count
+        else:
+            self._detach(key, count)
+        count += 1
+        counts[key] = count
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            bucket = self._buckets[count] = {}
+        bucket[key] = None
+        if count - 1 == self._min and (count - 1) not in self._buckets:
+            self._min = count
+
+    def _detach(self, key: Hashable, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+    def count(self, key: Hashable) -> Optional[Tuple[int, int]]:
+        """(count, error) of a tracked key, or None."""
+        count = self._counts.get(key)
+        return None if count is None else (count, self._errors[key])
+
+    def items(self) -> List[Tuple[Hashable, int, int]]:
+        """Tracked (key, count, error), largest count first."""
+        return sorted(
+            ((key, count, self._errors[key]) for key, count in self._counts.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._errors.clear()
+        self._buckets.clear()
+        self._min = 0
+
+
+class _Epoch:
+    __slots__ = ("started", "top", "requests", "limited")
+
+    def __init__(self, started: float, capacity: int, width: int, depth: int):
+        self.started = started
+        self.top = SpaceSaving(capacity)
+        self.requests = CountMinSketch(width, depth)
+        self.limited = CountMinSketch(width, depth)
+
+
+class HeavyHitterTracker:
+    """
+    Which rate limit keys (API keys, client IPs) send the most requests.
+
+    Pass it as `heavy_hitters=` to RateLimitMiddleware or SecurityPipeline:
+    every rate limit decision records its key in O(1) time, and memory is
+    fixed whatever the number of keys. The top `capacity` keys are tracked
+    with SpaceSaving, and their counts are tightened with a CountMinSketch,
+    which also estimates any other key (`estimate()`). A second sketch
+    counts rate-limited requests per key.
+
+    Counts cover a sliding window of `window_seconds`, made of the current
+    and the previous epoch (the previous one weighted by how much of it
+    still overlaps the window), so old bursts age out. Rates are requests
+    per second over that window.
+
+    Updates are plain attribute changes without locks: record from the
+    event loop only, like SecurityMetrics.
+
+    Usage example:
+        tracker = HeavyHitterTracker(capacity=200)
+        app.add_middleware(RateLimitMiddleware, provider=provider, heavy_hitters=tracker)
+        app.add_route("/admin/heavy-hitters", heavy_hitters_endpoint(tracker))
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100,
+        window_seconds: float = 60.0,
+        width: int = 2048,
+        depth: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            capacity: Keys tracked exactly enough to be ranked (top-k size)
+            window_seconds: Sliding window the counts and rates cover
+            width: Count-min sketch width (overcount at most e / width of the traffic)
+            depth: Count-min sketch depth (bound fails with probability exp(-depth))
+            clock: Time source, in seconds
+        """
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be positive")
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.width = width
+        self.depth = depth
+        self.clock = clock
+        now = clock()
+        self._current = _Epoch(now, capacity, width, depth)
+        self._previous: Optional[_Epoch] = None
+
+    def _epoch(self) -> _Epoch:
+        now = self.clock()
+        current = self._current
+        if now - current.started >= self.window_seconds:
+            if now - current.started >= 2 * self.window_seconds:
+                # Idle for more than a window: nothing left to carry over
+                self._previous = None
+                started = now
+            else:
+                # Epochs stay back to back, so the previous one's weight is exact
+                self._previous = current
+                started = current.started + self.window_seconds
+            current = self._current = _Epoch(started, self.capacity, self.width, self.depth)
+        return current
+
+    def record(self, key: Hashable, limited: bool = False) -> None:
+        """Count one request for `key`, and whether it was rate limited."""
+        epoch = self._epoch()
+        epoch.top.add(key)
+        epoch.requests.add(key)
+        if limited:
+            epoch.limited.add(key)
+
+    def _weight(self) -> float:
+        # Share of the previous epoch still inside the sliding window
+        elapsed = self.clock() - self._current.started
+        return max(0.0, 1.0 - elapsed / self.window_seconds)
+
+    def _epoch_count(self, epoch: _Epoch, key: Hashable) -> Tuple[int, int]:
+        tracked = epoch.top.count(key)
+        estimate = epoch.requests.estimate(key)
+        if tracked is None:
+            return estimate, estimate
+        count, error = tracked
+        # Both overestimate: the smaller bound is the better one
+        return min(count, estimate), min(error, count)
+
+    def estimate(self, key: Hashable) -> Dict[str, float]:
+        """Approximate requests and rate-limited requests of any key over the window."""
+        self._epoch()
+        weight = self._weight()
+        requests, _ = self._epoch_count(self._current, key)
+        limited = self._current.limited.estimate(key)
+        if self._previous is not None and weight:
+            previous, _ = self._epoch_count(self._previous, key)
+            requests += previous * weight
+            limited += self._previous.limited.estimate(key) * weight
+        return {
+            "requests": requests,
+            "limited": limited,
+            "rate": requests / self.window_seconds,
+        }
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        """
+        The `n` keys with the most requests over the window.
+
+        Returns:
+            Dicts with `key`, `requests` (approximate, never under the true
+            count), `error` (maximum overcount), `rate` (requests per second)
+            and `limited` (approximate rate-limited requests), largest first
+        """
+        self._epoch()
+        weight = self._weight()
+        current, previous = self._current, self._previous
+        if previous is None or not weight:
+            previous = None
+        keys = list(current.top._counts)
+        if previous is not None:
+            keys.extend(key for key in previous.top._counts if key not in current.top)
+
+        entries = []
+        for key in keys:
+            requests, error = self._epoch_count(current, key)
+            limited = current.limited.estimate(key)
+            if previous is not None:
+                previous_requests, previous_error = self._epoch_count(previous, key)
+                requests += previous_requests * weight
+                error += previous_error * weight
+                limited += previous.limited.estimate(key) * weight
+            entries.append({
+                "key": key,
+                "requests": round(requests, 1),
+                "error": round(error, 1),
+                "rate": round(requests / self.window_seconds, 3),
+                "limited": round(min(limited, requests), 1),
+            })
+        entries.sort(key=lambda entry: entry["requests"], reverse=True)
+        return entries[:n]
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals over the window and the memory bound."""
+        self._epoch()
+        weight = self._weight()
+        requests = self._current.requests.total
+        limited = self._current.limited.total
+        if self._previous is not None:
+            requests += self._previous.requests.total * weight
+            limited += self._previous.limited.total * weight
+        return {
+            "window_seconds": self.window_seconds,
+            "requests": round(requests, 1),
+            "limited": round(limited, 1),
+            "rate": round(requests / self.window_seconds, 3),
+            "tracked_keys": len(self._current.top),
+            "capacity": self.capacity,
+            # Overcount bound of any estimate, as a share of the traffic
+            "max_overcount": round(math.e / self.width * requests, 1),
+        }
+
+    def reset(self) -> None:
+        self._current = _Epoch(self.clock(), self.capacity, self.width, self.depth)
+        self._previous = None
+
+
+def heavy_hitters_endpoint(tracker: HeavyHitterTracker, default_n: int = 20, max_n: int = 1000) -> Callable[[Request], Response]:
+    """
+    Build a Starlette endpoint returning the tracker's top keys as JSON.
+
+    `?n=50` selects how many keys are returned. Keys are API keys and client
+    IPs: protect the route (e.g. with AdminIPBypassDependency or an IP
+    whitelist) before exposing it.
+
+    Usage example:
+        app.add_route("/admin/heavy-hitters", heavy_hitters_endpoint(tracker), include_in_schema=False)
+    """
+
+    async def heavy_hitters(request: Request) -> Response:
+        try:
+            n = int(request.query_params.get("n", default_n))
+        except ValueError:
+            return JSONResponse({"detail": "n must be an integer"}, status_code=400)
+        n = max(1, min(n, max_n))
+        return JSONResponse({"stats": tracker.stats(), "top": tracker.top(n)})
+
+    return heavy_hitters
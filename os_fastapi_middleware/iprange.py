@@ -0,0 +1,255 @@
+"""Precompiled, memory-mappable IP range index files.
+
+Very large allow/deny lists (threat-intel feeds with millions of entries) are
+compiled offline into a sorted binary file of non-overlapping ranges. At
+runtime the file is mmapped read-only and binary-searched in place, so startup
+is instant, no `ipaddress` objects are built and the pages are shared by every
+worker process through the OS page cache.
+
+File layout (all integers big-endian):
+
+    header   8s magic, Q ipv4 range count, Q ipv6 range count
+    ipv4     count * (I start, I end)
+    ipv6     count * (Q start_hi, Q start_lo, Q end_hi, Q end_lo)
+
+Compile with the CLI entry point:
+
+    os-fastapi-compile-ip-ranges feed1.txt feed2.txt -o blocked.ipr
+"""
+
+import argparse
+import bisect
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+MAGIC = b"OSIPR001"
+
+_HEADER = struct.Struct(">8sQQ")
+_V4 = struct.Struct(">II")
+_V6 = struct.Struct(">QQQQ")
+_MASK64 = (1 << 64) - 1
+
+
+def parse_range(entry: str) -> Tuple[int, int, int]:
+    """
+    Parse an IP, CIDR network or "start-end" range.
+
+    Args:
+        entry: Entry to parse (e.g. "10.0.0.1", "10.0.0.0/8", "10.0.0.1-10.0.0.9")
+
+    Returns:
+        Tuple (version, start, end) with integer addresses
+
+    Raises:
+        ValueError: If the entry is not valid
+    """
+    entry = entry.strip()
+    if "-" in entry:
+        first, last = (part.strip() for part in entry.split("-", 1))
+        start, end = ipaddress.ip_address(first), ipaddress.ip_address(last)
+        if start.version != end.version or end < start:
+            raise ValueError(f"Invalid range: {entry}")
+        return start.version, int(start), int(end)
+
+    network = ipaddress.ip_network(entry, strict=False)
+    return network.version, int(network.network_address), int(network.broadcast_address)
+
+
+def _merge(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def compile_ip_ranges(entries: Iterable[str], output_path: str, strict: bool = False) -> Tuple[int, int]:
+    """
+    Compile IPs, networks and ranges into an index file.
+
+    Overlapping and adjacent ranges are merged. The file is written to a
+    temporary name and atomically renamed, so running workers can pick up the
+    new file without ever seeing a partial one.
+
+    Args:
+        entries: Iterable of entries; blank lines and "#" comments are skipped
+        output_path: Destination file
+        strict: If true, raise on invalid entries instead of skipping them
+
+    Returns:
+        Tuple (ipv4 range count, ipv6 range count) written
+    """
+    v4: List[Tuple[int, int]] = []
+    v6: List[Tuple[int, int]] = []
+    for line in entries:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            version, start, end = parse_range(line)
+        except ValueError:
+            if strict:
+                raise
+            continue
+        (v4 if version == 4 else v6).append((start, end))
+
+    v4 = _merge(v4)
+    v6 = _merge(v6)
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".iprange-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_HEADER.pack(MAGIC, len(v4), len(v6)))
+            for start, end in v4:
+                fh.write(_V4.pack(start, end))
+            for start, end in v6:
+                fh.write(_V6.pack(start >> 64, start & _MASK64, end >> 64, end & _MASK64))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return len(v4), len(v6)
+
+
+class _Starts(Sequence):
+    """Sequence view of the range start values, for use with bisect."""
+
+    __slots__ = ("_buf", "_offset", "_count", "_struct", "_wide")
+
+    def __init__(self, buf, offset: int, count: int, record: struct.Struct, wide: bool):
+        self._buf = buf
+        self._offset = offset
+        self._count = count
+        self._struct = record
+        self._wide = wide
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, index: int) -> tuple:
+        return self._struct.unpack_from(self._buf, self._offset + index * self._struct.size)
+
+    def __getitem__(self, index: int) -> int:
+        values = self.record(index)
+        if self._wide:
+            return (values[0] << 64) | values[1]
+        return values[0]
+
+
+class IPRangeIndex:
+    """
+    Read-only, memory-mapped view of a compiled IP range file.
+
+    Lookups binary-search the mapped file directly; nothing is deserialised
+    up front, so opening a file of any size is O(1).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            stat = os.fstat(fh.fileno())
+            self.identity = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if stat.st_size < _HEADER.size:
+                raise ValueError(f"{path} is not an IP range index file")
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, v4_count, v6_count = _HEADER.unpack_from(self._mm, 0)
+        expected = _HEADER.size + v4_count * _V4.size + v6_count * _V6.size
+        if magic != MAGIC or len(self._mm) != expected:
+            self._mm.close()
+            raise ValueError(f"{path} is not a valid IP range index file")
+
+        v6_offset = _HEADER.size + v4_count * _V4.size
+        self._v4 = _Starts(self._mm, _HEADER.size, v4_count, _V4, wide=False)
+        self._v6 = _Starts(self._mm, v6_offset, v6_count, _V6, wide=True)
+
+    @property
+    def ipv4_count(self) -> int:
+        return len(self._v4)
+
+    @property
+    def ipv6_count(self) -> int:
+        return len(self._v6)
+
+    def __len__(self) -> int:
+        return len(self._v4) + len(self._v6)
+
+    def __contains__(self, ip: str) -> bool:
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        return self.contains_int(addr.version, int(addr))
+
+    def contains_int(self, version: int, value: int) -> bool:
+        starts = self._v4 if version == 4 else self._v6
+        pos = bisect.bisect_right(starts, value) - 1
+        if pos < 0:
+            return False
+        record = starts.record(pos)
+        if version == 4:
+            end = record[1]
+        else:
+            end = (record[2] << 64) | record[3]
+        return value <= end
+
+    def iter_ranges(self):
+        """Yield (start, end) ipaddress objects for every range (debugging only)."""
+        for index in range(len(self._v4)):
+            start, end = self._v4.record(index)
+            yield ipaddress.IPv4Address(start), ipaddress.IPv4Address(end)
+        for index in range(len(self._v6)):
+            sh, sl, eh, el = self._v6.record(index)
+            yield ipaddress.IPv6Address((sh << 64) | sl), ipaddress.IPv6Address((eh << 64) | el)
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def _read_lines(paths: Sequence[str]) -> Iterable[str]:
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(path, "r", encoding="utf-8") as fh:
+            yield from fh
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point: compile text lists into an IP range index file."""
+    parser = argparse.ArgumentParser(
+        prog="os-fastapi-compile-ip-ranges",
+        description="Compile IPs, CIDR networks and start-end ranges into a memory-mappable index file.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Input files, one entry per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="Output index file")
+    parser.add_argument("--strict", action="store_true", help="Fail on invalid entries instead of skipping them")
+    args = parser.parse_args(argv)
+
+    try:
+        v4_count, v6_count = compile_ip_ranges(_read_lines(args.inputs), args.output, strict=args.strict)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Wrote {args.output}: {v4_count} IPv4 ranges, {v6_count} IPv6 ranges")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""In-process security metrics with Prometheus text exposition (no prometheus_client needed)."""
+
+import threading
+from bisect import bisect_left
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Provider latencies, in seconds: 100us to 5s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class _GaugeValue:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the value with `function()` at exposition time."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; made cumulative at exposition time
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    """
+    A named metric and its values per label combination.
+
+    Values are plain attributes updated without locks: metrics are recorded
+    from the event loop, where nothing can interleave with `+=`. Only
+    creating a new label combination takes the lock.
+    """
+
+    _value_types = {"counter": _CounterValue, "gauge": _GaugeValue}
+
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        """Value for one label combination (created on first use)."""
+        child = self._values.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._values.get(values)
+                if child is None:
+                    if self.kind == "histogram":
+                        child = _HistogramValue(self.buckets)
+                    else:
+                        child = self._value_types[self.kind]()
+                    self._values[values] = child
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._values.items()):
+            if self.kind == "histogram":
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                    cumulative += count
+                    le = 'le="' + _format_value(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+                labels = _format_labels(self.labelnames, values)
+                lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+                lines.append(f"{self.name}_count{labels} {child.count}")
+            else:
+                value = child.get() if self.kind == "gauge" else child.value
+                lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metric families, rendered in the Prometheus text format.
+
+    Families are registered by name; asking again for an existing name
+    returns the same family, so several middlewares can share a registry.
+
+    Usage example:
+        registry = MetricsRegistry()
+        hits = registry.counter("cache_hits_total", "Cache hits", ["cache"])
+        hits.labels("keys").inc()
+        app.add_route("/metrics", metrics_endpoint(registry))
+    """
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind: str, name: str, documentation: str, labelnames: Sequence[str], **options) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(kind, name, documentation, labelnames, **options)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered as a {family.kind} {family.labelnames}")
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family("counter", name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family("gauge", name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> MetricFamily:
+        return self._family("histogram", name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[MetricFamily]:
+        return self._families.get(name)
+
+    def render(self) -> str:
+        """All families in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+def metrics_endpoint(registry: "MetricsRegistry") -> Callable[[Request], Response]:
+    """
+    Build a Starlette endpoint serving `registry` for Prometheus to scrape.
+
+    Usage example:
+        app.add_route("/metrics", metrics_endpoint(metrics.registry), include_in_schema=False)
+    """
+    if isinstance(registry, SecurityMetrics):
+        registry = registry.registry
+
+    async def metrics(request: Request) -> Response:
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    return metrics
+
+
+class SecurityMetrics:
+    """
+    Metrics recorded by the security middlewares and SecurityPipeline.
+
+    Pass the same instance as `metrics=` to every middleware (or to the
+    pipeline) and expose `registry` with metrics_endpoint(). Families, all
+    prefixed with `namespace`:
+
+        security_decisions_total{stage, decision, reason}
+            decision: allow, reject, error, skip or bypass
+        security_provider_seconds{provider, check}
+            latency of provider calls (cached results are not calls)
+        security_context_lookups_total{check, result}
+            result: hit (answered by the request's SecurityContext) or miss
+        security_rate_limit_near_exhaustion{stage}
+            keys that used at least `near_exhaustion` of their limit in the
+            current window (observed when rate limit headers are computed)
+
+    Usage example:
+        metrics = SecurityMetrics()
+        app.add_middleware(APIKeyMiddleware, provider=provider, metrics=metrics)
+        app.add_route("/metrics", metrics_endpoint(metrics))
+    """
+
+    def __init__(
+        self,
+        registry: Optional[MetricsRegistry] = None,
+        namespace: str = "os_fastapi",
+        near_exhaustion: float = 0.9,
+        max_tracked_keys: int = 100000,
+    ):
+        """
+        Args:
+            registry: Registry to add the families to (a new one by default)
+            namespace: Prefix of the metric names
+            near_exhaustion: Fraction of the limit from which a key counts as near exhaustion
+            max_tracked_keys: Maximum keys tracked for the near exhaustion gauge
+        """
+        self.registry = registry or MetricsRegistry()
+        prefix = f"{namespace}_" if namespace else ""
+        self.decisions = self.registry.counter(
+            f"{prefix}security_decisions_total",
+            "Security decisions by stage, decision and reason",
+            ("stage", "decision", "reason"),
+        )
+        self.provider_seconds = self.registry.histogram(
+            f"{prefix}security_provider_seconds",
+            "Latency of security provider calls",
+            ("provider", "check"),
+        )
+        self.context_lookups = self.registry.counter(
+            f"{prefix}security_context_lookups_total",
+            "Provider checks answered by the request's SecurityContext (hit) or by the provider (miss)",
+            ("check", "result"),
+        )
+        self.rate_limit_near_exhaustion = self.registry.gauge(
+            f"{prefix}security_rate_limit_near_exhaustion",
+            "Rate limit keys near exhaustion in their current window",
+            ("stage",),
+        )
+        self.near_exhaustion = near_exhaustion
+        self.max_tracked_keys = max_tracked_keys
+        # stage -> key -> monotonic end of the window in which it neared its limit
+        self._exhausted: Dict[str, Dict[str, float]] = {}
+
+    def decision(self, stage: str, decision: str, reason: str) -> None:
+        self.decisions.labels(stage, decision, reason).inc()
+
+    def provider_call(self, provider: Any, check: str, elapsed_ns: int) -> None:
+        self.provider_seconds.labels(type(provider).__name__, check).observe(elapsed_ns / 1e9)
+
+    def context_lookup(self, check: str, hit: bool) -> None:
+        self.context_lookups.labels(check, "hit" if hit else "miss").inc()
+
+    def rate_limit_remaining(self, stage: str, key: str, remaining: int, limit: int, window_seconds: int) -> None:
+        """Record the remaining requests of a key after a hit."""
+        if limit <= 0 or limit - remaining < limit * self.near_exhaustion:
+            return
+        keys = self._exhausted.get(stage)
+        if keys is None:
+            keys = self._exhausted[stage] = {}
+            self.rate_limit_near_exhaustion.labels(stage).set_function(lambda: self._count_exhausted(stage))
+        if key in keys or len(keys) < self.max_tracked_keys:
+            keys[key] = monotonic() + window_seconds
+
+    def _count_exhausted(self, stage: str) -> int:
+        keys = self._exhausted.get(stage, {})
+        now = monotonic()
+        for key in [key for key, until in keys.items() if until <= now]:
+            del keys[key]
+        return len(keys)
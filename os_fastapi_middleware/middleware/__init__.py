@@ -1,8 +1,32 @@
-from .api_key import APIKeyMiddleware
-from .ip_whitelist import IPWhitelistMiddleware
-from .rate_limit import RateLimitMiddleware
-from .request_logger import RequestLoggingMiddleware
-from .admin_ip_bypass import AdminIPBypassMiddleware
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "APIKeyMiddleware": ".api_key",
+    "APIKeyASGIMiddleware": ".api_key",
+    "IPWhitelistMiddleware": ".ip_whitelist",
+    "IPWhitelistASGIMiddleware": ".ip_whitelist",
+    "RateLimitMiddleware": ".rate_limit",
+    "RateLimitASGIMiddleware": ".rate_limit",
+    "RequestLoggingMiddleware": ".request_logger",
+    "RequestLoggingASGIMiddleware": ".request_logger",
+    "AdminIPBypassMiddleware": ".admin_ip_bypass",
+    "AdminIPBypassASGIMiddleware": ".admin_ip_bypass",
+    "SecurityPipeline": ".pipeline",
+    "ServerTimingMiddleware": ".server_timing",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, globals(), _EXPORTS)
+
+if TYPE_CHECKING:
+    from .api_key import APIKeyMiddleware, APIKeyASGIMiddleware
+    from .ip_whitelist import IPWhitelistMiddleware, IPWhitelistASGIMiddleware
+    from .rate_limit import RateLimitMiddleware, RateLimitASGIMiddleware
+    from .request_logger import RequestLoggingMiddleware, RequestLoggingASGIMiddleware
+    from .admin_ip_bypass import AdminIPBypassMiddleware, AdminIPBypassASGIMiddleware
+    from .pipeline import SecurityPipeline
+    from .server_timing import ServerTimingMiddleware
 
 __all__ = [
     "APIKeyMiddleware",
@@ -10,4 +34,17 @@ __all__ = [
     "RateLimitMiddleware",
     "RequestLoggingMiddleware",
     "AdminIPBypassMiddleware",
+
+    # Pure ASGI variants
+    "APIKeyASGIMiddleware",
+    "IPWhitelistASGIMiddleware",
+    "RateLimitASGIMiddleware",
+    "RequestLoggingASGIMiddleware",
+    "AdminIPBypassASGIMiddleware",
+
+    # Fused security stack
+    "SecurityPipeline",
+
+    # Diagnostics
+    "ServerTimingMiddleware",
 ]
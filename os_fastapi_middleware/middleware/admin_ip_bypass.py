@@ -1,8 +1,16 @@
 import ipaddress
+from time import perf_counter_ns
 from typing import Optional, Callable, List, Union
 
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
+from starlette.types import Receive, Scope, Send
+
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.metrics import SecurityMetrics
+from os_fastapi_middleware.providers.base import BaseIPWhitelistProvider, resolve_sync_method
+from os_fastapi_middleware.utils import IPNetworkMatcher
+from os_fastapi_middleware.paths import compile_path_rules
 
 
 class AdminIPBypassMiddleware(BaseHTTPMiddleware):
@@ -13,6 +21,11 @@ class AdminIPBypassMiddleware(BaseHTTPMiddleware):
     their checks. Unlike the IP whitelist middleware, this middleware never
     blocks a request; it only marks bypass status when matched.
 
+    Admin IPs may be single addresses or CIDR networks (e.g. "10.20.0.0/24",
+    "2001:db8::/48"); they are compiled once into an IPNetworkMatcher. For
+    ranges managed elsewhere, pass any BaseIPWhitelistProvider as `provider`
+    instead and it is consulted on every request.
+
     Place this middleware early in the stack (ideally right after request
     logging) so other middlewares can observe the flag and skip accordingly.
     """
@@ -24,15 +37,22 @@ class AdminIPBypassMiddleware(BaseHTTPMiddleware):
         exempt_paths: Optional[List[str]] = None,
         trust_proxy_headers: bool = True,
         on_match: Optional[Callable[[Request, str], None]] = None,
+        provider: Optional[BaseIPWhitelistProvider] = None,
+        metrics: Optional[SecurityMetrics] = None,
     ): 
         super().__init__(app)
         if isinstance(admin_ips, str):
             self.admin_ips = {admin_ips}
         else:
             self.admin_ips = set(admin_ips or [])
+        self.provider = provider
+        self._is_ip_allowed_sync = resolve_sync_method(provider, "is_ip_allowed") if provider else None
+        self._matcher = IPNetworkMatcher(self.admin_ips)
         self.exempt_paths = exempt_paths or []
+        self._exempt = compile_path_rules(self.exempt_paths)
         self.trust_proxy_headers = trust_proxy_headers
         self.on_match = on_match
+        self.metrics = metrics
 
     def _get_client_ip(self, request: Request) -> str:
         if self.trust_proxy_headers:
@@ -53,18 +73,51 @@ class AdminIPBypassMiddleware(BaseHTTPMiddleware):
         except ValueError:
             return "127.0.0.1"
 
+    async def _is_admin(self, client_ip: str) -> bool:
+        if client_ip in self._matcher:
+            return True
+        if self.provider is None:
+            return False
+        started = perf_counter_ns()
+        try:
+            if self._is_ip_allowed_sync is not None:
+                return bool(self._is_ip_allowed_sync(client_ip))
+            return bool(await self.provider.is_ip_allowed(client_ip))
+        except Exception:
+            # A failing provider must never grant (nor block) access
+            self._count("error", "provider_error")
+            return False
+        finally:
+            if self.metrics is not None:
+                self.metrics.provider_call(self.provider, "is_admin_ip", perf_counter_ns() - started)
+
     async def dispatch(self, request: Request, call_next):
+        await self._mark(request)
+        return await call_next(request)
+
+    async def _mark(self, request: Request) -> None:
         # Do not interfere with exempt paths (e.g., health checks)
-        if request.url.path in self.exempt_paths:
-            return await call_next(request)
+        if self._exempt.matches(request.url.path):
+            self._count("skip", "exempt")
+            return
 
         # Always compute and set the current client IP for this request
+        context = get_security_context(request)
+        started = perf_counter_ns()
         client_ip = self._get_client_ip(request)
+        context.add_timing("ip_resolve", perf_counter_ns() - started)
         request.state.client_ip = client_ip
+        context.client_ip = client_ip
 
         # Reset admin_bypass on every request, then set it only if current IP matches
-        is_admin = client_ip in self.admin_ips
+        started = perf_counter_ns()
+        is_admin = await self._is_admin(client_ip)
+        context.add_timing("admin_bypass", perf_counter_ns() - started)
         request.state.admin_bypass = bool(is_admin)
+        if is_admin:
+            self._count("bypass", "admin_ip")
+        else:
+            self._count("skip", "not_admin")
 
         if is_admin and self.on_match:
             try:
@@ -73,4 +126,20 @@ class AdminIPBypassMiddleware(BaseHTTPMiddleware):
                 # Swallow callback errors to avoid affecting request flow
                 pass
 
-        return await call_next(request)
+    def _count(self, decision: str, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.decision("admin_bypass", decision, reason)
+
+
+class AdminIPBypassASGIMiddleware(AdminIPBypassMiddleware):
+    """
+    Pure ASGI variant of AdminIPBypassMiddleware.
+
+    Same options and behaviour, without BaseHTTPMiddleware's per-request task
+    and stream overhead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            await self._mark(Request(scope, receive))
+        await self.app(scope, receive, send)
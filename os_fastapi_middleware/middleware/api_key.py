@@ -1,10 +1,14 @@
-from typing import Optional, Callable, List
+from time import perf_counter_ns
+from typing import Optional, Callable, List, Dict
 from starlette.requests import Request
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
-from fastapi import status
+from starlette.types import Receive, Scope, Send
 
-from os_fastapi_middleware.providers.base import BaseAPIKeyProvider
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.metrics import SecurityMetrics
+from os_fastapi_middleware.providers.base import BaseAPIKeyProvider, resolve_sync_method
+from os_fastapi_middleware.paths import compile_path_rules
+from os_fastapi_middleware.responses import AnyResponse, PreEncodedResponse, RejectionTemplate, api_key_rejections
 
 
 class APIKeyMiddleware(BaseHTTPMiddleware):
@@ -16,70 +20,129 @@ class APIKeyMiddleware(BaseHTTPMiddleware):
         header_name: str = "X-API-Key",
         exempt_paths: Optional[List[str]] = None,
         on_error: Optional[Callable] = None,
-        include_metadata: bool = False
+        include_metadata: bool = False,
+        rejections: Optional[Dict[str, RejectionTemplate]] = None,
+        metrics: Optional[SecurityMetrics] = None
     ):
         """
         Args:
             app: Application FastAPI/Starlette
             provider: Provider to validate API keys
             header_name: Header name to get an API key from
-            exempt_paths: Path list to exempt from authentication
+            exempt_paths: Path rules to exempt from authentication (exact, "/prefix/**", globs, "re:" regexes)
             on_error: Customized callback for error responses
             include_metadata: If true, include metadata in request state
+            rejections: Custom pre-encoded responses keyed by "missing_key", "invalid_key"
+                or "error" ({header_name} is available as placeholder)
+            metrics: Optional SecurityMetrics recording decisions and provider latency
         """
         super().__init__(app)
         self.provider = provider
+        # Sync provider methods are resolved once and called without a coroutine
+        self._validate_key_sync = resolve_sync_method(provider, "validate_key")
+        self._get_key_metadata_sync = resolve_sync_method(provider, "get_key_metadata")
         self.header_name = header_name
         self.exempt_paths = exempt_paths or []
+        self._exempt = compile_path_rules(self.exempt_paths)
         self.on_error = on_error
         self.include_metadata = include_metadata
+        # Rejections are encoded once; sending one needs no serialisation
+        self._rejections = api_key_rejections(header_name)
+        self._rejections.update(rejections or {})
+        self.metrics = metrics
     
     async def dispatch(self, request: Request, call_next):
+        response = await self._authenticate(request)
+        if response is not None:
+            return response
+        return await call_next(request)
+
+    async def _authenticate(self, request: Request) -> Optional[AnyResponse]:
+        """Run the API key check; return an error response, or None to continue."""
         # Check if the path is exempt from authentication
-        if request.url.path in self.exempt_paths:
-            return await call_next(request)
+        if self._exempt.matches(request.url.path):
+            self._count("skip", "exempt")
+            return None
 
         # If admin bypass is active, skip API key check
         if getattr(request.state, 'admin_bypass', False):
-            return await call_next(request)
+            self._count("skip", "admin_bypass")
+            return None
         
         api_key = request.headers.get(self.header_name)
         
         if not api_key:
-            return self._error_response(
-                status.HTTP_401_UNAUTHORIZED,
-                f"API key required in '{self.header_name}' header"
-            )
+            self._count("reject", "missing_key")
+            return self._reject("missing_key")
 
+        # Results are memoised per request, so dependencies do not check again
+        context = get_security_context(request)
+        if self.metrics is not None:
+            context.metrics = self.metrics
+        started = perf_counter_ns()
         try:
-            is_valid = await self.provider.validate_key(api_key)
+            if self._validate_key_sync is not None:
+                is_valid = context.decide_sync("validate_key", self.provider, self._validate_key_sync, api_key)
+            else:
+                is_valid = await context.decide("validate_key", self.provider, self.provider.validate_key, api_key)
             
             if not is_valid:
-                return self._error_response(
-                    status.HTTP_403_FORBIDDEN,
-                    "Invalid API key"
-                )
+                self._count("reject", "invalid_key")
+                return self._reject("invalid_key")
 
             if self.include_metadata:
-                metadata = await self.provider.get_key_metadata(api_key)
+                if self._get_key_metadata_sync is not None:
+                    metadata = context.decide_sync(
+                        "get_key_metadata", self.provider, self._get_key_metadata_sync, api_key
+                    )
+                else:
+                    metadata = await context.decide(
+                        "get_key_metadata", self.provider, self.provider.get_key_metadata, api_key
+                    )
                 request.state.api_key_metadata = metadata
+                context.api_key_metadata = metadata
 
             request.state.api_key = api_key
-            
-            return await call_next(request)
+            context.api_key = api_key
             
         except Exception as e:
+            self._count("error", "provider_error")
             if self.on_error:
                 return self.on_error(request, e)
             
-            return self._error_response(
-                status.HTTP_500_INTERNAL_SERVER_ERROR,
-                "Error validating API key"
-            )
+            return self._reject("error")
+        finally:
+            context.add_timing("api_key", perf_counter_ns() - started)
+
+        self._count("allow", "valid_key")
+        return None
     
-    @staticmethod
-    def _error_response(status_code: int, detail: str):
-        return JSONResponse(
-            status_code=status_code,
-            content={"detail": detail}
-        )
\ No newline at end of file
+    def _reject(self, reason: str) -> PreEncodedResponse:
+        return self._rejections[reason].render(header_name=self.header_name)
+
+    def _count(self, decision: str, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.decision("api_key", decision, reason)
+
+
+class APIKeyASGIMiddleware(APIKeyMiddleware):
+    """
+    Pure ASGI variant of APIKeyMiddleware.
+
+    Takes the same options and behaves the same, but runs as a plain
+    `__call__(scope, receive, send)` instead of going through
+    BaseHTTPMiddleware, so no extra task or memory stream is created per
+    request and streaming responses/background tasks pass through untouched.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response = await self._authenticate(Request(scope, receive))
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
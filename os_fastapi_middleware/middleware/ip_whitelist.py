@@ -1,12 +1,16 @@
 import ipaddress
-from typing import Optional, Callable, List
+from time import perf_counter_ns
+from typing import Optional, Callable, List, Dict
 
-from fastapi import status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.types import Receive, Scope, Send
 
-from os_fastapi_middleware.providers.base import BaseIPWhitelistProvider
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.metrics import SecurityMetrics
+from os_fastapi_middleware.providers.base import BaseIPWhitelistProvider, resolve_sync_method
+from os_fastapi_middleware.paths import compile_path_rules
+from os_fastapi_middleware.responses import AnyResponse, RejectionTemplate, ip_whitelist_rejections
 
 
 class IPWhitelistMiddleware(BaseHTTPMiddleware):
@@ -17,24 +21,35 @@ class IPWhitelistMiddleware(BaseHTTPMiddleware):
             provider: BaseIPWhitelistProvider,
             exempt_paths: Optional[List[str]] = None,
             on_blocked: Optional[Callable] = None,
-            trust_proxy_headers: bool = True
+            trust_proxy_headers: bool = True,
+            rejections: Optional[Dict[str, RejectionTemplate]] = None,
+            metrics: Optional[SecurityMetrics] = None
     ):
         """
         Args:
             app: Application FastAPI/Starlette
             provider: Provider to check IP whitelist
-            exempt_paths: Path list to exempt from authentication
+            exempt_paths: Path rules to exempt from the whitelist (exact, "/prefix/**", globs, "re:" regexes)
             on_blocked: Callback when IP is blocked
             trust_proxy_headers: If True, trust X-Forwarded-For and X-Real-IP headers
+            rejections: Custom pre-encoded responses keyed by "unknown_ip", "ip_not_allowed"
+                or "error" ({ip} is available as placeholder)
+            metrics: Optional SecurityMetrics recording decisions and provider latency
         """
         super().__init__(app)
         self.provider = provider
+        # Sync provider method is resolved once and called without a coroutine
+        self._is_ip_allowed_sync = resolve_sync_method(provider, "is_ip_allowed")
         self.exempt_paths = exempt_paths or [
             "/health", "/health/",
             "/docs", "/redoc", "/openapi.json"
         ]
+        self._exempt = compile_path_rules(self.exempt_paths)
         self.on_blocked = on_blocked
         self.trust_proxy_headers = trust_proxy_headers
+        self._rejections = ip_whitelist_rejections()
+        self._rejections.update(rejections or {})
+        self.metrics = metrics
 
     def _get_client_ip(self, request: Request) -> str:
         if self.trust_proxy_headers:
@@ -56,44 +71,85 @@ class IPWhitelistMiddleware(BaseHTTPMiddleware):
             return "127.0.0.1"
 
     async def dispatch(self, request: Request, call_next):
-        if request.url.path in self.exempt_paths:
-            return await call_next(request)
+        response = await self._check_ip(request)
+        if response is not None:
+            return response
+        return await call_next(request)
+
+    async def _check_ip(self, request: Request) -> Optional[AnyResponse]:
+        """Run the whitelist check; return an error response, or None to continue."""
+        if self._exempt.matches(request.url.path):
+            self._count("skip", "exempt")
+            return None
 
         # If admin bypass is active, skip whitelist checks entirely
         if getattr(request.state, 'admin_bypass', False):
+            self._count("skip", "admin_bypass")
             # Ensure client_ip is present for downstream consumers
             if not getattr(request.state, 'client_ip', None):
                 request.state.client_ip = self._get_client_ip(request)
-            return await call_next(request)
+            return None
 
+        context = get_security_context(request)
+        started = perf_counter_ns()
         client_ip = self._get_client_ip(request)
+        context.add_timing("ip_resolve", perf_counter_ns() - started)
 
         if not client_ip:
-            return JSONResponse(
-                status_code=status.HTTP_403_FORBIDDEN,
-                content={"detail": "Could not determine client IP"}
-            )
+            self._count("reject", "unknown_ip")
+            return self._rejections["unknown_ip"].render()
 
+        context.client_ip = client_ip
+        if self.metrics is not None:
+            context.metrics = self.metrics
+        started = perf_counter_ns()
         try:
-            is_allowed = await self.provider.is_ip_allowed(client_ip)
+            if self._is_ip_allowed_sync is not None:
+                is_allowed = context.decide_sync("is_ip_allowed", self.provider, self._is_ip_allowed_sync, client_ip)
+            else:
+                is_allowed = await context.decide(
+                    "is_ip_allowed", self.provider, self.provider.is_ip_allowed, client_ip
+                )
+        except Exception:
+            self._count("error", "provider_error")
+            return self._rejections["error"].render(ip=client_ip)
+        finally:
+            context.add_timing("ip_whitelist", perf_counter_ns() - started)
 
-            if not is_allowed:
-                if self.on_blocked:
-                    return self.on_blocked(request, client_ip)
+        if not is_allowed:
+            self._count("reject", "ip_not_allowed")
+            if self.on_blocked:
+                return self.on_blocked(request, client_ip)
 
-                return JSONResponse(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    content={"detail": f"IP {client_ip} is not whitelisted"}
-                )
+            return self._rejections["ip_not_allowed"].render(ip=client_ip)
+
+        # Mark request as allowed by IP whitelist to inform downstream middlewares
+        request.state.client_ip = client_ip
+        request.state.ip_whitelist_allowed = True
+        self._count("allow", "ip_allowed")
+        return None
+
+    def _count(self, decision: str, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.decision("ip_whitelist", decision, reason)
+
+
+class IPWhitelistASGIMiddleware(IPWhitelistMiddleware):
+    """
+    Pure ASGI variant of IPWhitelistMiddleware.
+
+    Same options and behaviour, without BaseHTTPMiddleware's per-request task
+    and stream overhead.
+    """
 
-            # Mark request as allowed by IP whitelist to inform downstream middlewares
-            request.state.client_ip = client_ip
-            request.state.ip_whitelist_allowed = True
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-            return await call_next(request)
+        response = await self._check_ip(Request(scope, receive))
+        if response is not None:
+            await response(scope, receive, send)
+            return
 
-        except Exception as e:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Error checking IP whitelist"}
-            )
+        await self.app(scope, receive, send)
@@ -0,0 +1,521 @@
+import asyncio
+import ipaddress
+from time import perf_counter_ns
+from typing import Optional, Callable, Dict, Any, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from os_fastapi_middleware.config import SecurityConfig, RoutePolicy
+from os_fastapi_middleware.context import UNDECIDED, SecurityContext, get_security_context
+from os_fastapi_middleware.heavy_hitters import HeavyHitterTracker
+from os_fastapi_middleware.metrics import SecurityMetrics
+from os_fastapi_middleware.providers.base import (
+    BaseAPIKeyProvider,
+    BaseRateLimitProvider,
+    BaseIPWhitelistProvider,
+    resolve_sync_method,
+)
+from os_fastapi_middleware.providers.memory import InMemoryIPWhitelistProvider
+from os_fastapi_middleware.paths import PathMatcher, compile_path_rules
+from os_fastapi_middleware.policies import PolicyRegistry
+from os_fastapi_middleware.responses import (
+    AnyResponse,
+    RejectionTemplate,
+    api_key_rejections,
+    ip_whitelist_rejections,
+    rate_limit_rejections,
+)
+from os_fastapi_middleware.utils import IPNetworkMatcher
+
+
+def _call_sync(method: Callable, *args: Any) -> Any:
+    """Call a sync provider method, returning exceptions like asyncio.gather does."""
+    try:
+        return method(*args)
+    except Exception as e:
+        return e
+
+
+class _RequestContext:
+    """Per-request values shared by every stage of the pipeline."""
+
+    __slots__ = ("scope", "path", "headers", "client_ip", "api_key", "state", "policy", "security")
+
+    def __init__(self, scope: Scope, trust_proxy_headers: bool):
+        self.scope = scope
+        self.path: str = scope["path"]
+        # Decode the raw header list once; first occurrence wins like Headers.get()
+        headers: Dict[str, str] = {}
+        for name, value in scope.get("headers", []):
+            headers.setdefault(name.decode("latin-1"), value.decode("latin-1"))
+        self.headers = headers
+        self.client_ip = _resolve_client_ip(scope, headers, trust_proxy_headers)
+        self.api_key: Optional[str] = None
+        self.state: Dict[str, Any] = scope.setdefault("state", {})
+        self.policy: Optional[RoutePolicy] = None
+        # Shared with dependencies, so they reuse the pipeline's provider results
+        self.security: SecurityContext = get_security_context(scope)
+        self.security.client_ip = self.client_ip
+
+
+def _resolve_client_ip(scope: Scope, headers: Dict[str, str], trust_proxy_headers: bool) -> str:
+    if trust_proxy_headers:
+        forwarded_for = headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+
+        real_ip = headers.get("x-real-ip")
+        if real_ip:
+            return real_ip.strip()
+
+    client = scope.get("client")
+    host = client[0] if client else None
+    if not host:
+        return "127.0.0.1"
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        return "127.0.0.1"
+
+
+class SecurityPipeline:
+    """
+    Single ASGI middleware running the whole security stack in one layer.
+
+    Replaces stacking AdminIPBypass -> IPWhitelist -> APIKey -> RateLimit
+    middlewares. Stages are enabled by the sections present in
+    `SecurityConfig` and share one per-request context, so headers are
+    decoded and the client IP is resolved once. The IP whitelist check and
+    the API key validation are independent and run concurrently with
+    `asyncio.gather`; their results are applied in the stacked order, so
+    responses match the separate middlewares.
+
+    With a PolicyRegistry, each route gets its own RoutePolicy (which stages
+    apply, its rate limit tier) from a table compiled from `app.routes`,
+    instead of per-route dependencies.
+
+    Usage example:
+        config = SecurityConfig(
+            api_key=APIKeyConfig(),
+            rate_limit=RateLimitConfig(requests_per_window=100),
+            ip_whitelist=IPWhitelistConfig(allowed_ips=["10.0.0.0/8"]),
+        )
+        app.add_middleware(
+            SecurityPipeline,
+            config=config,
+            api_key_provider=api_key_provider,
+            rate_limit_provider=rate_limit_provider,
+        )
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: Optional[SecurityConfig] = None,
+        api_key_provider: Optional[BaseAPIKeyProvider] = None,
+        rate_limit_provider: Optional[BaseRateLimitProvider] = None,
+        ip_whitelist_provider: Optional[BaseIPWhitelistProvider] = None,
+        admin_ip_provider: Optional[BaseIPWhitelistProvider] = None,
+        rate_limit_key_func: Optional[Callable[[Request], str]] = None,
+        on_error: Optional[Callable] = None,
+        policies: Optional[PolicyRegistry] = None,
+        rejections: Optional[Dict[str, RejectionTemplate]] = None,
+        metrics: Optional[SecurityMetrics] = None,
+        heavy_hitters: Optional[HeavyHitterTracker] = None,
+    ):
+        """
+        Args:
+            app: Application FastAPI/Starlette
+            config: Enabled stages and their options (defaults to SecurityConfig.from_env())
+            api_key_provider: Provider to validate API keys (required if config.api_key is set)
+            rate_limit_provider: Provider to check rate limit (required if config.rate_limit is set)
+            ip_whitelist_provider: Provider to check IP whitelist (defaults to config.ip_whitelist.allowed_ips)
+            admin_ip_provider: Optional provider of admin IPs, in addition to config.admin_bypass.admin_ips
+            rate_limit_key_func: Function to generate rate limit key (prefixed with the tier on tiered routes)
+            on_error: Customized callback for API key validation errors
+            policies: Optional per-route policies, compiled from the app routes on startup
+            rejections: Custom pre-encoded responses keyed by "ip_not_allowed", "ip_error",
+                "missing_key", "invalid_key", "api_key_error" or "rate_limited"
+            metrics: Optional SecurityMetrics recording decisions and provider latency
+            heavy_hitters: Optional HeavyHitterTracker recording every rate limit key
+        """
+        self.app = app
+        self.config = config if config is not None else SecurityConfig.from_env()
+        self.on_error = on_error
+        self.rate_limit_key_func = rate_limit_key_func
+        self.policies = policies
+        self.metrics = metrics
+        self.heavy_hitters = heavy_hitters
+        self._default_policy = RoutePolicy()
+
+        self.api_key = self.config.api_key
+        self.rate_limit = self.config.rate_limit
+        self.ip_whitelist = self.config.ip_whitelist
+        self.admin_bypass = self.config.admin_bypass
+
+        if self.api_key and api_key_provider is None:
+            raise ValueError("config.api_key is set but no api_key_provider was given")
+        if self.rate_limit and rate_limit_provider is None:
+            raise ValueError("config.rate_limit is set but no rate_limit_provider was given")
+        if self.ip_whitelist and ip_whitelist_provider is None:
+            ip_whitelist_provider = InMemoryIPWhitelistProvider(self.ip_whitelist.allowed_ips)
+
+        self.api_key_provider = api_key_provider
+        self.rate_limit_provider = rate_limit_provider
+        self.ip_whitelist_provider = ip_whitelist_provider
+        self.admin_ip_provider = admin_ip_provider
+
+        # Sync provider methods are resolved once and called without a coroutine
+        self._validate_key_sync = resolve_sync_method(api_key_provider, "validate_key")
+        self._get_key_metadata_sync = resolve_sync_method(api_key_provider, "get_key_metadata")
+        self._check_rate_limit_sync = resolve_sync_method(rate_limit_provider, "check_rate_limit")
+        self._get_remaining_requests_sync = resolve_sync_method(rate_limit_provider, "get_remaining_requests")
+        self._is_ip_allowed_sync = resolve_sync_method(ip_whitelist_provider, "is_ip_allowed")
+        self._is_admin_ip_sync = resolve_sync_method(admin_ip_provider, "is_ip_allowed")
+
+        self._api_key_header = self.api_key.header_name.lower() if self.api_key else None
+
+        # Exempt path rules are compiled once per stage
+        self._admin_exempt = self._compile_exempt(self.admin_bypass)
+        self._ip_exempt = self._compile_exempt(self.ip_whitelist)
+        self._api_key_exempt = self._compile_exempt(self.api_key)
+        self._rate_limit_exempt = self._compile_exempt(self.rate_limit)
+        self._admin_matcher = IPNetworkMatcher(self.admin_bypass.admin_ips if self.admin_bypass else [])
+
+        # Proxy headers are trusted unless the whitelist/admin config says otherwise
+        trust = True
+        if self.ip_whitelist is not None:
+            trust = self.ip_whitelist.trust_proxy_headers
+        elif self.admin_bypass is not None:
+            trust = self.admin_bypass.trust_proxy_headers
+        self.trust_proxy_headers = trust
+
+        # Rejections are encoded once; rate limit ones per (limit, window) tier on first use
+        self._rejections: Dict[str, RejectionTemplate] = {}
+        ip_rejections = ip_whitelist_rejections()
+        self._rejections["ip_not_allowed"] = ip_rejections["ip_not_allowed"]
+        self._rejections["ip_error"] = ip_rejections["error"]
+        key_rejections = api_key_rejections(self.api_key.header_name if self.api_key else "X-API-Key")
+        self._rejections["missing_key"] = key_rejections["missing_key"]
+        self._rejections["invalid_key"] = key_rejections["invalid_key"]
+        self._rejections["api_key_error"] = key_rejections["error"]
+        self._rejections.update(rejections or {})
+        self._rate_limit_rejections: Dict[Tuple[int, int], RejectionTemplate] = {}
+
+    def _compile_policies(self, scope: Scope) -> None:
+        app = scope.get("app")
+        if self.policies is not None and not self.policies.compiled and app is not None:
+            self.policies.compile(app)
+
+    @staticmethod
+    def _compile_exempt(section) -> PathMatcher:
+        return compile_path_rules(section.exempt_paths if section is not None else None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            if scope["type"] == "lifespan":
+                self._compile_policies(scope)
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter_ns()
+        ctx = _RequestContext(scope, self.trust_proxy_headers)
+        ctx.security.add_timing("ip_resolve", perf_counter_ns() - started)
+        if self.metrics is not None:
+            ctx.security.metrics = self.metrics
+        if self.policies is None:
+            ctx.policy = self._default_policy
+        else:
+            if not self.policies.compiled:
+                self._compile_policies(scope)
+            ctx.policy = self.policies.lookup(scope)
+
+        if await self._is_admin(ctx):
+            if self.metrics is not None:
+                self._count_bypassed()
+            await self.app(scope, receive, send)
+            return
+
+        response = await self._check_access(ctx, receive)
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        response, limit_state = await self._check_rate_limit(ctx, receive)
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        if limit_state is None or not self.rate_limit.add_headers:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = await self._rate_limit_headers(limit_state)
+                if headers:
+                    MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _is_admin(self, ctx: _RequestContext) -> bool:
+        if self.admin_bypass is None and self.admin_ip_provider is None:
+            return False
+        if self._admin_exempt.matches(ctx.path):
+            self._count("admin_bypass", "skip", "exempt")
+            return False
+
+        ctx.state["client_ip"] = ctx.client_ip
+        started = perf_counter_ns()
+        is_admin = ctx.client_ip in self._admin_matcher
+        if not is_admin and self.admin_ip_provider is not None:
+            try:
+                if self._is_admin_ip_sync is not None:
+                    is_admin = bool(self._is_admin_ip_sync(ctx.client_ip))
+                else:
+                    is_admin = bool(await self.admin_ip_provider.is_ip_allowed(ctx.client_ip))
+            except Exception:
+                self._count("admin_bypass", "error", "provider_error")
+                is_admin = False
+            if self.metrics is not None:
+                self.metrics.provider_call(self.admin_ip_provider, "is_admin_ip", perf_counter_ns() - started)
+        ctx.security.add_timing("admin_bypass", perf_counter_ns() - started)
+        ctx.state["admin_bypass"] = is_admin
+        if is_admin:
+            self._count("admin_bypass", "bypass", "admin_ip")
+        else:
+            self._count("admin_bypass", "skip", "not_admin")
+        return is_admin
+
+    def _count(self, stage: str, decision: str, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.decision(stage, decision, reason)
+
+    def _count_bypassed(self) -> None:
+        # Same series as the separate middlewares report for admin requests
+        for stage, section in (
+            ("ip_whitelist", self.ip_whitelist), ("api_key", self.api_key), ("rate_limit", self.rate_limit)
+        ):
+            if section is not None:
+                self.metrics.decision(stage, "skip", "admin_bypass")
+
+    async def _timed(self, coro, provider: Any, check: str) -> Any:
+        """Await a provider call, recording its own latency (gathered calls overlap)."""
+        started = perf_counter_ns()
+        try:
+            return await coro
+        finally:
+            self.metrics.provider_call(provider, check, perf_counter_ns() - started)
+
+    async def _check_access(self, ctx: _RequestContext, receive: Receive) -> Optional[AnyResponse]:
+        """Run the IP whitelist and API key stages; return an error response, or None."""
+        policy = ctx.policy
+        check_ip = (
+            self.ip_whitelist is not None and policy.ip_whitelist and not self._ip_exempt.matches(ctx.path)
+        )
+        check_key = (
+            self.api_key is not None and policy.api_key and not self._api_key_exempt.matches(ctx.path)
+        )
+        metrics = self.metrics
+        if metrics is not None:
+            if self.ip_whitelist is not None and not check_ip:
+                metrics.decision("ip_whitelist", "skip", "exempt")
+            if self.api_key is not None and not check_key:
+                metrics.decision("api_key", "skip", "exempt")
+
+        api_key = ctx.headers.get(self._api_key_header) if check_key else None
+
+        # Memoised and sync lookups run inline; async ones are independent and run concurrently
+        security = ctx.security
+        is_allowed = is_valid = None
+        coros = {}
+        if check_ip:
+            is_allowed = security.cached("is_ip_allowed", self.ip_whitelist_provider, ctx.client_ip)
+            if metrics is not None:
+                metrics.context_lookup("is_ip_allowed", is_allowed is not UNDECIDED)
+            if is_allowed is UNDECIDED:
+                if self._is_ip_allowed_sync is not None:
+                    started = perf_counter_ns()
+                    is_allowed = _call_sync(self._is_ip_allowed_sync, ctx.client_ip)
+                    elapsed = perf_counter_ns() - started
+                    security.add_timing("ip_whitelist", elapsed)
+                    if metrics is not None:
+                        metrics.provider_call(self.ip_whitelist_provider, "is_ip_allowed", elapsed)
+                else:
+                    coros["ip"] = self.ip_whitelist_provider.is_ip_allowed(ctx.client_ip)
+                    if metrics is not None:
+                        coros["ip"] = self._timed(coros["ip"], self.ip_whitelist_provider, "is_ip_allowed")
+        if api_key:
+            is_valid = security.cached("validate_key", self.api_key_provider, api_key)
+            if metrics is not None:
+                metrics.context_lookup("validate_key", is_valid is not UNDECIDED)
+            if is_valid is UNDECIDED:
+                if self._validate_key_sync is not None:
+                    started = perf_counter_ns()
+                    is_valid = _call_sync(self._validate_key_sync, api_key)
+                    elapsed = perf_counter_ns() - started
+                    security.add_timing("api_key", elapsed)
+                    if metrics is not None:
+                        metrics.provider_call(self.api_key_provider, "validate_key", elapsed)
+                else:
+                    coros["key"] = self.api_key_provider.validate_key(api_key)
+                    if metrics is not None:
+                        coros["key"] = self._timed(coros["key"], self.api_key_provider, "validate_key")
+        if coros:
+            started = perf_counter_ns()
+            results = dict(zip(coros, await asyncio.gather(*coros.values(), return_exceptions=True)))
+            # Concurrent lookups overlap: each is charged the wall time of the gather
+            elapsed = perf_counter_ns() - started
+            for stage in coros:
+                security.add_timing("ip_whitelist" if stage == "ip" else "api_key", elapsed)
+            is_allowed = results.get("ip", is_allowed)
+            is_valid = results.get("key", is_valid)
+        if check_ip and not isinstance(is_allowed, Exception):
+            security.remember("is_ip_allowed", self.ip_whitelist_provider, (ctx.client_ip,), is_allowed)
+        if api_key and not isinstance(is_valid, Exception):
+            security.remember("validate_key", self.api_key_provider, (api_key,), is_valid)
+
+        if check_ip:
+            if isinstance(is_allowed, Exception):
+                self._count("ip_whitelist", "error", "provider_error")
+                if self.ip_whitelist.block_on_error:
+                    return self._rejections["ip_error"].render(ip=ctx.client_ip)
+            elif not is_allowed:
+                self._count("ip_whitelist", "reject", "ip_not_allowed")
+                return self._rejections["ip_not_allowed"].render(ip=ctx.client_ip)
+            else:
+                self._count("ip_whitelist", "allow", "ip_allowed")
+                ctx.state["client_ip"] = ctx.client_ip
+                ctx.state["ip_whitelist_allowed"] = True
+
+        if not check_key:
+            return None
+
+        if not api_key:
+            self._count("api_key", "reject", "missing_key")
+            return self._rejections["missing_key"].render(header_name=self.api_key.header_name)
+
+        try:
+            if isinstance(is_valid, Exception):
+                raise is_valid
+            if not is_valid:
+                self._count("api_key", "reject", "invalid_key")
+                return self._rejections["invalid_key"].render(header_name=self.api_key.header_name)
+            if self.api_key.include_metadata:
+                started = perf_counter_ns()
+                if self._get_key_metadata_sync is not None:
+                    metadata = security.decide_sync(
+                        "get_key_metadata", self.api_key_provider, self._get_key_metadata_sync, api_key
+                    )
+                else:
+                    metadata = await security.decide(
+                        "get_key_metadata", self.api_key_provider, self.api_key_provider.get_key_metadata, api_key
+                    )
+                security.add_timing("api_key", perf_counter_ns() - started)
+                ctx.state["api_key_metadata"] = metadata
+                security.api_key_metadata = metadata
+        except Exception as e:
+            self._count("api_key", "error", "provider_error")
+            if self.on_error:
+                return self.on_error(Request(ctx.scope, receive), e)
+            return self._rejections["api_key_error"].render(header_name=self.api_key.header_name)
+
+        self._count("api_key", "allow", "valid_key")
+        ctx.api_key = api_key
+        ctx.state["api_key"] = api_key
+        security.api_key = api_key
+        return None
+
+    async def _check_rate_limit(self, ctx: _RequestContext, receive: Receive):
+        policy = ctx.policy
+        if self.rate_limit is None:
+            return None, None
+        if not policy.rate_limit or self._rate_limit_exempt.matches(ctx.path):
+            self._count("rate_limit", "skip", "exempt")
+            return None, None
+
+        limit = policy.requests_per_window or self.rate_limit.requests_per_window
+        window = policy.window_seconds or self.rate_limit.window_seconds
+        prefix = self.rate_limit.key_prefix
+        bucket = None
+        if policy.tier:
+            bucket = policy.tier
+        elif limit != self.rate_limit.requests_per_window or window != self.rate_limit.window_seconds:
+            # Tierless overrides get a bucket per (limit, window), apart from the global counters
+            bucket = f"{limit}/{window}s"
+        if bucket is not None:
+            prefix = f"{prefix}:{bucket}"
+
+        started = perf_counter_ns()
+        if self.rate_limit_key_func is not None:
+            rate_limit_key = self.rate_limit_key_func(Request(ctx.scope, receive))
+            if bucket is not None:
+                # Custom keys are namespaced too, so buckets never share counters
+                rate_limit_key = f"{prefix}:{rate_limit_key}"
+        elif ctx.api_key is not None:
+            rate_limit_key = f"{prefix}:api_key:{ctx.api_key}"
+        else:
+            rate_limit_key = f"{prefix}:ip:{ctx.client_ip}"
+
+        try:
+            if self._check_rate_limit_sync is not None:
+                within_limit = ctx.security.decide_sync(
+                    "check_rate_limit", self.rate_limit_provider, self._check_rate_limit_sync,
+                    rate_limit_key, limit, window
+                )
+            else:
+                within_limit = await ctx.security.decide(
+                    "check_rate_limit", self.rate_limit_provider, self.rate_limit_provider.check_rate_limit,
+                    rate_limit_key, limit, window
+                )
+        except Exception:
+            # Fail open, like RateLimitMiddleware
+            self._count("rate_limit", "error", "provider_error")
+            if self.heavy_hitters is not None:
+                self.heavy_hitters.record(rate_limit_key)
+            return None, None
+        finally:
+            ctx.security.add_timing("rate_limit", perf_counter_ns() - started)
+
+        if self.heavy_hitters is not None:
+            self.heavy_hitters.record(rate_limit_key, not within_limit)
+        if not within_limit:
+            self._count("rate_limit", "reject", "rate_limited")
+            return self._rate_limit_rejection(limit, window).render(key=rate_limit_key), None
+
+        self._count("rate_limit", "allow", "within_limit")
+        return None, (rate_limit_key, limit, window)
+
+    def _rate_limit_rejection(self, limit: int, window: int) -> RejectionTemplate:
+        if "rate_limited" in self._rejections:
+            return self._rejections["rate_limited"]
+        template = self._rate_limit_rejections.get((limit, window))
+        if template is None:
+            template = rate_limit_rejections(limit, window)["rate_limited"]
+            self._rate_limit_rejections[(limit, window)] = template
+        return template
+
+    async def _rate_limit_headers(self, limit_state: Tuple[str, int, int]) -> Optional[Dict[str, str]]:
+        rate_limit_key, limit, window = limit_state
+        try:
+            if self._get_remaining_requests_sync is not None:
+                remaining = self._get_remaining_requests_sync(rate_limit_key, limit, window)
+            else:
+                remaining = await self.rate_limit_provider.get_remaining_requests(
+                    rate_limit_key,
+                    limit,
+                    window
+                )
+        except Exception:
+            return None
+        if self.metrics is not None:
+            self.metrics.rate_limit_remaining("rate_limit", rate_limit_key, remaining, limit, window)
+        return {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(window),
+        }
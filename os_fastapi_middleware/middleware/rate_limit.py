@@ -1,10 +1,16 @@
-from typing import Optional, Callable, List
+from time import perf_counter_ns
+from typing import Optional, Callable, List, Dict, Tuple
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
-from fastapi import status
+from starlette.types import Message, Receive, Scope, Send
 
-from os_fastapi_middleware.providers.base import BaseRateLimitProvider
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.heavy_hitters import HeavyHitterTracker
+from os_fastapi_middleware.metrics import SecurityMetrics
+from os_fastapi_middleware.providers.base import BaseRateLimitProvider, resolve_sync_method
+from os_fastapi_middleware.paths import compile_path_rules
+from os_fastapi_middleware.responses import AnyResponse, RejectionTemplate, rate_limit_rejections
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
@@ -18,7 +24,10 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         key_func: Optional[Callable[[Request], str]] = None,
         exempt_paths: Optional[List[str]] = None,
         on_limit_exceeded: Optional[Callable] = None,
-        add_headers: bool = True
+        add_headers: bool = True,
+        rejections: Optional[Dict[str, RejectionTemplate]] = None,
+        metrics: Optional[SecurityMetrics] = None,
+        heavy_hitters: Optional[HeavyHitterTracker] = None
     ):
         """
         Args:
@@ -27,12 +36,20 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             requests_per_window: Number of requests allowed per window
             window_seconds: Window duration in seconds
             key_func: Function to generate rate limit key
-            exempt_paths: Paths to exempt from rate limit
+            exempt_paths: Path rules to exempt from rate limit (exact, "/prefix/**", globs, "re:" regexes)
             on_limit_exceeded: Callback when rate limit is exceeded
             add_headers: If true, add rate limit headers to response
+            rejections: Custom pre-encoded response keyed by "rate_limited"
+                ({key} is available as placeholder)
+            metrics: Optional SecurityMetrics recording decisions, provider latency
+                and keys near exhaustion (the latter needs add_headers)
+            heavy_hitters: Optional HeavyHitterTracker recording every rate limit key
         """
         super().__init__(app)
         self.provider = provider
+        # Sync provider methods are resolved once and called without a coroutine
+        self._check_rate_limit_sync = resolve_sync_method(provider, "check_rate_limit")
+        self._get_remaining_requests_sync = resolve_sync_method(provider, "get_remaining_requests")
         self.requests_per_window = requests_per_window
         self.window_seconds = window_seconds
         self.key_func = key_func or self._default_key_func
@@ -40,8 +57,13 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             "/health", "/health/",
             "/docs", "/redoc", "/openapi.json"
         ]
+        self._exempt = compile_path_rules(self.exempt_paths)
         self.on_limit_exceeded = on_limit_exceeded
         self.add_headers = add_headers
+        self._rejections = rate_limit_rejections(requests_per_window, window_seconds)
+        self._rejections.update(rejections or {})
+        self.metrics = metrics
+        self.heavy_hitters = heavy_hitters
     
     def _default_key_func(self, request: Request) -> str:
         if hasattr(request.state, 'api_key'):
@@ -62,50 +84,130 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         return request.client.host if request.client else "unknown"
     
     async def dispatch(self, request: Request, call_next):
-        if request.url.path in self.exempt_paths:
-            return await call_next(request)
+        response, rate_limit_key = await self._check_limit(request)
+        if response is not None:
+            return response
+
+        response = await call_next(request)
+
+        if rate_limit_key is not None and self.add_headers:
+            headers = await self._rate_limit_headers(rate_limit_key)
+            if headers:
+                response.headers.update(headers)
+
+        return response
 
+    async def _check_limit(self, request: Request) -> Tuple[Optional[AnyResponse], Optional[str]]:
+        """
+        Run the rate limit check.
+
+        Returns:
+            Tuple (error response or None, key to report headers for or None)
+        """
+        if self._exempt.matches(request.url.path):
+            self._count("skip", "exempt")
+            return None, None
 
         # If admin bypass is active, skip rate limiting
         if getattr(request.state, 'admin_bypass', False):
-            return await call_next(request)
+            self._count("skip", "admin_bypass")
+            return None, None
 
+        context = get_security_context(request)
+        if self.metrics is not None:
+            context.metrics = self.metrics
+        started = perf_counter_ns()
         rate_limit_key = self.key_func(request)
         
+        # A hit is counted once per request even if a dependency checks the same limit
         try:
-            within_limit = await self.provider.check_rate_limit(
-                key=rate_limit_key,
-                limit=self.requests_per_window,
-                window_seconds=self.window_seconds
-            )
-            
-            if not within_limit:
-                if self.on_limit_exceeded:
-                    return self.on_limit_exceeded(request, rate_limit_key)
-                
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "detail": f"Rate limit exceeded. Maximum {self.requests_per_window} "
-                                  f"requests per {self.window_seconds} seconds.",
-                        "retry_after": self.window_seconds
-                    },
-                    headers={"Retry-After": str(self.window_seconds)}
+            if self._check_rate_limit_sync is not None:
+                within_limit = context.decide_sync(
+                    "check_rate_limit", self.provider, self._check_rate_limit_sync,
+                    rate_limit_key, self.requests_per_window, self.window_seconds
                 )
+            else:
+                within_limit = await context.decide(
+                    "check_rate_limit", self.provider, self.provider.check_rate_limit,
+                    rate_limit_key, self.requests_per_window, self.window_seconds
+                )
+        except Exception:
+            # Fail open: a broken provider must not take the API down (but it is counted)
+            self._count("error", "provider_error")
+            if self.heavy_hitters is not None:
+                self.heavy_hitters.record(rate_limit_key)
+            return None, None
+        finally:
+            context.add_timing("rate_limit", perf_counter_ns() - started)
 
-            response = await call_next(request)
+        if self.heavy_hitters is not None:
+            self.heavy_hitters.record(rate_limit_key, not within_limit)
+        if not within_limit:
+            self._count("reject", "rate_limited")
+            if self.on_limit_exceeded:
+                return self.on_limit_exceeded(request, rate_limit_key), None
+            
+            return self._rejections["rate_limited"].render(key=rate_limit_key), None
 
-            if self.add_headers:
+        self._count("allow", "within_limit")
+        return None, rate_limit_key
+
+    def _count(self, decision: str, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.decision("rate_limit", decision, reason)
+
+    async def _rate_limit_headers(self, rate_limit_key: str) -> Optional[Dict[str, str]]:
+        try:
+            if self._get_remaining_requests_sync is not None:
+                remaining = self._get_remaining_requests_sync(
+                    rate_limit_key, self.requests_per_window, self.window_seconds
+                )
+            else:
                 remaining = await self.provider.get_remaining_requests(
                     rate_limit_key,
                     self.requests_per_window,
                     self.window_seconds
                 )
-                response.headers["X-RateLimit-Limit"] = str(self.requests_per_window)
-                response.headers["X-RateLimit-Remaining"] = str(remaining)
-                response.headers["X-RateLimit-Reset"] = str(self.window_seconds)
-            
-            return response
-            
-        except Exception as e:
-            return await call_next(request)
\ No newline at end of file
+        except Exception:
+            return None
+        if self.metrics is not None:
+            self.metrics.rate_limit_remaining(
+                "rate_limit", rate_limit_key, remaining, self.requests_per_window, self.window_seconds
+            )
+        return {
+            "X-RateLimit-Limit": str(self.requests_per_window),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(self.window_seconds),
+        }
+
+
+class RateLimitASGIMiddleware(RateLimitMiddleware):
+    """
+    Pure ASGI variant of RateLimitMiddleware.
+
+    Same options and behaviour, without BaseHTTPMiddleware's per-request task
+    and stream overhead. X-RateLimit-* headers are added by wrapping `send`.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response, rate_limit_key = await self._check_limit(Request(scope, receive))
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        if rate_limit_key is None or not self.add_headers:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = await self._rate_limit_headers(rate_limit_key)
+                if headers:
+                    MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
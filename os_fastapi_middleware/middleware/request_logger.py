@@ -1,10 +1,15 @@
+from time import perf_counter_ns, time_ns
 from typing import Optional, List, Callable, Union, Dict, Any
-from datetime import datetime, timezone
 
 from starlette.requests import Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import Message, Receive, Scope, Send
 
+from os_fastapi_middleware.context import STATE_KEY
 from os_fastapi_middleware.providers.base import BaseRequestLogProvider
+from os_fastapi_middleware.paths import compile_path_rules
+from os_fastapi_middleware.records import RequestLogRecord
+from os_fastapi_middleware.sampling import BaseLogSampler
 
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
@@ -15,7 +20,14 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         provider = MyElasticProvider(...)  # implements BaseRequestLogProvider
         app.add_middleware(RequestLoggingMiddleware, provider=provider)
 
-    By default, it will not log bodies to avoid consuming the body stream.
+    Runs as a pure ASGI middleware (BaseHTTPMiddleware is only kept as base
+    class for compatibility). Bodies are not logged by default; when enabled,
+    only the first `max_body_bytes` of each chunk stream are copied while it
+    passes through, so uploads and streaming responses are never buffered.
+
+    When the app runs a lifespan, the provider's `start()` and `aclose()` are
+    called on startup and shutdown, so queued records (see
+    BatchingRequestLogProvider) are drained before the process exits.
     """
 
     def __init__(
@@ -28,128 +40,166 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         max_body_bytes: int = 2048,
         extra_fields: Optional[Dict[str, Any]] = None,
         on_error: Optional[Callable[[Exception], Any]] = None,
+        sampler: Optional[BaseLogSampler] = None,
+        capture_response_body: bool = False,
     ) -> None:
         """
         Args:
             app: FastAPI/Starlette app
             provider: A BaseRequestLogProvider instance or a callable(record) → None/awaitable
-            exempt_paths: List of paths to skip logging
+            exempt_paths: Path rules to skip logging (exact, "/prefix/**", globs, "re:" regexes)
             include_headers: If true, include a small, safe subset of headers
-            capture_body: If true, capture small request body (may impact performance)
-            max_body_bytes: Max bytes of body to capture when capture_body=True
+            capture_body: If true, capture the start of the request body as the app reads it
+            max_body_bytes: Max bytes captured per body; memory use does not depend on the payload size
             extra_fields: Dict with extra static fields added to every record
             on_error: Optional callback if logging raises an exception
+            sampler: Optional sampling policy (see os_fastapi_middleware.sampling); requests it
+                skips are dropped before their record is built
+            capture_response_body: If true, capture the start of the response body as it is sent
         """
         super().__init__(app)
         self._provider = provider
-        self._exempt_paths = set(exempt_paths or [
+        self._exempt_paths = compile_path_rules(exempt_paths or [
             "/health", "/health/", "/docs", "/redoc", "/openapi.json"
         ])
         self._include_headers = include_headers
         self._capture_body = capture_body
+        self._capture_response_body = capture_response_body
         self._max_body_bytes = max_body_bytes
         self._extra_fields = extra_fields or {}
         self._on_error = on_error
+        self._sampler = sampler
+        # Providers that accept RequestLogRecord get it as is, and build the dict off the request path
+        self._compact_records = getattr(provider, "accepts_compact_records", False) is True
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in self._exempt_paths:
-            return await call_next(request)
-
-        started = datetime.now(timezone.utc)
-        request_id = getattr(request.state, "request_id", None)
-
-        # Basic request data
-        client_ip = self._get_client_ip(request)
-        user_agent = request.headers.get("user-agent")
-        referer = request.headers.get("referer")
-        host = request.headers.get("host")
-        forwarded_for = request.headers.get("x-forwarded-for")
-        real_ip = request.headers.get("x-real-ip")
-
-        # Optionally capture a small request body (best-effort, non-intrusive)
-        request_body_snippet = None
-        content_length = self._safe_int(request.headers.get("content-length"))
-        if self._capture_body:
-            try:
-                # Reading body here is generally okay with BaseHTTPMiddleware since we won't re-use it.
-                body = await request.body()
-                if body:
-                    request_body_snippet = body[: self._max_body_bytes].decode(
-                        errors="replace"
-                    )
-            except Exception:
-                request_body_snippet = None
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            if scope["type"] == "lifespan":
+                await self._lifespan(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        if self._exempt_paths.matches(request.url.path):
+            await self.app(scope, receive, send)
+            return
+
+        started_ns = time_ns()
+        started = perf_counter_ns()
+
+        # Bodies are copied as chunks pass through, up to max_body_bytes each
+        request_body = _BodyCapture(self._max_body_bytes) if self._capture_body else None
+        response_body = _BodyCapture(self._max_body_bytes) if self._capture_response_body else None
+        if request_body is not None:
+            receive = request_body.wrap_receive(receive)
+
+        response = _ResponseTap(response_body)
 
         try:
-            response = await call_next(request)
-        except Exception as e:
+            await self.app(scope, receive, response.wrap_send(send))
+        except Exception:
             # Even if the handler fails, we still want to record the attempt
-            ended = datetime.now(timezone.utc)
-            duration_ms = int((ended - started).total_seconds() * 1000)
-            record = {
-                "timestamp": started.isoformat(),
-                "method": request.method,
-                "path": request.url.path,
-                "query": request.url.query,
-                "client_ip": client_ip,
-                "user_agent": user_agent,
-                "request_id": request_id,
-                "status_code": 500,
-                "duration_ms": duration_ms,
-                "content_length": content_length,
-                "response_length": None,
-                "headers": {
-                    "referer": referer,
-                    "host": host,
-                    "forwarded_for": forwarded_for,
-                    "real_ip": real_ip,
-                } if self._include_headers else None,
-                "request_body": request_body_snippet if self._capture_body else None,
-            }
-            if self._extra_fields:
-                record.update(self._extra_fields)
-            await self._emit(record)
+            await self._log_request(request, started_ns, started, response, request_body, status_code=500)
             raise
 
-        # Normal flow
-        ended = datetime.now(timezone.utc)
-        duration_ms = int((ended - started).total_seconds() * 1000)
-        response_length = self._safe_int(response.headers.get("content-length"))
-
-        record = {
-            "timestamp": started.isoformat(),
-            "method": request.method,
-            "path": request.url.path,
-            "query": request.url.query,
-            "client_ip": client_ip,
-            "user_agent": user_agent,
-            "request_id": request_id,
-            "status_code": response.status_code,
-            "duration_ms": duration_ms,
-            "content_length": content_length,
-            "response_length": response_length,
-            "headers": {
-                "referer": referer,
-                "host": host,
-                "forwarded_for": forwarded_for,
-                "real_ip": real_ip,
-            } if self._include_headers else None,
-            "request_body": request_body_snippet if self._capture_body else None,
-        }
-        if self._extra_fields:
-            record.update(self._extra_fields)
+        await self._log_request(request, started_ns, started, response, request_body)
+
+    async def _lifespan(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Start the provider on startup and drain it on shutdown."""
+        if not isinstance(self._provider, BaseRequestLogProvider):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "lifespan.startup.complete":
+                await self._provider.start()
+            elif message["type"] == "lifespan.shutdown.complete":
+                try:
+                    await self._provider.aclose()
+                except Exception as e:
+                    self._report_error(e)
+            await send(message)
 
+        await self.app(scope, receive, send_wrapper)
+
+    async def _log_request(
+        self,
+        request: Request,
+        started_ns: int,
+        started: int,
+        response: "_ResponseTap",
+        request_body: Optional["_BodyCapture"],
+        status_code: Optional[int] = None,
+    ) -> None:
+        """Apply the sampler, then build and emit the record."""
+        ended = perf_counter_ns()
+        status_code = status_code or response.status_code
+        sample_weight = 1.0
+        if self._sampler is not None:
+            duration_ms = (ended - started) / 1_000_000
+            try:
+                sample_weight = self._sampler.sample(request.url.path, status_code, duration_ms)
+            except Exception as e:
+                # A broken sampler must not lose records
+                self._report_error(e)
+            if sample_weight is None:
+                return
+
+        record = self._build_record(request, started_ns, started, ended, status_code, response, request_body)
+        record.sample_weight = sample_weight
+        await self._safe_emit(record if self._compact_records else record.to_dict())
+
+    def _build_record(
+        self,
+        request: Request,
+        started_ns: int,
+        started: int,
+        ended: int,
+        status_code: int,
+        response: "_ResponseTap",
+        request_body: Optional["_BodyCapture"],
+    ) -> RequestLogRecord:
+        # Raw values only: decoding and formatting wait for to_dict()
+        scope = request.scope
+        state = scope.get("state", {})
+        # Filled by the security middlewares/pipeline running inside this one
+        security = state.get(STATE_KEY)
+        first_byte = response.first_byte_ns
+        return RequestLogRecord(
+            started_ns=started_ns,
+            duration_ns=ended - started,
+            ttfb_ns=first_byte - started if first_byte is not None else None,
+            method=scope["method"],
+            path=request.url.path,
+            route=_route_template(scope),
+            query_string=scope.get("query_string", b""),
+            raw_headers=scope.get("headers", ()),
+            client=scope.get("client"),
+            request_id=state.get("request_id"),
+            status_code=status_code,
+            response_length=response.bytes_sent if first_byte is not None else None,
+            security_timings=security.timings if security is not None else None,
+            request_body=request_body.data() if request_body is not None else None,
+            response_body=response.body.data() if response.body is not None else None,
+            include_headers=self._include_headers,
+            extra_fields=self._extra_fields,
+        )
+
+    async def _safe_emit(self, record: Union[RequestLogRecord, Dict[str, Any]]) -> None:
         try:
             await self._emit(record)
         except Exception as e:
-            if self._on_error:
-                try:
-                    self._on_error(e)
-                except Exception:
-                    pass
-        return response
+            self._report_error(e)
 
-    async def _emit(self, record: dict) -> None:
+    def _report_error(self, error: Exception) -> None:
+        if self._on_error:
+            try:
+                self._on_error(error)
+            except Exception:
+                pass
+
+    async def _emit(self, record: Union[RequestLogRecord, Dict[str, Any]]) -> None:
         # Accept either a provider with .log() or a callable
         if isinstance(self._provider, BaseRequestLogProvider):
             await self._provider.log(record)
@@ -158,19 +208,75 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             if hasattr(result, "__await__"):
                 await result
 
-    @staticmethod
-    def _get_client_ip(request: Request) -> str:
-        forwarded_for = request.headers.get("x-forwarded-for")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        real_ip = request.headers.get("x-real-ip")
-        if real_ip:
-            return real_ip.strip()
-        return request.client.host if request.client else "unknown"
-
-    @staticmethod
-    def _safe_int(value: Optional[str]) -> Optional[int]:
-        try:
-            return int(value) if value is not None else None
-        except (TypeError, ValueError):
-            return None
+
+class RequestLoggingASGIMiddleware(RequestLoggingMiddleware):
+    """
+    Pure ASGI variant of RequestLoggingMiddleware.
+
+    Kept for symmetry with the other middlewares: RequestLoggingMiddleware
+    itself runs as pure ASGI, since bounded body capture needs to wrap
+    `receive` and `send`.
+    """
+
+
+def _route_template(scope: Scope) -> Optional[str]:
+    """Path template of the matched route (e.g. "/items/{item_id}"), None if none matched."""
+    return getattr(scope.get("route"), "path", None)
+
+
+class _ResponseTap:
+    """Observes the response messages: status, body bytes actually sent and first byte time."""
+
+    __slots__ = ("status_code", "bytes_sent", "first_byte_ns", "body")
+
+    def __init__(self, body: Optional["_BodyCapture"] = None):
+        self.status_code = 500
+        self.bytes_sent = 0
+        self.first_byte_ns: Optional[int] = None
+        self.body = body
+
+    def wrap_send(self, send: Send) -> Send:
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self.status_code = message["status"]
+                self.first_byte_ns = perf_counter_ns()
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                # Counted per chunk, so streaming/chunked responses are measured too
+                self.bytes_sent += len(chunk)
+                if self.body is not None:
+                    self.body.feed(chunk)
+            await send(message)
+
+        return send_wrapper
+
+
+class _BodyCapture:
+    """First `limit` bytes of a body, copied as its chunks pass through."""
+
+    __slots__ = ("limit", "size", "chunks")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+        self.chunks: List[bytes] = []
+
+    def feed(self, chunk: bytes) -> None:
+        room = self.limit - self.size
+        if room > 0 and chunk:
+            # Slicing copies at most `room` bytes, whatever the chunk size
+            part = chunk[:room]
+            self.chunks.append(part)
+            self.size += len(part)
+
+    def wrap_receive(self, receive: Receive) -> Receive:
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                self.feed(message.get("body", b""))
+            return message
+
+        return receive_wrapper
+
+    def data(self) -> Optional[bytes]:
+        return b"".join(self.chunks) if self.chunks else None
@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from os_fastapi_middleware.context import get_security_context
+from os_fastapi_middleware.paths import compile_path_rules
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware adding a Server-Timing header with the security stage timings.
+
+    Every security middleware (and SecurityPipeline) records the time spent
+    in its stage on the request's SecurityContext. This middleware appends
+    them to the response, e.g.
+
+        Server-Timing: ip_resolve;dur=0.004, api_key;dur=0.021, rate_limit;dur=0.612
+
+    so browser devtools and tracing proxies show where security latency goes.
+    Add it last (outermost), so it wraps every security layer. Responses
+    sent before any stage ran get no header.
+
+    The header discloses how long key validation took; enable it only where
+    clients are trusted (internal APIs, staging) or restrict it to
+    `include_paths`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        include_paths: Optional[List[str]] = None,
+        header_name: str = "Server-Timing",
+    ):
+        """
+        Args:
+            app: ASGI app
+            include_paths: Path rules (exact, "/prefix/**", globs, "re:" regexes) that
+                get the header; all paths when None
+            header_name: Response header name
+        """
+        self.app = app
+        self._include = compile_path_rules(include_paths) if include_paths is not None else None
+        self._header_name = header_name.lower()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (self._include is not None and not self._include.matches(scope["path"])):
+            await self.app(scope, receive, send)
+            return
+
+        # Attach the context now, so inner layers fill this very object
+        context = get_security_context(scope)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and context.timings:
+                MutableHeaders(scope=message).append(self._header_name, context.server_timing())
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
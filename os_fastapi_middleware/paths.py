@@ -0,0 +1,134 @@
+"""Compiled path rules used for `exempt_paths`."""
+
+import re
+from typing import Iterable, List, Optional, Union
+
+REGEX_PREFIX = "re:"
+
+
+class _Node:
+    __slots__ = ("children", "exact", "subtree")
+
+    def __init__(self):
+        self.children = {}
+        self.exact = False
+        self.subtree = False
+
+
+def _glob_to_regex(rule: str) -> str:
+    parts = []
+    # A trailing "/**" covers the prefix itself too, like the trie's prefix rules
+    subtree = rule.endswith("/**")
+    if subtree:
+        rule = rule[:-3]
+    i = 0
+    while i < len(rule):
+        char = rule[i]
+        if rule.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    if subtree:
+        parts.append("(?:/.*)?")
+    return "".join(parts)
+
+
+class PathMatcher:
+    """
+    Matcher for path rules, compiled once at construction time.
+
+    Supported rules:
+        "/health"               exact path
+        "/internal/metrics/**"  the prefix itself and everything below it
+        "/static/*"             glob: "*" matches one segment, "?" one char, "**" anything
+        "re:^/v[0-9]+/ping$"    regular expression (full match)
+
+    Exact and "/**" prefix rules are stored in a segment trie, so they are
+    matched in a single walk over the path. Globs and regexes are joined into
+    one combined regex that is only evaluated when the trie did not match.
+
+    `path in matcher` works as well, so a matcher can replace a list of paths.
+    """
+
+    __slots__ = ("rules", "_root", "_regex")
+
+    def __init__(self, rules: Optional[Iterable[str]] = None):
+        self.rules: List[str] = list(rules or [])
+        self._root = _Node()
+        patterns = []
+
+        for rule in self.rules:
+            if rule.startswith(REGEX_PREFIX):
+                pattern = rule[len(REGEX_PREFIX):]
+                re.compile(pattern)  # Fail fast on invalid expressions
+                patterns.append(pattern)
+                continue
+
+            prefix, is_subtree = rule, False
+            if rule.endswith("/**"):
+                prefix, is_subtree = rule[:-3], True
+
+            if any(c in prefix for c in "*?"):
+                patterns.append(_glob_to_regex(rule))
+                continue
+
+            node = self._root
+            for segment in prefix.split("/"):
+                node = node.children.setdefault(segment, _Node())
+            if is_subtree:
+                node.subtree = True
+            else:
+                node.exact = True
+
+        self._regex = (
+            re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+        )
+
+    def matches(self, path: str) -> bool:
+        node = self._root
+        for segment in path.split("/"):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.subtree:
+                return True
+        else:
+            if node.exact:
+                return True
+
+        if self._regex is not None:
+            return self._regex.fullmatch(path) is not None
+        return False
+
+    __contains__ = matches
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+
+def compile_path_rules(rules: Optional[Union[Iterable[str], PathMatcher]]) -> PathMatcher:
+    """
+    Compile path rules into a PathMatcher (returned as is if already compiled).
+
+    Args:
+        rules: Iterable of rules, or an existing PathMatcher to share
+
+    Returns:
+        Compiled PathMatcher
+    """
+    if isinstance(rules, PathMatcher):
+        return rules
+    return PathMatcher(rules)
@@ -0,0 +1,120 @@
+"""Route-aware security policies, precompiled from the application routes."""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.routing import Match
+from starlette.types import Scope
+
+from os_fastapi_middleware.config import RoutePolicy
+
+POLICY_ATTRIBUTE = "__security_policy__"
+
+
+def security_policy(policy: Optional[RoutePolicy] = None, **fields) -> Callable:
+    """
+    Attach a RoutePolicy to an endpoint.
+
+    Apply it below the route decorator:
+
+        @app.get("/reports")
+        @security_policy(requests_per_window=5, tier="reports")
+        async def reports(): ...
+
+    Args:
+        policy: A RoutePolicy instance, or
+        **fields: RoutePolicy fields to build one from
+    """
+    policy = policy or RoutePolicy(**fields)
+
+    def decorator(endpoint: Callable) -> Callable:
+        setattr(endpoint, POLICY_ATTRIBUTE, policy)
+        return endpoint
+
+    return decorator
+
+
+class PolicyRegistry:
+    """
+    Route -> RoutePolicy table used by SecurityPipeline.
+
+    Policies come from `@security_policy` on endpoints, or from `policies`
+    keyed by route path template (e.g. "/items/{item_id}") or route name.
+    Routes without a policy use `default`.
+
+    `compile()` reads `app.routes` once (SecurityPipeline does it on lifespan
+    startup, or on the first request). Routes without path parameters are
+    then looked up with a single dict access on (method, path); only routes
+    with parameters are matched with their compiled regex.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, RoutePolicy]] = None,
+        default: Optional[RoutePolicy] = None,
+    ):
+        """
+        Args:
+            policies: Policies keyed by route path template or route name
+            default: Policy for routes without one (defaults to RoutePolicy())
+        """
+        self.policies = dict(policies or {})
+        self.default = default or RoutePolicy()
+        self._static: Dict[Tuple[str, str], RoutePolicy] = {}
+        self._dynamic: List[Tuple[Any, RoutePolicy]] = []
+        self.compiled = False
+
+    def _policy_for_route(self, route: Any) -> Optional[RoutePolicy]:
+        endpoint = getattr(route, "endpoint", None)
+        policy = getattr(endpoint, POLICY_ATTRIBUTE, None)
+        if policy is not None:
+            return policy
+        path = getattr(route, "path", None)
+        if path in self.policies:
+            return self.policies[path]
+        return self.policies.get(getattr(route, "name", None))
+
+    def compile(self, app_or_routes: Any) -> None:
+        """
+        Build the lookup table.
+
+        Args:
+            app_or_routes: A FastAPI/Starlette app, a router, or a list of routes
+        """
+        routes = getattr(app_or_routes, "routes", app_or_routes) or []
+        static: Dict[Tuple[str, str], RoutePolicy] = {}
+        dynamic: List[Tuple[Any, RoutePolicy]] = []
+
+        for route in routes:
+            path = getattr(route, "path", None)
+            if path is None or not hasattr(route, "endpoint"):
+                # Mounts and other non-endpoint routes use the default policy
+                continue
+            policy = self._policy_for_route(route) or self.default
+            # A static path shadowed by an earlier parameterised route must keep router order
+            shadowed = any(
+                getattr(earlier, "path_regex", None) is not None and earlier.path_regex.match(path)
+                for earlier, _ in dynamic
+            )
+            if "{" in path or shadowed:
+                dynamic.append((route, policy))
+                continue
+            for method in getattr(route, "methods", None) or ["*"]:
+                # First registered route wins, like the router
+                static.setdefault((method, path), policy)
+
+        self._static = static
+        self._dynamic = dynamic
+        self.compiled = True
+
+    def lookup(self, scope: Scope) -> RoutePolicy:
+        """Return the policy of the route matching the request scope."""
+        path = scope["path"]
+        policy = self._static.get((scope["method"], path)) or self._static.get(("*", path))
+        if policy is not None:
+            return policy
+
+        for route, route_policy in self._dynamic:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route_policy
+        return self.default
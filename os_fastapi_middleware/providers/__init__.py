@@ -1,34 +1,84 @@
-from .base import (
-    BaseAPIKeyProvider,
-    BaseRateLimitProvider,
-    BaseIPWhitelistProvider
-)
+from importlib.util import find_spec
+from typing import TYPE_CHECKING
 
-from .memory import (
-    InMemoryAPIKeyProvider,
-    InMemoryRateLimitProvider,
-    InMemoryIPWhitelistProvider
-)
+from .._lazy import lazy_exports
 
-try:
+# Providers are imported on first access; Redis is optional
+_EXPORTS = {
+    "BaseAPIKeyProvider": ".base",
+    "BaseRateLimitProvider": ".base",
+    "BaseIPWhitelistProvider": ".base",
+    "InMemoryAPIKeyProvider": ".memory",
+    "InMemoryRateLimitProvider": ".memory",
+    "InMemoryIPWhitelistProvider": ".memory",
+    "ApproximateRateLimitProvider": ".approximate",
+    "MMapIPWhitelistProvider": ".iprange",
+    "MMapIPDenylistProvider": ".iprange",
+    "BlockingProviderExecutor": ".threaded",
+    "ProviderSaturatedError": ".threaded",
+    "ProviderTimeoutError": ".threaded",
+    "ThreadedAPIKeyProvider": ".threaded",
+    "ThreadedIPWhitelistProvider": ".threaded",
+    "ThreadedRateLimitProvider": ".threaded",
+    "BatchingRequestLogProvider": ".batching",
+    "RotatingFileRequestLogProvider": ".file",
+    "AggregatingRequestLogProvider": ".aggregating",
+    "RedisRateLimitProvider": ".redis",
+    "RedisAPIKeyProvider": ".redis",
+    "RedisConnectionManager": ".redis_pool",
+}
+_REDIS_EXPORTS = ("RedisRateLimitProvider", "RedisAPIKeyProvider", "RedisConnectionManager")
+
+__getattr__, __dir__ = lazy_exports(__name__, globals(), _EXPORTS, optional=_REDIS_EXPORTS)
+
+if TYPE_CHECKING:
+    from .base import (
+        BaseAPIKeyProvider,
+        BaseRateLimitProvider,
+        BaseIPWhitelistProvider
+    )
+    from .memory import (
+        InMemoryAPIKeyProvider,
+        InMemoryRateLimitProvider,
+        InMemoryIPWhitelistProvider
+    )
+    from .approximate import ApproximateRateLimitProvider
+    from .iprange import MMapIPWhitelistProvider, MMapIPDenylistProvider
+    from .threaded import (
+        BlockingProviderExecutor,
+        ProviderSaturatedError,
+        ProviderTimeoutError,
+        ThreadedAPIKeyProvider,
+        ThreadedIPWhitelistProvider,
+        ThreadedRateLimitProvider
+    )
+    from .batching import BatchingRequestLogProvider
+    from .file import RotatingFileRequestLogProvider
+    from .aggregating import AggregatingRequestLogProvider
     from .redis import RedisRateLimitProvider, RedisAPIKeyProvider
-    __all__ = [
-        "BaseAPIKeyProvider",
-        "BaseRateLimitProvider",
-        "BaseIPWhitelistProvider",
-        "InMemoryAPIKeyProvider",
-        "InMemoryRateLimitProvider",
-        "InMemoryIPWhitelistProvider",
-        "RedisRateLimitProvider",
-        "RedisAPIKeyProvider",
-    ]
-except ImportError:
-    # Redis is optional
-    __all__ = [
-        "BaseAPIKeyProvider",
-        "BaseRateLimitProvider",
-        "BaseIPWhitelistProvider",
-        "InMemoryAPIKeyProvider",
-        "InMemoryRateLimitProvider",
-        "InMemoryIPWhitelistProvider",
-    ]
+    from .redis_pool import RedisConnectionManager
+
+__all__ = [
+    "BaseAPIKeyProvider",
+    "BaseRateLimitProvider",
+    "BaseIPWhitelistProvider",
+    "InMemoryAPIKeyProvider",
+    "InMemoryRateLimitProvider",
+    "InMemoryIPWhitelistProvider",
+    "ApproximateRateLimitProvider",
+    "MMapIPWhitelistProvider",
+    "MMapIPDenylistProvider",
+    "BlockingProviderExecutor",
+    "ProviderSaturatedError",
+    "ProviderTimeoutError",
+    "ThreadedAPIKeyProvider",
+    "ThreadedIPWhitelistProvider",
+    "ThreadedRateLimitProvider",
+    "BatchingRequestLogProvider",
+    "RotatingFileRequestLogProvider",
+    "AggregatingRequestLogProvider",
+]
+
+# Redis is optional: only advertise its providers when the client is installed
+if find_spec("redis") is not None:
+    __all__ += list(_REDIS_EXPORTS)
@@ -0,0 +1,246 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .base import BaseRequestLogProvider
+from ..histogram import LogLinearHistogram
+from ..records import RequestLogRecord
+
+# Requests that matched no route are grouped together, never by raw path
+UNMATCHED_ROUTE = "<unmatched>"
+# Series created after `max_series` is reached are folded into this route
+OVERFLOW_ROUTE = "<other>"
+
+SeriesKey = Tuple[str, str, str]
+
+
+class _Series:
+    __slots__ = ("count", "weighted_count", "response_bytes", "latency", "_carry")
+
+    def __init__(self, precision_bits: int):
+        self.count = 0
+        self.weighted_count = 0.0
+        self.response_bytes = 0.0
+        self.latency = LogLinearHistogram(precision_bits)
+        # Fraction of a request owed to the histogram, which only holds whole counts
+        self._carry = 0.0
+
+    def add(self, duration_us: int, response_length: int, weight: float) -> None:
+        self.count += 1
+        self.weighted_count += weight
+        self.response_bytes += response_length * weight
+        owed = weight + self._carry
+        occurrences = int(owed)
+        self._carry = owed - occurrences
+        if occurrences:
+            self.latency.record(duration_us, occurrences)
+
+
+class AggregatingRequestLogProvider(BaseRequestLogProvider):
+    """
+    Turns per-request records into periodic rollups.
+
+    Instead of forwarding one record per request, `log()` updates in-memory
+    counters and a latency histogram (see LogLinearHistogram) for the
+    request's (method, route template, status class) series. Every
+    `interval` seconds one rollup record per series is sent to `target`
+    through `log_batch()`, with the request count, response bytes and
+    latency min/mean/max/percentiles in milliseconds. Records kept by a
+    sampler count `sample_weight` times in `weighted_count`, the response
+    bytes and the latency histogram, so percentiles describe all requests,
+    not only the sampled ones (`count` is the number of records). With
+    `include_histogram`, the raw histogram is attached too, so rollups from
+    several workers or windows can be merged with exact percentiles.
+
+    Routes come from the record's `route` field (the path template, e.g.
+    "/items/{item_id}"), so cardinality stays bounded by the app's routes;
+    unmatched requests are grouped as "<unmatched>". At most `max_series`
+    series are tracked per window; the rest are folded into "<other>".
+
+    Compact records (RequestLogRecord) are read directly and never turned
+    into dicts.
+
+    Usage example:
+        provider = AggregatingRequestLogProvider(ElasticProvider(...), interval=60)
+        app.add_middleware(RequestLoggingMiddleware, provider=provider)
+    """
+
+    accepts_compact_records = True
+
+    def __init__(
+        self,
+        target: BaseRequestLogProvider,
+        interval: float = 60.0,
+        percentiles: Tuple[float, ...] = (50, 90, 99),
+        include_histogram: bool = False,
+        precision_bits: int = 7,
+        max_series: int = 10000,
+        on_error: Optional[Callable[[Exception], Any]] = None,
+    ):
+        """
+        Args:
+            target: Provider receiving the rollup records through log_batch()
+            interval: Seconds covered by each rollup
+            percentiles: Latency percentiles reported in each rollup
+            include_histogram: If true, add the mergeable histogram (LogLinearHistogram.to_dict())
+            precision_bits: Histogram resolution (7 keeps percentiles within 0.8%)
+            max_series: Maximum (method, route, status class) series per window
+            on_error: Optional callback if the target raises (the rollups are discarded)
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.target = target
+        self.interval = interval
+        self.percentiles = tuple(percentiles)
+        self.include_histogram = include_histogram
+        self.precision_bits = precision_bits
+        self.max_series = max_series
+        self.on_error = on_error
+
+        self._series: Dict[SeriesKey, _Series] = {}
+        self._window_start = datetime.now(timezone.utc)
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+
+        self._records = 0
+        self._rollups = 0
+        self._failed = 0
+        self._windows = 0
+
+    async def start(self) -> None:
+        """Start the periodic flusher on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._closing = False
+        self._task = loop.create_task(self._run())
+
+    async def aclose(self) -> None:
+        """Stop the flusher and send the current, partial window."""
+        self._closing = True
+        task, self._task = self._task, None
+        if task is not None and not task.done() and self._loop is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def __aenter__(self) -> "AggregatingRequestLogProvider":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def log(self, record: dict) -> None:
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            if not self._closing:
+                await self.start()
+
+        if isinstance(record, RequestLogRecord):
+            method, route, status_code = record.method, record.route, record.status_code
+            duration_us = record.duration_ns // 1000
+            response_length, sample_weight = record.response_length, record.sample_weight
+        else:
+            method, route, status_code = record.get("method"), record.get("route"), record.get("status_code")
+            duration_us = record.get("duration_us")
+            if duration_us is None:
+                duration_us = (record.get("duration_ms") or 0) * 1000
+            response_length, sample_weight = record.get("response_length"), record.get("sample_weight", 1.0)
+
+        key = (method or "", route or UNMATCHED_ROUTE, f"{(status_code or 0) // 100}xx")
+        series = self._series.get(key)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                key = ("*", OVERFLOW_ROUTE, key[2])
+                series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.precision_bits)
+
+        series.add(duration_us, response_length or 0, sample_weight or 1.0)
+        self._records += 1
+
+    async def log_batch(self, records: List[dict]) -> None:
+        for record in records:
+            await self.log(record)
+
+    def snapshot(self) -> List[dict]:
+        """Rollups of the current window so far, without resetting it."""
+        return self._rollups_for(self._series, self._window_start, datetime.now(timezone.utc))
+
+    async def flush(self) -> None:
+        """Close the current window and send its rollups."""
+        series, self._series = self._series, {}
+        started, self._window_start = self._window_start, datetime.now(timezone.utc)
+        self._windows += 1
+        if not series:
+            return
+        rollups = self._rollups_for(series, started, self._window_start)
+        try:
+            await self.target.log_batch(rollups)
+        except Exception as e:
+            self._failed += len(rollups)
+            if self.on_error:
+                try:
+                    self.on_error(e)
+                except Exception:
+                    pass
+        else:
+            self._rollups += len(rollups)
+
+    def _rollups_for(self, series: Dict[SeriesKey, _Series], started: datetime, ended: datetime) -> List[dict]:
+        rollups = []
+        for (method, route, status_class), entry in series.items():
+            latency = entry.latency
+            values = latency.percentiles(self.percentiles)
+            rollup = {
+                "type": "rollup",
+                "window_start": started.isoformat(),
+                "window_end": ended.isoformat(),
+                "method": method,
+                "route": route,
+                "status_class": status_class,
+                "count": entry.count,
+                "weighted_count": entry.weighted_count,
+                "response_bytes": round(entry.response_bytes),
+                "duration_ms": {
+                    "min": latency.min / 1000,
+                    "mean": round(latency.mean / 1000, 3),
+                    "max": latency.max / 1000,
+                    **{_percentile_name(q): round(v / 1000, 3) for q, v in zip(self.percentiles, values)},
+                },
+            }
+            if self.include_histogram:
+                rollup["histogram_us"] = latency.to_dict()
+            rollups.append(rollup)
+        return rollups
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Aggregation counters.
+
+        Returns:
+            Dict with `series` (in the current window) and the `records`,
+            `windows`, `rollups` and `failed` totals
+        """
+        return {
+            "series": len(self._series),
+            "records": self._records,
+            "windows": self._windows,
+            "rollups": self._rollups,
+            "failed": self._failed,
+        }
+
+
+def _percentile_name(q: float) -> str:
+    # 99 -> "p99", 99.9 -> "p99_9"
+    return "p" + f"{q:g}".replace(".", "_")
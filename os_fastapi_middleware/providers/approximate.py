@@ -0,0 +1,150 @@
+import math
+import time
+from typing import Any, Callable, Dict
+
+from .base import BaseRateLimitProvider
+from ..heavy_hitters import CountMinSketch
+
+
+class _Window:
+    """Sliding-window counters of one window length: two back-to-back epochs."""
+
+    __slots__ = ("epoch", "current", "previous")
+
+    def __init__(self, epoch: int, width: int, depth: int):
+        self.epoch = epoch
+        self.current = CountMinSketch(width, depth, typecode="I")
+        self.previous = CountMinSketch(width, depth, typecode="I")
+
+
+class ApproximateRateLimitProvider(BaseRateLimitProvider):
+    """
+    Fixed-memory rate limiter for unbounded key spaces.
+
+    Counts live in count-min sketches instead of per-key entries, so memory
+    does not grow with the number of keys: a flood from millions of spoofed
+    or rotating IPv6 sources costs the same as one client. Each window
+    length used (usually one) gets two epochs of `width * depth` 4-byte
+    counters: 4 MB with the defaults.
+
+    Windows are sliding, approximated from fixed epochs aligned on
+    `window_seconds`: the count of a key is its count in the current epoch
+    plus its count in the previous one, weighted by the share of the
+    previous epoch still inside the window. Epochs rotate by swapping and
+    clearing the sketches; nothing is allocated per request.
+
+    Estimates never undercount, so a key over its limit is always limited.
+    They can overcount: with probability 1 - exp(-depth), a key's count is
+    at most e / width of the requests counted in the window too high (for
+    the defaults, 2 extra requests per 100,000 counted). A well-behaved key
+    can thus be limited early, by at most that many requests, when the
+    total traffic is large relative to `width`; `stats()` reports the
+    current bound. Use it as a cheap first-line limiter with a generous
+    limit, in front of the exact per-key provider.
+
+    Python's hash() is salted per process, so attackers cannot craft keys
+    that collide on purpose.
+
+    Usage example:
+        app.add_middleware(RateLimitMiddleware, provider=exact_provider, requests_per_window=100)
+        app.add_middleware(RateLimitMiddleware, provider=ApproximateRateLimitProvider(),
+                           requests_per_window=1000, key_func=client_ip, add_headers=False)
+    """
+
+    def __init__(
+        self,
+        width: int = 1 << 17,
+        depth: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            width: Counters per sketch row; the overcount bound is e / width of the window's requests
+            depth: Sketch rows; the bound fails with probability exp(-depth)
+            clock: Time source, in seconds
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.clock = clock
+        self._windows: Dict[int, _Window] = {}
+        self._allowed = 0
+        self._limited = 0
+
+    def _window(self, window_seconds: int):
+        """Current (window, weight of the previous epoch)."""
+        now = self.clock()
+        epoch = int(now // window_seconds)
+        window = self._windows.get(window_seconds)
+        if window is None:
+            window = self._windows[window_seconds] = _Window(epoch, self.width, self.depth)
+        elif epoch != window.epoch:
+            # Reuse the sketches: the old previous epoch becomes the new current one
+            stale = window.previous
+            stale.clear()
+            if epoch == window.epoch + 1:
+                window.previous = window.current
+            else:
+                window.current.clear()
+                window.previous = window.current
+            window.current = stale
+            window.epoch = epoch
+        weight = 1.0 - (now - epoch * window_seconds) / window_seconds
+        return window, weight
+
+    def _count(self, window: _Window, weight: float, cells) -> float:
+        count = window.current.estimate_cells(cells)
+        if weight > 0 and window.previous.total:
+            count += window.previous.estimate_cells(cells) * weight
+        return count
+
+    def check_rate_limit_sync(self, key: str, limit: int, window_seconds: int) -> bool:
+        window, weight = self._window(window_seconds)
+        cells = window.current.cells(key)
+        # The previous epoch makes counts fractional: this request must fit whole
+        if self._count(window, weight, cells) + 1 > limit:
+            self._limited += 1
+            return False
+        window.current.add_cells(cells)
+        self._allowed += 1
+        return True
+
+    def get_remaining_requests_sync(self, key: str, limit: int, window_seconds: int) -> int:
+        window, weight = self._window(window_seconds)
+        count = self._count(window, weight, window.current.cells(key))
+        return max(0, limit - math.ceil(count))
+
+    async def check_rate_limit(self, key: str, limit: int, window_seconds: int) -> bool:
+        return self.check_rate_limit_sync(key, limit, window_seconds)
+
+    async def get_remaining_requests(self, key: str, limit: int, window_seconds: int) -> int:
+        return self.get_remaining_requests_sync(key, limit, window_seconds)
+
+    def reset(self) -> None:
+        self._windows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Sizes and counters.
+
+        Returns:
+            Dict with `memory_bytes` (all sketches), `windows` (window lengths
+            in use), the `allowed` and `limited` totals, and per window
+            length `max_overcount`: the most any key's count can currently
+            be overestimated, in requests (with probability 1 - exp(-depth))
+        """
+        overcount = {}
+        for window_seconds in list(self._windows):
+            window, weight = self._window(window_seconds)
+            counted = window.current.total + window.previous.total * max(weight, 0.0)
+            overcount[window_seconds] = round(math.e / self.width * counted, 1)
+        return {
+            "memory_bytes": sum(
+                window.current.nbytes + window.previous.nbytes for window in self._windows.values()
+            ),
+            "windows": sorted(self._windows),
+            "allowed": self._allowed,
+            "limited": self._limited,
+            "max_overcount": overcount,
+        }
@@ -1,10 +1,46 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Any, Callable, Optional, List
 from datetime import datetime
 
 
+def resolve_sync_method(provider: Any, name: str) -> Optional[Callable]:
+    """
+    Return the synchronous variant (`<name>_sync`) of a provider method, if usable.
+
+    Providers that only touch local memory may implement e.g. `validate_key_sync`
+    next to `validate_key`; callers resolve it once and call it directly,
+    avoiding a coroutine per check. The sync variant is ignored when the async
+    method is overridden more specifically (in a subclass or on the instance),
+    so custom behaviour is never bypassed.
+
+    Args:
+        provider: Provider instance
+        name: Async method name (e.g. "validate_key")
+
+    Returns:
+        Bound sync method, or None if the provider has no usable sync variant
+    """
+    sync_name = f"{name}_sync"
+    if name in getattr(provider, "__dict__", {}):
+        return None
+    sync_method = getattr(provider, sync_name, None)
+    if not callable(sync_method):
+        return None
+
+    mro = type(provider).__mro__
+    async_owner = next((klass for klass in mro if name in vars(klass)), None)
+    sync_owner = next((klass for klass in mro if sync_name in vars(klass)), None)
+    if async_owner is None or sync_owner is None or not issubclass(sync_owner, async_owner):
+        return None
+    return sync_method
+
+
 class BaseAPIKeyProvider(ABC):
-    """Interface abstrata para validação de API keys."""
+    """Interface abstrata para validação de API keys.
+
+    Providers may also define `validate_key_sync` and `get_key_metadata_sync`
+    (same signature, not async) for a coroutine-free fast path.
+    """
     
     @abstractmethod
     async def validate_key(self, api_key: str) -> bool:
@@ -31,7 +67,11 @@ class BaseAPIKeyProvider(ABC):
 
 
 class BaseRateLimitProvider(ABC):
-    """Interface abstrata para rate limiting."""
+    """Interface abstrata para rate limiting.
+
+    Providers may also define `check_rate_limit_sync` and
+    `get_remaining_requests_sync` for a coroutine-free fast path.
+    """
     
     @abstractmethod
     async def check_rate_limit(
@@ -64,6 +104,10 @@ class BaseRateLimitProvider(ABC):
 
 
 class BaseIPWhitelistProvider(ABC):
+    """Interface for IP whitelist checks.
+
+    Providers may also define `is_ip_allowed_sync` for a coroutine-free fast path.
+    """
     
     @abstractmethod
     async def is_ip_allowed(self, ip: str) -> bool:
@@ -88,8 +132,15 @@ class BaseRequestLogProvider(ABC):
 
     Implement this in your project (e.g., using Elasticsearch) and pass an
     instance to RequestLoggingMiddleware. Avoids adding external deps here.
+
+    Set `accepts_compact_records = True` to receive
+    os_fastapi_middleware.records.RequestLogRecord objects instead of dicts;
+    the provider then calls `to_dict()` (or `record_to_dict()`) itself, off
+    the request path.
     """
 
+    accepts_compact_records: bool = False
+
     @abstractmethod
     async def log(self, record: dict) -> None:
         """Persist a single request/response record.
@@ -97,8 +148,32 @@ class BaseRequestLogProvider(ABC):
         The `record` is a JSON-serializable dict with keys including:
         - timestamp: ISO 8601 string (UTC)
         - method, path, query, client_ip, user_agent, request_id
-        - status_code, duration_ms, content_length, response_length
+        - route: path template of the matched route (e.g. "/items/{item_id}"), or None
+        - status_code, duration_ms, content_length
+        - duration_us: the duration in microseconds
+        - response_length: body bytes actually sent (also for streaming responses)
+        - ttfb_ms: milliseconds until the response started
+        - security_timings: milliseconds spent per security stage
+          (see SecurityContext.timings), or None
+        - sample_weight: 1 / probability of the record being kept by the
+          middleware's sampler (1.0 without sampling)
         - headers (subset): referer, host, forwarded_for, real_ip
         - any extra fields set via middleware `extra_fields`.
         """
-        pass
\ No newline at end of file
+        pass
+
+    async def log_batch(self, records: List[dict]) -> None:
+        """Persist several records at once.
+
+        Used by BatchingRequestLogProvider. The default calls `log()` for each
+        record; override it to use the backend's bulk API (e.g. Elasticsearch
+        `_bulk`).
+        """
+        for record in records:
+            await self.log(record)
+
+    async def start(self) -> None:
+        """Called on application startup by RequestLoggingMiddleware (no-op by default)."""
+
+    async def aclose(self) -> None:
+        """Called on application shutdown by RequestLoggingMiddleware; flush and release resources here."""
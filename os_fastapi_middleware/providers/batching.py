@@ -0,0 +1,194 @@
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .base import BaseRequestLogProvider
+from ..records import record_to_dict
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class BatchingRequestLogProvider(BaseRequestLogProvider):
+    """
+    Queues log records in memory and ships them to another provider in batches.
+
+    `log()` only appends to a bounded queue, so the latency of the backend
+    (Elasticsearch, an HTTP collector, ...) is kept off the request path. A
+    background task calls `target.log_batch()` once `batch_size` records are
+    queued, or every `flush_interval` seconds.
+
+    When the queue is full, `overflow` decides what happens:
+        "drop_oldest"  discard the oldest queued record (default)
+        "drop_newest"  discard the new record
+        "block"        wait in `log()` until the flusher made room
+
+    Call `start()`/`aclose()` from the application lifespan (or use
+    `async with provider:`); RequestLoggingMiddleware does it automatically
+    when the app runs a lifespan. Without it, the flusher starts on the
+    first record. `aclose()` flushes everything still queued; records logged
+    while or after closing are sent to the target directly.
+
+    Records are queued in their compact form (RequestLogRecord) and only
+    turned into dicts by the flusher, unless `target` accepts them as is.
+
+    Usage example:
+        provider = BatchingRequestLogProvider(ElasticProvider(...), batch_size=500, flush_interval=2.0)
+        app.add_middleware(RequestLoggingMiddleware, provider=provider)
+    """
+
+    accepts_compact_records = True
+
+    def __init__(
+        self,
+        target: BaseRequestLogProvider,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue: int = 10000,
+        overflow: str = "drop_oldest",
+        on_error: Optional[Callable[[Exception], Any]] = None,
+    ):
+        """
+        Args:
+            target: Provider receiving the batches through log_batch()
+            batch_size: Maximum records per batch; a full batch is flushed right away
+            flush_interval: Seconds between flushes of partial batches
+            max_queue: Maximum records waiting to be flushed
+            overflow: "drop_oldest", "drop_newest" or "block"
+            on_error: Optional callback if the target raises (the batch is discarded)
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        if batch_size < 1 or max_queue < 1:
+            raise ValueError("batch_size and max_queue must be at least 1")
+        self.target = target
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.on_error = on_error
+
+        self._queue: Deque[dict] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self._enqueued = 0
+        self._dropped = 0
+        self._flushed = 0
+        self._failed = 0
+        self._batches = 0
+
+    async def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        # Events are bound to a loop on older Pythons: create them with the task
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._closing = False
+        self._task = loop.create_task(self._run())
+
+    async def aclose(self) -> None:
+        """Stop the flusher and flush every queued record."""
+        self._closing = True
+        task, self._task = self._task, None
+        if task is not None and not task.done() and self._loop is asyncio.get_running_loop():
+            self._wakeup.set()
+            await task
+        await self.flush()
+
+    async def __aenter__(self) -> "BatchingRequestLogProvider":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def log(self, record: dict) -> None:
+        if self._closing:
+            # No flusher will pick it up any more: ship it right away
+            self._enqueued += 1
+            await self._send([record])
+            return
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            await self.start()
+
+        if len(self._queue) >= self.max_queue:
+            if self.overflow == "drop_newest":
+                self._dropped += 1
+                return
+            if self.overflow == "drop_oldest":
+                self._queue.popleft()
+                self._dropped += 1
+            else:
+                while len(self._queue) >= self.max_queue and not self._closing:
+                    self._space.clear()
+                    self._wakeup.set()
+                    await self._space.wait()
+                if self._closing:
+                    self._enqueued += 1
+                    await self._send([record])
+                    return
+
+        self._queue.append(record)
+        self._enqueued += 1
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def log_batch(self, records: List[dict]) -> None:
+        for record in records:
+            await self.log(record)
+
+    async def flush(self) -> None:
+        """Ship every queued record now, in batches of `batch_size`."""
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if self._space is not None:
+                self._space.set()
+            await self._send(batch)
+
+    async def _send(self, batch: list) -> None:
+        try:
+            if not self.target.accepts_compact_records:
+                batch = [record_to_dict(record) for record in batch]
+            await self.target.log_batch(batch)
+        except Exception as e:
+            self._failed += len(batch)
+            if self.on_error:
+                try:
+                    self.on_error(e)
+                except Exception:
+                    pass
+        else:
+            self._flushed += len(batch)
+            self._batches += 1
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Queue counters.
+
+        Returns:
+            Dict with `queued` (waiting now) and the `enqueued`, `dropped`,
+            `flushed`, `failed` and `batches` totals
+        """
+        return {
+            "queued": len(self._queue),
+            "enqueued": self._enqueued,
+            "dropped": self._dropped,
+            "flushed": self._flushed,
+            "failed": self._failed,
+            "batches": self._batches,
+        }
@@ -0,0 +1,389 @@
+import asyncio
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+from .base import BaseRequestLogProvider
+from ..records import record_to_dict
+
+Serializer = Callable[[dict], bytes]
+
+
+def json_serializer(record: dict) -> bytes:
+    """Encode a record as one compact JSON line with the standard library."""
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def orjson_serializer(record: dict) -> bytes:
+    """Encode a record as one JSON line with orjson (requires the `orjson` extra)."""
+    import orjson
+
+    return orjson.dumps(record, default=str)
+
+
+def default_serializer() -> Serializer:
+    """orjson_serializer when orjson is installed, json_serializer otherwise."""
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return json_serializer
+    return orjson_serializer
+
+
+def encode_lines(serializer: Serializer, records: List[dict]) -> List[Union[bytes, Exception]]:
+    """Serialise records one by one; failures are returned in place of their line."""
+    lines: List[Union[bytes, Exception]] = []
+    for record in records:
+        try:
+            lines.append(serializer(record))
+        except Exception as e:
+            lines.append(e)
+    return lines
+
+
+def compress_segment(source: str) -> str:
+    """Gzip a rotated segment next to it, remove the original and return the new path."""
+    partial = source + ".gz.tmp"
+    with open(source, "rb") as src, gzip.open(partial, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(partial, source + ".gz")
+    os.remove(source)
+    return source + ".gz"
+
+
+class RotatingFileRequestLogProvider(BaseRequestLogProvider):
+    """
+    Writes log records to a local NDJSON file (one JSON object per line).
+
+    `log()` only appends the record to a bounded in-memory queue. A
+    background thread serialises the queued records and writes them in one
+    block every `flush_interval` seconds, or as soon as `flush_records` are
+    waiting, so the event loop never waits on the disk. Each block ends on
+    a line boundary and is flushed, so tailing shippers (Vector, Fluent Bit,
+    Filebeat, ...) never read half a record.
+
+    The file is rotated when it would grow past `max_bytes`, or every
+    `rotate_interval` seconds. Rotated segments are renamed with a UTC
+    timestamp (`requests.20261019T101500123456.ndjson`), optionally
+    gzip-compressed, and only the newest `backup_count` are kept.
+
+    Records are kept in their compact form (RequestLogRecord) until the
+    writer thread turns them into dicts. Pass a ProcessPoolExecutor as
+    `executor` to also move serialisation and compression out of the
+    process, so they never compete with the event loop for the GIL (the
+    serializer must then be picklable, e.g. a module-level function).
+
+    When the queue is full the oldest record is dropped. Call `start()` and
+    `aclose()` from the application lifespan (RequestLoggingMiddleware does
+    it automatically); `aclose()` writes everything still queued.
+
+    Usage example:
+        provider = RotatingFileRequestLogProvider("/var/log/api/requests.ndjson", max_bytes=50_000_000, compress=True)
+        app.add_middleware(RequestLoggingMiddleware, provider=provider)
+    """
+
+    accepts_compact_records = True
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: Optional[int] = 100 * 1024 * 1024,
+        rotate_interval: Optional[float] = None,
+        backup_count: Optional[int] = 10,
+        compress: bool = False,
+        serializer: Optional[Serializer] = None,
+        flush_interval: float = 1.0,
+        flush_records: int = 1000,
+        max_queue: int = 100000,
+        on_error: Optional[Callable[[Exception], Any]] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Args:
+            path: Active log file; its directory is created if needed
+            max_bytes: Rotate before the file grows past this size; None disables size rotation
+            rotate_interval: Rotate every this many seconds; None disables time rotation
+            backup_count: Rotated segments to keep; None keeps all of them
+            compress: If true, gzip rotated segments (".gz" is appended to their name)
+            serializer: callable(record) -> bytes for one line, without the newline
+                (defaults to orjson when installed, json otherwise)
+            flush_interval: Seconds between writes of the queued records
+            flush_records: Queued records that trigger a write before the interval
+            max_queue: Maximum records waiting to be written
+            on_error: Optional callback if serialising or writing raises
+            executor: Optional executor (e.g. ProcessPoolExecutor) running serialisation
+                and compression; the writer thread waits for it
+        """
+        if max_queue < 1 or flush_records < 1:
+            raise ValueError("max_queue and flush_records must be at least 1")
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.serializer = serializer or default_serializer()
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.max_queue = max_queue
+        self.on_error = on_error
+        self.executor = executor
+
+        directory, name = os.path.split(self.path)
+        stem, suffix = os.path.splitext(name)
+        self._directory = directory
+        self._stem = stem
+        self._suffix = suffix
+        self._segment_re = re.compile(
+            rf"^{re.escape(stem)}\.(\d{{8}}T\d{{12}})(?:-(\d+))?{re.escape(suffix)}(?:\.gz)?$"
+        )
+
+        self._queue: Deque[dict] = deque()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        # Serialises writes between the background thread and flush()/close()
+        self._write_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._rollover_at: Optional[float] = None
+
+        self._enqueued = 0
+        self._dropped = 0
+        self._written = 0
+        self._failed = 0
+        self._bytes_written = 0
+        self._rotations = 0
+
+    async def start(self) -> None:
+        """Start the background writer thread."""
+        self._start_thread()
+
+    async def aclose(self) -> None:
+        """Stop the writer thread and write every queued record."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self) -> "RotatingFileRequestLogProvider":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def log(self, record: dict) -> None:
+        if self._thread is None:
+            self._start_thread()
+        if len(self._queue) >= self.max_queue:
+            try:
+                self._queue.popleft()
+                self._dropped += 1
+            except IndexError:
+                # The writer thread emptied the queue in the meantime
+                pass
+        self._queue.append(record)
+        self._enqueued += 1
+        if len(self._queue) >= self.flush_records:
+            self._wakeup.set()
+
+    async def log_batch(self, records: List[dict]) -> None:
+        for record in records:
+            await self.log(record)
+
+    async def flush(self) -> None:
+        """Write every queued record now."""
+        await asyncio.get_running_loop().run_in_executor(None, self._drain)
+
+    def close(self) -> None:
+        """Blocking counterpart of aclose(), for use outside the event loop."""
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._stopping.set()
+                self._wakeup.set()
+        if thread is not None:
+            thread.join()
+        self._drain()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _start_thread(self) -> None:
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="os-fastapi-file-log", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self._drain()
+            except Exception as e:
+                # Never let the writer thread die: later records would pile up unwritten
+                self._report_error(e)
+
+    def _drain(self) -> None:
+        with self._write_lock:
+            records = []
+            try:
+                # log() may drop the oldest record concurrently: pop until empty, not len() times
+                while True:
+                    try:
+                        records.append(self._queue.popleft())
+                    except IndexError:
+                        break
+                self._open()
+                if records:
+                    self._write_records(records)
+                elif self._size and self._rollover_due(0):
+                    # Close a time-based segment even when no new traffic arrives
+                    self._rotate()
+            except Exception as e:
+                self._report_error(e)
+
+    def _encode(self, records: List[Any]) -> List[Union[bytes, Exception]]:
+        dicts = []
+        for record in records:
+            try:
+                dicts.append(record_to_dict(record))
+            except Exception as e:
+                dicts.append(e)
+        valid = [d for d in dicts if not isinstance(d, Exception)]
+        if self.executor is None:
+            encoded = encode_lines(self.serializer, valid)
+        else:
+            try:
+                encoded = self.executor.submit(encode_lines, self.serializer, valid).result()
+            except Exception as e:
+                # e.g. a serializer that cannot be pickled: the whole block fails
+                encoded = [e] * len(valid)
+        lines = iter(encoded)
+        return [d if isinstance(d, Exception) else next(lines) for d in dicts]
+
+    def _write_records(self, records: List[Any]) -> None:
+        buffer = bytearray()
+        lines = 0
+        for line in self._encode(records):
+            if isinstance(line, Exception):
+                self._failed += 1
+                self._report_error(line)
+                continue
+            if buffer and self._rollover_due(len(buffer) + len(line) + 1):
+                self._write(buffer, lines)
+                buffer.clear()
+                lines = 0
+                self._rotate()
+            elif not buffer and self._size and self._rollover_due(len(line) + 1):
+                self._rotate()
+            buffer += line
+            buffer += b"\n"
+            lines += 1
+        if buffer:
+            self._write(buffer, lines)
+
+    def _write(self, buffer: bytearray, lines: int) -> None:
+        try:
+            self._file.write(buffer)
+            self._file.flush()
+        except Exception:
+            self._failed += lines
+            raise
+        self._size += len(buffer)
+        self._bytes_written += len(buffer)
+        self._written += lines
+
+    def _rollover_due(self, pending: int) -> bool:
+        if self._rollover_at is not None and time.time() >= self._rollover_at:
+            return True
+        return self.max_bytes is not None and self._size + pending > self.max_bytes
+
+    def _open(self) -> None:
+        if self._file is not None:
+            return
+        if self._directory:
+            os.makedirs(self._directory, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._rollover_at = time.time() + self.rotate_interval if self.rotate_interval else None
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        target = os.path.join(self._directory, f"{self._stem}.{stamp}{self._suffix}")
+        n = 0
+        while os.path.exists(target) or os.path.exists(target + ".gz"):
+            n += 1
+            target = os.path.join(self._directory, f"{self._stem}.{stamp}-{n}{self._suffix}")
+        os.replace(self.path, target)
+        self._rotations += 1
+        self._open()
+        if self.compress:
+            if self.executor is None:
+                compress_segment(target)
+            else:
+                self.executor.submit(compress_segment, target).result()
+        self._prune()
+
+    def _prune(self) -> None:
+        if self.backup_count is None:
+            return
+        segments = self._segment_names()
+        for name in segments[:max(len(segments) - self.backup_count, 0)]:
+            try:
+                os.remove(os.path.join(self._directory, name))
+            except OSError as e:
+                self._report_error(e)
+
+    def _report_error(self, error: Exception) -> None:
+        if self.on_error:
+            try:
+                self.on_error(error)
+            except Exception:
+                pass
+
+    def _segment_names(self) -> List[str]:
+        """Names of the rotated segments, oldest first."""
+        # Sort on (timestamp, collision number): "-1" would sort before the "." of the first name
+        segments = []
+        for name in os.listdir(self._directory):
+            match = self._segment_re.match(name)
+            if match:
+                segments.append((match.group(1), int(match.group(2) or 0), name))
+        return [name for _, _, name in sorted(segments)]
+
+    def segments(self) -> List[str]:
+        """Paths of the rotated segments still on disk, oldest first."""
+        if not os.path.isdir(self._directory):
+            return []
+        return [os.path.join(self._directory, name) for name in self._segment_names()]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Writer counters.
+
+        Returns:
+            Dict with `queued` (waiting now) and the `enqueued`, `dropped`,
+            `written`, `failed`, `bytes_written` and `rotations` totals
+        """
+        return {
+            "queued": len(self._queue),
+            "enqueued": self._enqueued,
+            "dropped": self._dropped,
+            "written": self._written,
+            "failed": self._failed,
+            "bytes_written": self._bytes_written,
+            "rotations": self._rotations,
+        }
@@ -0,0 +1,108 @@
+import os
+import time
+from typing import List, Optional
+
+from .base import BaseIPWhitelistProvider
+from ..iprange import IPRangeIndex
+
+
+class MMapIPWhitelistProvider(BaseIPWhitelistProvider):
+    """IP whitelist backed by a compiled, memory-mapped range index file.
+
+    Build the file offline with `os-fastapi-compile-ip-ranges` (see
+    os_fastapi_middleware.iprange). Opening is O(1) and lookups binary-search
+    the mapped file, so the list size does not affect startup or per-worker
+    memory.
+
+    Reloading is a file swap: write the new index next to the old one and
+    rename it over the path. The provider re-stats the path at most every
+    `check_interval` seconds and maps the new file when it changed.
+    """
+
+    def __init__(self, path: str, check_interval: Optional[float] = 5.0):
+        """
+        Args:
+            path: Path to a compiled IP range index file
+            check_interval: Seconds between checks for a swapped file; None disables auto reload
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._index = IPRangeIndex(path)
+        self._next_check = time.monotonic() + (check_interval or 0)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Map the file again if it was replaced since it was opened.
+
+        Args:
+            force: Reload even if the file looks unchanged
+
+        Returns:
+            True if a new index was mapped
+        """
+        if not force:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                # Keep serving the current index while the file is missing
+                return False
+            identity = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if identity == self._index.identity:
+                return False
+
+        # Lookups already running (e.g. on a worker thread) may still hold the old
+        # index: it is unmapped when the last reference to it goes away
+        self._index = IPRangeIndex(self.path)
+        return True
+
+    def _maybe_reload(self) -> None:
+        if self.check_interval is None:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            self.reload()
+        except (OSError, ValueError):
+            # A half-written or invalid file must not take the provider down
+            pass
+
+    def contains(self, ip: str) -> bool:
+        self._maybe_reload()
+        return ip in self._index
+
+    def is_ip_allowed_sync(self, ip: str) -> bool:
+        return self.contains(ip)
+
+    async def is_ip_allowed(self, ip: str) -> bool:
+        return self.contains(ip)
+
+    async def get_allowed_ips(self) -> List[str]:
+        """Return every range as "start-end" (expensive for large files; debugging only)."""
+        return [f"{start}-{end}" for start, end in self._index.iter_ranges()]
+
+    def close(self) -> None:
+        self._index.close()
+
+
+class MMapIPDenylistProvider(MMapIPWhitelistProvider):
+    """Denylist counterpart of MMapIPWhitelistProvider.
+
+    IPs found in the index are rejected and every other IP is allowed, so it
+    can be passed to IPWhitelistMiddleware/IPWhitelistDependency to block
+    threat-intel feeds.
+    """
+
+    def is_ip_allowed_sync(self, ip: str) -> bool:
+        return not self.contains(ip)
+
+    async def is_ip_allowed(self, ip: str) -> bool:
+        return not self.contains(ip)
+
+    async def get_allowed_ips(self) -> List[str]:
+        return []
+
+    async def get_denied_ips(self) -> List[str]:
+        """Return every denied range as "start-end" (debugging only)."""
+        return await super().get_allowed_ips()
@@ -1,6 +1,7 @@
 from typing import Dict, List
 import time
 from .base import BaseAPIKeyProvider, BaseRateLimitProvider, BaseIPWhitelistProvider
+from ..utils import IPNetworkMatcher
 
 
 class InMemoryAPIKeyProvider(BaseAPIKeyProvider):
@@ -15,22 +16,28 @@ class InMemoryAPIKeyProvider(BaseAPIKeyProvider):
         # Create reverse index for fast lookup: api_key -> account_id
         self._key_to_account = {api_key: account_id for account_id, api_key in valid_keys.items()}
     
-    async def validate_key(self, api_key: str) -> bool:
+    def validate_key_sync(self, api_key: str) -> bool:
         return api_key in self._key_to_account
-    
-    async def get_key_metadata(self, api_key: str) -> dict:
+
+    def get_key_metadata_sync(self, api_key: str) -> dict:
         account_id = self._key_to_account.get(api_key)
         if account_id:
             return {"account_id": account_id}
         return None
 
+    async def validate_key(self, api_key: str) -> bool:
+        return self.validate_key_sync(api_key)
+    
+    async def get_key_metadata(self, api_key: str) -> dict:
+        return self.get_key_metadata_sync(api_key)
+
 
 class InMemoryRateLimitProvider(BaseRateLimitProvider):
     
     def __init__(self):
         self.storage: Dict[str, List[float]] = {}
     
-    async def check_rate_limit(
+    def check_rate_limit_sync(
         self, 
         key: str, 
         limit: int, 
@@ -52,7 +59,7 @@ class InMemoryRateLimitProvider(BaseRateLimitProvider):
         self.storage[key].append(current_time)
         return True
     
-    async def get_remaining_requests(
+    def get_remaining_requests_sync(
         self, 
         key: str, 
         limit: int, 
@@ -69,14 +76,34 @@ class InMemoryRateLimitProvider(BaseRateLimitProvider):
         
         return max(0, limit - len(valid_requests))
 
+    async def check_rate_limit(self, key: str, limit: int, window_seconds: int) -> bool:
+        return self.check_rate_limit_sync(key, limit, window_seconds)
+
+    async def get_remaining_requests(self, key: str, limit: int, window_seconds: int) -> int:
+        return self.get_remaining_requests_sync(key, limit, window_seconds)
+
 
 class InMemoryIPWhitelistProvider(BaseIPWhitelistProvider):
     
     def __init__(self, allowed_ips: List[str]):
+        """
+        Args:
+            allowed_ips: IP addresses and/or CIDR networks (e.g. "10.0.0.0/8")
+        """
+        self.allowed_ips = set(allowed_ips)
+        self._matcher = IPNetworkMatcher(self.allowed_ips)
+
+    def set_allowed_ips(self, allowed_ips: List[str]) -> None:
+        """Replace the allowed list; the new matcher is swapped in atomically."""
+        matcher = IPNetworkMatcher(allowed_ips)
         self.allowed_ips = set(allowed_ips)
+        self._matcher = matcher
     
+    def is_ip_allowed_sync(self, ip: str) -> bool:
+        return ip in self._matcher
+
     async def is_ip_allowed(self, ip: str) -> bool:
-        return ip in self.allowed_ips
+        return self.is_ip_allowed_sync(ip)
     
     async def get_allowed_ips(self) -> List[str]:
         return list(self.allowed_ips)
\ No newline at end of file
@@ -2,6 +2,19 @@ from typing import Optional, Dict, Any
 from .base import BaseRateLimitProvider, BaseAPIKeyProvider
 
 
+async def close_client(client: Any) -> None:
+    """Close an async Redis-like client (aclose, or close on older clients)."""
+    close_fn = getattr(client, "aclose", None)
+    if callable(close_fn):
+        await close_fn()
+        return
+    close_fn = getattr(client, "close", None)
+    if callable(close_fn):
+        result = close_fn()
+        if hasattr(result, "__await__"):
+            await result
+
+
 class RedisRateLimitProvider(BaseRateLimitProvider):
     """Rate limit provider that uses an injected async Redis-like client.
 
@@ -13,25 +26,19 @@ class RedisRateLimitProvider(BaseRateLimitProvider):
     underlying Redis client that has incr/expire.
     """
 
-    def __init__(self, redis_client: Any):
+    def __init__(self, redis_client: Any, owns_client: bool = True):
+        """
+        Args:
+            redis_client: An async Redis-compatible client instance (e.g., redis.asyncio.Redis).
+            owns_client: If false, close() leaves the client open (it is shared, see RedisConnectionManager)
+        """
         self.redis_client = redis_client
+        self.owns_client = owns_client
     
     async def close(self):
         client = getattr(self, "redis_client", None)
-        if client:
-            # Try graceful async close if available
-            close_fn = getattr(client, "aclose", None)
-            if callable(close_fn):
-                await close_fn()
-                return
-            # Fallback for older/other clients
-            close_fn = getattr(client, "close", None)
-            if callable(close_fn):
-                try:
-                    await close_fn()
-                except TypeError:
-                    # non-async close
-                    close_fn()
+        if client and self.owns_client:
+            await close_client(client)
     
     async def check_rate_limit(
         self, 
@@ -89,31 +96,21 @@ class RedisAPIKeyProvider(BaseAPIKeyProvider):
     optionally aclose/close for cleanup.
     """
     
-    def __init__(self, redis_client: Any, key_prefix: str = "apikey:"):
+    def __init__(self, redis_client: Any, key_prefix: str = "apikey:", owns_client: bool = True):
         """
         Args:
             redis_client: An async Redis-compatible client instance (e.g., redis.asyncio.Redis).
             key_prefix: Prefix for Redis keys to store account_id -> api_key mappings
+            owns_client: If false, close() leaves the client open (it is shared, see RedisConnectionManager)
         """
         self.redis_client = redis_client
         self.key_prefix = key_prefix
+        self.owns_client = owns_client
     
     async def close(self):
         client = getattr(self, "redis_client", None)
-        if client:
-            try:
-                close_fn = getattr(client, "aclose")
-                if callable(close_fn):
-                    await close_fn()
-                    return
-            except Exception:
-                pass
-            close_fn = getattr(client, "close", None)
-            if callable(close_fn):
-                try:
-                    await close_fn()
-                except TypeError:
-                    close_fn()
+        if client and self.owns_client:
+            await close_client(client)
     
     async def validate_key(self, api_key: str) -> bool:
         """
@@ -0,0 +1,182 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from ..config import RedisConfig
+from .redis import RedisAPIKeyProvider, RedisRateLimitProvider, close_client
+
+
+def _redis_client(config: RedisConfig) -> Any:
+    """Default client factory: redis.asyncio.Redis on a blocking, sized pool."""
+    try:
+        from redis.asyncio import BlockingConnectionPool, Redis
+    except ImportError as e:
+        raise ImportError(
+            "RedisConnectionManager needs the redis package (pip install os-fastapi-middleware[redis])"
+        ) from e
+
+    pool = BlockingConnectionPool.from_url(
+        config.url,
+        max_connections=config.max_connections,
+        timeout=config.pool_timeout,
+        socket_timeout=config.socket_timeout,
+        socket_connect_timeout=config.socket_connect_timeout,
+        health_check_interval=config.health_check_interval,
+        decode_responses=True,
+    )
+    return Redis(connection_pool=pool)
+
+
+class RedisConnectionManager:
+    """
+    One connection pool shared by every Redis-backed provider, tied to the app lifespan.
+
+    Providers built here share a single client, so the number of
+    connections per process is bounded by `max_connections` however many
+    providers there are. When the pool is exhausted, a call waits up to
+    `pool_timeout` seconds for a connection and then fails like any other
+    provider error. Providers do not close the shared client themselves:
+    `aclose()` does, once, on lifespan shutdown, so nothing leaks across
+    reloads.
+
+    `start()` opens `warm_connections` connections up front, so the first
+    requests do not pay for the TCP/TLS handshake. A Redis that is down at
+    startup does not stop the app from starting: the error is kept in
+    `stats()` and connections are opened on demand later, where the
+    middlewares apply their fail-open/fail-closed policy.
+
+    Usage example:
+        redis = RedisConnectionManager.from_url("redis://localhost:6379/0", max_connections=50)
+        app = FastAPI(lifespan=redis.lifespan)
+        app.add_middleware(RateLimitASGIMiddleware, provider=redis.rate_limit_provider())
+        app.add_middleware(APIKeyASGIMiddleware, provider=redis.api_key_provider())
+
+    Pass `client_factory` to build the client yourself (e.g. a FakeRedis in
+    tests, or a cluster client); it is called once with the config.
+    """
+
+    def __init__(
+        self,
+        config: Optional[RedisConfig] = None,
+        client_factory: Optional[Callable[[RedisConfig], Any]] = None,
+    ):
+        """
+        Args:
+            config: Connection and pool settings (defaults to RedisConfig())
+            client_factory: Builds the shared async client from the config
+                (default: redis.asyncio.Redis on a BlockingConnectionPool)
+        """
+        self.config = config or RedisConfig()
+        self._client_factory = client_factory or _redis_client
+        self._client: Any = None
+        self._providers = 0
+        self._started = False
+        self._warmed = 0
+        self._last_error: Optional[str] = None
+
+    @classmethod
+    def from_url(
+        cls,
+        url: str,
+        client_factory: Optional[Callable[[RedisConfig], Any]] = None,
+        **options: Any,
+    ) -> "RedisConnectionManager":
+        """
+        Args:
+            url: Redis URL (redis://, rediss:// or unix://)
+            client_factory: See __init__
+            **options: Other RedisConfig fields (max_connections, warm_connections, ...)
+        """
+        return cls(RedisConfig(url=url, **options), client_factory=client_factory)
+
+    @property
+    def client(self) -> Any:
+        """The shared client, created on first access."""
+        if self._client is None:
+            self._client = self._client_factory(self.config)
+        return self._client
+
+    def rate_limit_provider(self) -> RedisRateLimitProvider:
+        """RedisRateLimitProvider on the shared pool."""
+        self._providers += 1
+        return RedisRateLimitProvider(self.client, owns_client=False)
+
+    def api_key_provider(self, key_prefix: str = "apikey:") -> RedisAPIKeyProvider:
+        """RedisAPIKeyProvider on the shared pool."""
+        self._providers += 1
+        return RedisAPIKeyProvider(self.client, key_prefix=key_prefix, owns_client=False)
+
+    async def start(self) -> None:
+        """Open `warm_connections` connections (concurrent PINGs each hold one)."""
+        client = self.client
+        self._started = True
+        count = min(self.config.warm_connections, self.config.max_connections)
+        if not count:
+            return
+        results = await asyncio.gather(*(client.ping() for _ in range(count)), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        self._warmed = count - len(errors)
+        if errors:
+            self._last_error = repr(errors[0])
+
+    async def aclose(self) -> None:
+        """Close the shared client and disconnect every pooled connection."""
+        client = self._client
+        self._started = False
+        if client is None:
+            return
+        await close_client(client)
+        # A client created on an explicit pool leaves the pool open on close
+        pool = getattr(client, "connection_pool", None)
+        disconnect = getattr(pool, "disconnect", None)
+        if callable(disconnect):
+            await disconnect()
+
+    @asynccontextmanager
+    async def lifespan(self, app: Any = None) -> AsyncIterator[None]:
+        """Lifespan context: pass it as `FastAPI(lifespan=manager.lifespan)`."""
+        await self.start()
+        try:
+            yield
+        finally:
+            await self.aclose()
+
+    def install(self, app: Any) -> None:
+        """Wrap the app's existing lifespan, for apps that already define one."""
+        router = getattr(app, "router", app)
+        inner = router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app_: Any) -> AsyncIterator[Any]:
+            async with self.lifespan(app_):
+                async with inner(app_) as state:
+                    yield state
+
+        router.lifespan_context = lifespan
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool usage.
+
+        Returns:
+            Dict with `max_connections`, the `created`, `in_use` and `idle`
+            connections of the pool (None when the client exposes no
+            redis-py pool), `warmed` connections at startup, the number of
+            `providers` sharing the pool, `started` and `last_error`
+        """
+        # redis-py asyncio pools keep the idle and checked-out connections apart
+        pool = getattr(self._client, "connection_pool", None)
+        in_use = getattr(pool, "_in_use_connections", None)
+        available = getattr(pool, "_available_connections", None)
+        in_use = len(in_use) if in_use is not None else None
+        idle = len(available) if available is not None else None
+        return {
+            "max_connections": self.config.max_connections,
+            "created": in_use + idle if in_use is not None and idle is not None else None,
+            "in_use": in_use,
+            "idle": idle,
+            "warmed": self._warmed,
+            "providers": self._providers,
+            "started": self._started,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,193 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .base import BaseAPIKeyProvider, BaseRateLimitProvider, BaseIPWhitelistProvider
+
+
+class ProviderSaturatedError(RuntimeError):
+    """Raised when a BlockingProviderExecutor has no free worker or queue slot."""
+
+
+class ProviderTimeoutError(TimeoutError):
+    """Raised when a blocking provider call does not finish within the timeout."""
+
+
+class BlockingProviderExecutor:
+    """
+    Bounded thread pool for blocking provider calls.
+
+    At most `max_workers` calls run at the same time and at most `max_queue`
+    more wait for a worker. Calls beyond that fail immediately with
+    ProviderSaturatedError instead of piling up, so a slow database cannot
+    stall the event loop or grow an unbounded backlog. The middlewares treat
+    these errors like any other provider error.
+
+    A timed-out call still occupies its worker until the blocking function
+    returns (threads cannot be interrupted), and keeps counting against the
+    limits until then. Queued calls that time out are cancelled before they
+    start.
+
+    Usage example:
+        executor = BlockingProviderExecutor(max_workers=8, max_queue=32, timeout=2.0)
+        provider = ThreadedAPIKeyProvider(MyBlockingKeyStore(), executor=executor)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        timeout: Optional[float] = 5.0,
+        thread_name_prefix: str = "os-fastapi-provider",
+    ):
+        """
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Calls allowed to wait for a worker once all are busy
+            timeout: Seconds to wait for a call; None waits forever
+            thread_name_prefix: Name prefix of the worker threads
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._active = 0
+        self._peak_in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._errors = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    def _run(self, func: Callable, args: tuple) -> Any:
+        with self._lock:
+            self._active += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self._errors += 1
+            else:
+                self._completed += 1
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run `func(*args)` on a worker thread and wait for its result.
+
+        Raises:
+            ProviderSaturatedError: All workers and queue slots are taken
+            ProviderTimeoutError: The call did not finish within the timeout
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ProviderSaturatedError(
+                    f"Provider pool saturated ({self.max_workers} workers, {self.max_queue} queued)"
+                )
+            self._in_flight += 1
+            self._submitted += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+        try:
+            future = self._executor.submit(self._run, func, args)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise ProviderTimeoutError(f"Provider call timed out after {self.timeout}s") from None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Saturation metrics.
+
+        Returns:
+            Dict with the pool limits, current `in_flight`/`active`/`queued`
+            calls, `peak_in_flight` and the `submitted`, `completed`,
+            `errors`, `rejected` and `timeouts` counters
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "active": self._active,
+                "queued": max(0, self._in_flight - self._active),
+                "peak_in_flight": self._peak_in_flight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "errors": self._errors,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads (e.g. on application shutdown)."""
+        self._executor.shutdown(wait=wait)
+
+
+class _ThreadedProvider:
+
+    def __init__(self, provider: Any, executor: Optional[BlockingProviderExecutor] = None, **executor_options):
+        """
+        Args:
+            provider: Object with the same methods as the base provider, but plain (blocking) functions
+            executor: Pool to run the calls on; shared pools bound the total across providers
+            **executor_options: BlockingProviderExecutor options used when no executor is given
+        """
+        self.provider = provider
+        self.executor = executor or BlockingProviderExecutor(**executor_options)
+
+    def stats(self) -> Dict[str, int]:
+        return self.executor.stats()
+
+
+class ThreadedAPIKeyProvider(_ThreadedProvider, BaseAPIKeyProvider):
+    """Runs a blocking API key provider (`validate_key`, `get_key_metadata`) in a bounded thread pool."""
+
+    async def validate_key(self, api_key: str) -> bool:
+        return await self.executor.run(self.provider.validate_key, api_key)
+
+    async def get_key_metadata(self, api_key: str) -> Optional[dict]:
+        return await self.executor.run(self.provider.get_key_metadata, api_key)
+
+
+class ThreadedIPWhitelistProvider(_ThreadedProvider, BaseIPWhitelistProvider):
+    """Runs a blocking IP whitelist provider (`is_ip_allowed`, `get_allowed_ips`) in a bounded thread pool."""
+
+    async def is_ip_allowed(self, ip: str) -> bool:
+        return await self.executor.run(self.provider.is_ip_allowed, ip)
+
+    async def get_allowed_ips(self) -> List[str]:
+        return await self.executor.run(self.provider.get_allowed_ips)
+
+
+class ThreadedRateLimitProvider(_ThreadedProvider, BaseRateLimitProvider):
+    """Runs a blocking rate limit provider (`check_rate_limit`, `get_remaining_requests`) in a bounded thread pool."""
+
+    async def check_rate_limit(self, key: str, limit: int, window_seconds: int) -> bool:
+        return await self.executor.run(self.provider.check_rate_limit, key, limit, window_seconds)
+
+    async def get_remaining_requests(self, key: str, limit: int, window_seconds: int) -> int:
+        return await self.executor.run(self.provider.get_remaining_requests, key, limit, window_seconds)
@@ -0,0 +1,177 @@
+"""Compact request log records, converted to dicts only when shipped."""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+
+def _header(headers: Iterable[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    # Same lookup as starlette's Headers.get(), without building a Headers object
+    for key, value in headers:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestLogRecord:
+    """
+    One logged request, as captured by RequestLoggingMiddleware.
+
+    Holds raw values only: epoch-ns start time, perf_counter_ns durations,
+    the ASGI header list and body bytes. Nothing is decoded, formatted or
+    copied on the request path; `to_dict()` builds the usual JSON-ready
+    record (see BaseRequestLogProvider.log) when the record is shipped.
+
+    Providers that set `accepts_compact_records = True` receive these
+    objects instead of dicts, and convert them (or read the attributes
+    directly, like AggregatingRequestLogProvider) off the request path.
+    """
+
+    __slots__ = (
+        "started_ns",
+        "duration_ns",
+        "ttfb_ns",
+        "method",
+        "path",
+        "route",
+        "query_string",
+        "raw_headers",
+        "client",
+        "request_id",
+        "status_code",
+        "response_length",
+        "security_timings",
+        "request_body",
+        "response_body",
+        "sample_weight",
+        "include_headers",
+        "extra_fields",
+    )
+
+    def __init__(
+        self,
+        started_ns: int,
+        duration_ns: int,
+        ttfb_ns: Optional[int],
+        method: str,
+        path: str,
+        route: Optional[str],
+        query_string: bytes,
+        raw_headers: Iterable[Tuple[bytes, bytes]],
+        client: Optional[Tuple[str, int]],
+        request_id: Optional[str],
+        status_code: int,
+        response_length: Optional[int],
+        security_timings: Optional[Dict[str, int]] = None,
+        request_body: Optional[bytes] = None,
+        response_body: Optional[bytes] = None,
+        sample_weight: float = 1.0,
+        include_headers: bool = True,
+        extra_fields: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            started_ns: Request start, in nanoseconds since the epoch (time.time_ns())
+            duration_ns: Request duration in nanoseconds
+            ttfb_ns: Nanoseconds until the response started, None if it never did
+            method, path, route: Request method, path and matched route template
+            query_string: Raw query string from the ASGI scope
+            raw_headers: Raw header list from the ASGI scope (not copied)
+            client: (host, port) from the ASGI scope
+            request_id: Request id set on request.state, if any
+            status_code: Response status code
+            response_length: Body bytes sent, None if no response started
+            security_timings: SecurityContext.timings (nanoseconds per stage)
+            request_body, response_body: Captured body bytes, if enabled
+            sample_weight: Weight given by the middleware's sampler
+            include_headers: If true, to_dict() adds the header subset
+            extra_fields: Static fields merged into to_dict() (shared, not copied)
+        """
+        self.started_ns = started_ns
+        self.duration_ns = duration_ns
+        self.ttfb_ns = ttfb_ns
+        self.method = method
+        self.path = path
+        self.route = route
+        self.query_string = query_string
+        self.raw_headers = raw_headers
+        self.client = client
+        self.request_id = request_id
+        self.status_code = status_code
+        self.response_length = response_length
+        self.security_timings = security_timings
+        self.request_body = request_body
+        self.response_body = response_body
+        self.sample_weight = sample_weight
+        self.include_headers = include_headers
+        self.extra_fields = extra_fields
+
+    def header(self, name: str) -> Optional[str]:
+        """First value of a request header (name in lower case)."""
+        return _header(self.raw_headers, name.encode("latin-1"))
+
+    @property
+    def client_ip(self) -> str:
+        forwarded_for = self.header("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+        real_ip = self.header("x-real-ip")
+        if real_ip:
+            return real_ip.strip()
+        return self.client[0] if self.client else "unknown"
+
+    @property
+    def timestamp(self) -> datetime:
+        """Request start as an aware UTC datetime (microsecond precision)."""
+        seconds, ns = divmod(self.started_ns, 1_000_000_000)
+        return datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=ns // 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The JSON-serializable record documented in BaseRequestLogProvider.log()."""
+        duration_us = self.duration_ns // 1000
+        content_length = self.header("content-length")
+        try:
+            content_length = int(content_length) if content_length is not None else None
+        except ValueError:
+            content_length = None
+        timings = self.security_timings
+
+        record = {
+            "timestamp": self.timestamp.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "query": self.query_string.decode("latin-1"),
+            "client_ip": self.client_ip,
+            "user_agent": self.header("user-agent"),
+            "request_id": self.request_id,
+            "status_code": self.status_code,
+            "duration_ms": duration_us // 1000,
+            "duration_us": duration_us,
+            "ttfb_ms": self.ttfb_ns // 1_000_000 if self.ttfb_ns is not None else None,
+            "content_length": content_length,
+            "response_length": self.response_length,
+            "security_timings": {
+                stage: round(elapsed / 1_000_000, 3) for stage, elapsed in timings.items()
+            } if timings else None,
+            "headers": {
+                "referer": self.header("referer"),
+                "host": self.header("host"),
+                "forwarded_for": self.header("x-forwarded-for"),
+                "real_ip": self.header("x-real-ip"),
+            } if self.include_headers else None,
+            "request_body": _decode(self.request_body),
+            "response_body": _decode(self.response_body),
+        }
+        if self.extra_fields:
+            record.update(self.extra_fields)
+        record["sample_weight"] = self.sample_weight
+        return record
+
+
+def _decode(body: Optional[bytes]) -> Optional[str]:
+    return body.decode(errors="replace") if body else None
+
+
+def record_to_dict(record: Union[RequestLogRecord, Dict[str, Any]]) -> Dict[str, Any]:
+    """Return `record` as a dict, converting a RequestLogRecord."""
+    return record.to_dict() if isinstance(record, RequestLogRecord) else record
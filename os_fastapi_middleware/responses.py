@@ -0,0 +1,199 @@
+"""Pre-encoded responses for the rejection (401/403/429/500) hot path."""
+
+import html
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode content exactly like starlette's JSONResponse."""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _escape_json_string(value: Any) -> bytes:
+    text = str(value)
+    if text.isascii() and text.isprintable() and '"' not in text and "\\" not in text:
+        return text.encode("utf-8")
+    return json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8")
+
+
+def _escape_markup(value: Any) -> bytes:
+    return html.escape(str(value), quote=True).encode("utf-8")
+
+
+def _escape_none(value: Any) -> bytes:
+    return str(value).encode("utf-8")
+
+
+def _escaper(media_type: str) -> Callable[[Any], bytes]:
+    """Placeholder escaping for a body of this media type."""
+    kind = media_type.split(";", 1)[0].strip().lower()
+    if kind == "application/json" or kind.endswith("+json"):
+        return _escape_json_string
+    if kind in ("text/html", "application/xhtml+xml") or kind.endswith("/xml") or kind.endswith("+xml"):
+        return _escape_markup
+    return _escape_none
+
+
+class PreEncodedResponse:
+    """
+    ASGI response whose status, headers and body are already encoded.
+
+    Sending it is two `send` calls with no serialisation. It can be returned
+    from a BaseHTTPMiddleware dispatch or called directly as an ASGI app.
+    """
+
+    __slots__ = ("status_code", "body", "raw_headers")
+
+    def __init__(self, status_code: int, body: bytes, raw_headers: List[Tuple[bytes, bytes]]):
+        self.status_code = status_code
+        self.body = body
+        self.raw_headers = raw_headers
+
+    @property
+    def headers(self) -> Headers:
+        return Headers(raw=self.raw_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Copy the header list: outer middlewares may append to it in place
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": list(self.raw_headers),
+        })
+        await send({"type": "http.response.body", "body": self.body})
+
+
+# What the checks return: a pre-encoded rejection, or the Response built by an on_error callback
+AnyResponse = Union[Response, PreEncodedResponse]
+
+
+class RejectionTemplate:
+    """
+    Rejection response encoded once and rendered per request.
+
+    `content` is JSON-encoded at construction time. String values may hold
+    `{name}` placeholders; the encoded body is split around them, so
+    rendering only escapes and joins the variable parts. Templates without
+    placeholders render the same cached response every time.
+
+    Placeholder values such as `{ip}` come from the client, so they are
+    escaped for the body's media type: JSON string escaping for JSON,
+    HTML escaping for HTML and XML. Other str/bytes bodies (e.g.
+    text/plain) get the values as is.
+
+    Usage example:
+        RejectionTemplate(403, {"error": "forbidden", "ip": "{ip}"})
+    """
+
+    __slots__ = ("status_code", "_literals", "_names", "_headers", "_headers_tail", "_escape", "_static")
+
+    def __init__(
+        self,
+        status_code: int,
+        content: Any,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: str = "application/json",
+    ):
+        """
+        Args:
+            status_code: HTTP status code
+            content: JSON-serializable content, or a str/bytes body used as is
+            headers: Extra response headers
+            media_type: Content type of the body
+        """
+        self.status_code = status_code
+        self._escape = _escaper(media_type) if isinstance(content, (str, bytes)) else _escape_json_string
+        if isinstance(content, bytes):
+            body = content.decode("utf-8")
+        elif isinstance(content, str):
+            body = content
+        else:
+            body = encode_json(content).decode("utf-8")
+
+        parts = _PLACEHOLDER.split(body)
+        self._literals = [part.encode("utf-8") for part in parts[0::2]]
+        self._names = parts[1::2]
+
+        # Same header order as starlette's Response: extra headers, length, type
+        self._headers = [
+            (key.lower().encode("latin-1"), value.encode("latin-1"))
+            for key, value in (headers or {}).items()
+        ]
+        content_type = media_type
+        if media_type.startswith("text/") and "charset=" not in media_type.lower():
+            content_type += "; charset=utf-8"
+        self._static: Optional[PreEncodedResponse] = None
+        self._headers_tail = [(b"content-type", content_type.encode("latin-1"))]
+        if not self._names:
+            self._static = self._build(self._literals[0])
+
+    def _build(self, body: bytes) -> PreEncodedResponse:
+        raw_headers = self._headers + [(b"content-length", str(len(body)).encode("latin-1"))] + self._headers_tail
+        return PreEncodedResponse(self.status_code, body, raw_headers)
+
+    def render(self, **values: Any) -> PreEncodedResponse:
+        """
+        Render the response, splicing in placeholder values.
+
+        Unknown placeholders are kept verbatim.
+        """
+        if self._static is not None:
+            return self._static
+
+        literals = self._literals
+        chunks = [literals[0]]
+        for index, name in enumerate(self._names):
+            if name in values:
+                value = values[name]
+                chunks.append(self._escape(value))
+            else:
+                chunks.append(b"{" + name.encode("utf-8") + b"}")
+            chunks.append(literals[index + 1])
+        return self._build(b"".join(chunks))
+
+
+def api_key_rejections(header_name: str) -> Dict[str, RejectionTemplate]:
+    """Default rejections of the API key check."""
+    return {
+        "missing_key": RejectionTemplate(401, {"detail": f"API key required in '{header_name}' header"}),
+        "invalid_key": RejectionTemplate(403, {"detail": "Invalid API key"}),
+        "error": RejectionTemplate(500, {"detail": "Error validating API key"}),
+    }
+
+
+def ip_whitelist_rejections() -> Dict[str, RejectionTemplate]:
+    """Default rejections of the IP whitelist check ({ip} is the client IP)."""
+    return {
+        "unknown_ip": RejectionTemplate(403, {"detail": "Could not determine client IP"}),
+        "ip_not_allowed": RejectionTemplate(403, {"detail": "IP {ip} is not whitelisted"}),
+        "error": RejectionTemplate(500, {"detail": "Error checking IP whitelist"}),
+    }
+
+
+def rate_limit_rejections(requests_per_window: int, window_seconds: int) -> Dict[str, RejectionTemplate]:
+    """Default rejections of the rate limit check."""
+    return {
+        "rate_limited": RejectionTemplate(
+            429,
+            {
+                "detail": f"Rate limit exceeded. Maximum {requests_per_window} "
+                          f"requests per {window_seconds} seconds.",
+                "retry_after": window_seconds,
+            },
+            headers={"Retry-After": str(window_seconds)},
+        ),
+    }
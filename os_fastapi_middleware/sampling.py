@@ -0,0 +1,128 @@
+"""Sampling policies for RequestLoggingMiddleware."""
+
+import random
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from os_fastapi_middleware.paths import PathMatcher
+
+
+def _check_rate(rate: float) -> float:
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"Sampling rate must be between 0 and 1, got {rate}")
+    return rate
+
+
+class BaseLogSampler(ABC):
+    """
+    Decides whether a finished request is logged.
+
+    The decision is made before the log record is built, so dropped
+    requests cost almost nothing. A kept request carries its sampling
+    weight (1 / probability of being kept) in the record's `sample_weight`
+    field; summing the weights estimates the real request count.
+    """
+
+    @abstractmethod
+    def sample(self, path: str, status_code: int, duration_ms: float) -> Optional[float]:
+        """
+        Args:
+            path: Request path
+            status_code: Response status code
+            duration_ms: Request duration in milliseconds
+
+        Returns:
+            Sampling weight of the record, or None to skip logging it
+        """
+        pass
+
+
+class FixedRateSampler(BaseLogSampler):
+    """Keeps a fixed fraction of requests (e.g. rate=0.1 logs about 1 in 10)."""
+
+    def __init__(self, rate: float, rng: Optional[random.Random] = None):
+        """
+        Args:
+            rate: Probability of logging a request, between 0 and 1
+            rng: Random generator (defaults to the `random` module)
+        """
+        self.rate = _check_rate(rate)
+        self._random = (rng or random).random
+
+    def sample(self, path: str, status_code: int, duration_ms: float) -> Optional[float]:
+        if self.rate >= 1.0:
+            return 1.0
+        if self.rate > 0.0 and self._random() < self.rate:
+            return 1.0 / self.rate
+        return None
+
+
+class PathRateSampler(BaseLogSampler):
+    """
+    Keeps a different fraction of requests per path.
+
+    Rules use the exempt path syntax (exact, "/prefix/**", globs, "re:"
+    regexes) and are tried in order; the first match wins.
+
+    Usage example:
+        PathRateSampler({"/health": 0.0, "/api/search/**": 0.05}, default_rate=0.5)
+    """
+
+    def __init__(
+        self,
+        rates: Dict[str, float],
+        default_rate: float = 1.0,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Args:
+            rates: Path rule -> probability of logging a matching request
+            default_rate: Probability for paths matching no rule
+            rng: Random generator (defaults to the `random` module)
+        """
+        self._rules: List[Tuple[PathMatcher, FixedRateSampler]] = [
+            (PathMatcher([rule]), FixedRateSampler(rate, rng)) for rule, rate in rates.items()
+        ]
+        self._default = FixedRateSampler(default_rate, rng)
+
+    def sample(self, path: str, status_code: int, duration_ms: float) -> Optional[float]:
+        for matcher, sampler in self._rules:
+            if matcher.matches(path):
+                return sampler.sample(path, status_code, duration_ms)
+        return self._default.sample(path, status_code, duration_ms)
+
+
+class TailSampler(BaseLogSampler):
+    """
+    Always keeps the interesting tail and samples the rest.
+
+    Non-2xx responses (if `keep_errors`) and requests slower than
+    `slow_ms` are logged with weight 1; every other request is passed to
+    `sampler`.
+
+    Usage example:
+        TailSampler(FixedRateSampler(0.01), slow_ms=500)
+    """
+
+    def __init__(
+        self,
+        sampler: BaseLogSampler,
+        keep_errors: bool = True,
+        slow_ms: Optional[float] = None,
+    ):
+        """
+        Args:
+            sampler: Sampler for requests outside the tail
+            keep_errors: If true, always log non-2xx responses
+            slow_ms: Always log requests taking at least this many milliseconds
+        """
+        self.sampler = sampler
+        self.keep_errors = keep_errors
+        self.slow_ms = slow_ms
+
+    def sample(self, path: str, status_code: int, duration_ms: float) -> Optional[float]:
+        if self.keep_errors and not 200 <= status_code < 300:
+            return 1.0
+        if self.slow_ms is not None and duration_ms >= self.slow_ms:
+            return 1.0
+        return self.sampler.sample(path, status_code, duration_ms)
@@ -0,0 +1,5 @@
+"""Test and benchmark helpers."""
+
+from .fake_redis import FakePipeline, FakeRedis, NoScriptError, ResponseError
+
+__all__ = ["FakeRedis", "FakePipeline", "ResponseError", "NoScriptError"]
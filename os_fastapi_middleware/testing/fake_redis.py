@@ -0,0 +1,461 @@
+"""In-process asyncio stand-in for a Redis server, with latency and failure injection."""
+
+import asyncio
+import fnmatch
+import hashlib
+import random
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+ScriptHandler = Callable[["FakeRedis", List[str], List[str]], Any]
+
+
+class ResponseError(Exception):
+    """Error reply from the fake server (bad type, unknown command or script)."""
+
+
+class NoScriptError(ResponseError):
+    """EVALSHA of a script that was not loaded."""
+
+
+async def _wait(delay: float) -> None:
+    # asyncio.sleep() wakes up to ~1ms late, which would swamp sub-millisecond
+    # latencies: sleep the bulk, then yield to the loop until the deadline.
+    deadline = time.perf_counter() + delay
+    if delay > 0.002:
+        await asyncio.sleep(delay - 0.0015)
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(0)
+
+
+class FakeRedis:
+    """
+    Async Redis-like client backed by a dict, for tests and benchmarks.
+
+    Implements the commands used by RedisRateLimitProvider and
+    RedisAPIKeyProvider (get, set, mget, mset, delete, incr, expire, scan),
+    plus pipelines and scripts, with the same call signatures as
+    redis.asyncio.Redis. Expiry is lazy, on access, against `clock`.
+
+    Every round trip (one command, or one pipeline execute()) waits
+    `latency` seconds plus up to `jitter` seconds, so benchmarks show what
+    round-trip counts cost, and may fail with the injected error:
+
+        client = FakeRedis(latency=0.0005, jitter=0.0002, fail_rate=0.01)
+        client.fail_next(3)              # the next three round trips fail
+        client.down = True               # every round trip fails until reset
+
+    Scripts have no Lua interpreter: register a Python function per script
+    source with `add_script(source, handler)`; EVAL/EVALSHA then call
+    `handler(client, keys, args)`. Unregistered sources raise ResponseError.
+
+    Values are stored as strings and returned as str, like a client created
+    with decode_responses=True (what the providers expect); pass
+    decode_responses=False to get bytes.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        command_latency: Optional[Mapping[str, float]] = None,
+        fail_rate: float = 0.0,
+        fail_commands: Optional[Sequence[str]] = None,
+        error_factory: Optional[Callable[[str], Exception]] = None,
+        decode_responses: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            latency: Seconds added to every round trip
+            jitter: Up to this many extra seconds per round trip (uniform)
+            command_latency: Latency per command name (lower case), overriding `latency`
+            fail_rate: Probability that a round trip fails
+            fail_commands: Only these commands fail randomly (all by default)
+            error_factory: Builds the injected exception from the command name
+                (default: ConnectionError)
+            decode_responses: If false, return bytes instead of str
+            clock: Time source for expiry, in seconds
+            seed: Seed for jitter and random failures, for reproducible runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.command_latency = {name.lower(): value for name, value in (command_latency or {}).items()}
+        self.fail_rate = fail_rate
+        self.fail_commands = {name.lower() for name in fail_commands} if fail_commands else None
+        self.error_factory = error_factory or (lambda command: ConnectionError(f"Injected failure in {command}"))
+        self.decode_responses = decode_responses
+        self.clock = clock
+        self.down = False
+
+        self._random = random.Random(seed)
+        self._data: Dict[str, Union[str, int]] = {}
+        self._expires: Dict[str, float] = {}
+        # Key list for SCAN cursors, rebuilt when keys are added or removed
+        self._key_list: Optional[List[str]] = None
+        self._scripts: Dict[str, str] = {}
+        self._handlers: Dict[str, ScriptHandler] = {}
+        self._fail_next = 0
+        self._closed = False
+
+        self.calls: Dict[str, int] = {}
+        self.round_trips = 0
+        self.failures = 0
+
+    # Fault injection
+
+    def fail_next(self, count: int = 1) -> None:
+        """Make the next `count` round trips fail."""
+        self._fail_next += count
+
+    def reset_stats(self) -> None:
+        self.calls.clear()
+        self.round_trips = 0
+        self.failures = 0
+
+    async def _round_trip(self, commands: Sequence[str]) -> None:
+        self.round_trips += 1
+        for command in commands:
+            self.calls[command] = self.calls.get(command, 0) + 1
+
+        delay = max((self.command_latency.get(command, self.latency) for command in commands), default=self.latency)
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await _wait(delay)
+
+        if self._closed:
+            raise ConnectionError("Client is closed")
+        failing = self.fail_commands is None or any(command in self.fail_commands for command in commands)
+        if self.down or self._fail_next or (
+            failing and self.fail_rate and self._random.random() < self.fail_rate
+        ):
+            if self._fail_next:
+                self._fail_next -= 1
+            self.failures += 1
+            raise self.error_factory(commands[0] if len(commands) == 1 else "pipeline")
+
+    async def _call(self, command: str, *args: Any, **kwargs: Any) -> Any:
+        await self._round_trip((command,))
+        return getattr(self, f"_do_{command}")(*args, **kwargs)
+
+    # Storage helpers
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= self.clock():
+            self._remove(key)
+        return key in self._data
+
+    def _remove(self, key: str) -> bool:
+        self._expires.pop(key, None)
+        if self._data.pop(key, None) is None:
+            return False
+        self._key_list = None
+        return True
+
+    def _store(self, key: str, value: Union[str, int]) -> None:
+        if key not in self._data:
+            self._key_list = None
+        self._data[key] = value
+
+    def _out(self, value: Any) -> Any:
+        if value is None or self.decode_responses:
+            return value
+        return value.encode()
+
+    @staticmethod
+    def _key(key: Union[str, bytes]) -> str:
+        return key.decode() if isinstance(key, bytes) else str(key)
+
+    @staticmethod
+    def _value(value: Any) -> str:
+        if isinstance(value, bytes):
+            return value.decode()
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    # Commands (each one round trip)
+
+    async def ping(self) -> bool:
+        return await self._call("ping")
+
+    async def get(self, name: str) -> Optional[str]:
+        return await self._call("get", name)
+
+    async def set(
+        self,
+        name: str,
+        value: Any,
+        ex: Optional[float] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+        xx: bool = False,
+    ) -> Optional[bool]:
+        return await self._call("set", name, value, ex=ex, px=px, nx=nx, xx=xx)
+
+    async def mget(self, keys: Any, *args: str) -> List[Optional[str]]:
+        return await self._call("mget", keys, *args)
+
+    async def mset(self, mapping: Mapping[str, Any]) -> bool:
+        return await self._call("mset", mapping)
+
+    async def delete(self, *names: str) -> int:
+        return await self._call("delete", *names)
+
+    async def exists(self, *names: str) -> int:
+        return await self._call("exists", *names)
+
+    async def incr(self, name: str, amount: int = 1) -> int:
+        return await self._call("incr", name, amount)
+
+    async def incrby(self, name: str, amount: int = 1) -> int:
+        return await self._call("incr", name, amount)
+
+    async def expire(self, name: str, time: int) -> bool:
+        return await self._call("expire", name, time)
+
+    async def pexpire(self, name: str, time: int) -> bool:
+        return await self._call("expire", name, time / 1000)
+
+    async def ttl(self, name: str) -> int:
+        return await self._call("ttl", name)
+
+    async def scan(self, cursor: int = 0, match: Optional[str] = None, count: Optional[int] = None) -> Tuple[int, List[str]]:
+        return await self._call("scan", cursor, match=match, count=count)
+
+    async def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None):
+        cursor = 0
+        while True:
+            cursor, keys = await self.scan(cursor, match=match, count=count)
+            for key in keys:
+                yield key
+            if cursor == 0:
+                break
+
+    async def dbsize(self) -> int:
+        return await self._call("dbsize")
+
+    async def flushall(self) -> bool:
+        return await self._call("flushall")
+
+    async def script_load(self, script: str) -> str:
+        return await self._call("script_load", script)
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args: Any) -> Any:
+        return await self._call("evalsha", sha, numkeys, *keys_and_args)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        return await self._call("eval", script, numkeys, *keys_and_args)
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    async def aclose(self) -> None:
+        self._closed = True
+
+    async def close(self) -> None:
+        await self.aclose()
+
+    # Command implementations (no round trip; shared with pipelines)
+
+    def _do_ping(self) -> bool:
+        return True
+
+    def _do_get(self, name: str) -> Optional[str]:
+        name = self._key(name)
+        if not self._alive(name):
+            return None
+        return self._out(str(self._data[name]))
+
+    def _do_set(self, name, value, ex=None, px=None, nx=False, xx=False) -> Optional[bool]:
+        name = self._key(name)
+        exists = self._alive(name)
+        if (nx and exists) or (xx and not exists):
+            return None
+        self._store(name, self._value(value))
+        self._expires.pop(name, None)
+        if ex is not None:
+            self._expires[name] = self.clock() + ex
+        elif px is not None:
+            self._expires[name] = self.clock() + px / 1000
+        return True
+
+    def _do_mget(self, keys, *args) -> List[Optional[str]]:
+        names = [keys] if isinstance(keys, (str, bytes)) else list(keys)
+        return [self._do_get(name) for name in names + list(args)]
+
+    def _do_mset(self, mapping) -> bool:
+        for name, value in mapping.items():
+            self._do_set(name, value)
+        return True
+
+    def _do_delete(self, *names) -> int:
+        return sum(1 for name in names if self._alive(self._key(name)) and self._remove(self._key(name)))
+
+    def _do_exists(self, *names) -> int:
+        return sum(1 for name in names if self._alive(self._key(name)))
+
+    def _do_incr(self, name, amount: int = 1) -> int:
+        name = self._key(name)
+        current = self._data.get(name) if self._alive(name) else None
+        try:
+            value = int(current or 0) + amount
+        except ValueError:
+            raise ResponseError("value is not an integer or out of range")
+        self._store(name, str(value))
+        return value
+
+    def _do_expire(self, name, seconds) -> bool:
+        name = self._key(name)
+        if not self._alive(name):
+            return False
+        if seconds <= 0:
+            self._remove(name)
+        else:
+            self._expires[name] = self.clock() + seconds
+        return True
+
+    def _do_ttl(self, name) -> int:
+        name = self._key(name)
+        if not self._alive(name):
+            return -2
+        expires = self._expires.get(name)
+        if expires is None:
+            return -1
+        return max(0, round(expires - self.clock()))
+
+    def _do_scan(self, cursor: int = 0, match: Optional[str] = None, count: Optional[int] = None) -> Tuple[int, List[str]]:
+        # Like Redis, examine `count` keys, then apply MATCH: pages can be empty.
+        # Keys added or removed during a scan may be missed or seen twice.
+        if self._key_list is None:
+            self._key_list = list(self._data)
+        keys = self._key_list
+        cursor = int(cursor)
+        end = cursor + (count or 10)
+        page = [key for key in keys[cursor:end] if self._alive(key)]
+        if match is not None:
+            page = [key for key in page if fnmatch.fnmatchcase(key, match)]
+        return (end if end < len(keys) else 0), [self._out(key) for key in page]
+
+    def _do_dbsize(self) -> int:
+        return sum(1 for key in list(self._data) if self._alive(key))
+
+    def _do_flushall(self) -> bool:
+        self._data.clear()
+        self._expires.clear()
+        self._key_list = None
+        return True
+
+    # Scripts
+
+    def add_script(self, source: str, handler: ScriptHandler) -> str:
+        """
+        Register the Python implementation of a Lua script.
+
+        Returns:
+            The script's SHA1, as returned by SCRIPT LOAD
+        """
+        sha = hashlib.sha1(source.encode()).hexdigest()
+        self._handlers[sha] = handler
+        return sha
+
+    def _do_script_load(self, script: str) -> str:
+        sha = hashlib.sha1(script.encode()).hexdigest()
+        if sha not in self._handlers:
+            raise ResponseError("No Python handler registered for this script (see FakeRedis.add_script)")
+        self._scripts[sha] = script
+        return sha
+
+    def _do_evalsha(self, sha: str, numkeys: int, *keys_and_args) -> Any:
+        if sha not in self._scripts:
+            raise NoScriptError("NOSCRIPT No matching script. Please use EVAL.")
+        keys = [self._key(key) for key in keys_and_args[:numkeys]]
+        args = [self._value(arg) for arg in keys_and_args[numkeys:]]
+        return self._handlers[sha](self, keys, args)
+
+    def _do_eval(self, script: str, numkeys: int, *keys_and_args) -> Any:
+        return self._do_evalsha(self._do_script_load(script), numkeys, *keys_and_args)
+
+
+class FakePipeline:
+    """
+    Queued commands sent to FakeRedis in one round trip.
+
+    Command methods queue and return the pipeline, like redis.asyncio's
+    Pipeline; `await execute()` runs them in order and returns the replies.
+    Replies that are errors are returned in place (raise_on_error=False) or
+    raised after the others ran, as Redis does.
+    """
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def reset(self) -> None:
+        self._commands = []
+
+    def _queue(self, command: str, *args: Any, **kwargs: Any) -> "FakePipeline":
+        self._commands.append((command, args, kwargs))
+        return self
+
+    def get(self, name):
+        return self._queue("get", name)
+
+    def set(self, name, value, ex=None, px=None, nx=False, xx=False):
+        return self._queue("set", name, value, ex=ex, px=px, nx=nx, xx=xx)
+
+    def mget(self, keys, *args):
+        return self._queue("mget", keys, *args)
+
+    def mset(self, mapping):
+        return self._queue("mset", mapping)
+
+    def delete(self, *names):
+        return self._queue("delete", *names)
+
+    def exists(self, *names):
+        return self._queue("exists", *names)
+
+    def incr(self, name, amount: int = 1):
+        return self._queue("incr", name, amount)
+
+    def incrby(self, name, amount: int = 1):
+        return self._queue("incr", name, amount)
+
+    def expire(self, name, time):
+        return self._queue("expire", name, time)
+
+    def ttl(self, name):
+        return self._queue("ttl", name)
+
+    def evalsha(self, sha, numkeys, *keys_and_args):
+        return self._queue("evalsha", sha, numkeys, *keys_and_args)
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        commands, self._commands = self._commands, []
+        if not commands:
+            return []
+        await self.client._round_trip([command for command, _, _ in commands])
+        replies = []
+        for command, args, kwargs in commands:
+            try:
+                replies.append(getattr(self.client, f"_do_{command}")(*args, **kwargs))
+            except ResponseError as e:
+                replies.append(e)
+        if raise_on_error:
+            for reply in replies:
+                if isinstance(reply, ResponseError):
+                    raise reply
+        return replies
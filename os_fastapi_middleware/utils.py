@@ -1,7 +1,7 @@
 """Funções utilitárias para a biblioteca."""
 
 import ipaddress
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 
 def is_ip_in_network(ip: str, networks: List[str]) -> bool:
@@ -63,4 +63,84 @@ def generate_api_key(length: int = 32) -> str:
     import string
     
     alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
\ No newline at end of file
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+class IPNetworkMatcher:
+    """
+    Compiled matcher for a list of IP addresses and CIDR networks.
+
+    Networks are grouped by prefix length and stored as sets of integer
+    network prefixes, so a lookup costs one address parse plus one set probe
+    per distinct prefix length (at most 33 for IPv4, 129 for IPv6), no matter
+    how many networks were configured. Exact addresses are also kept as
+    strings so the common single-IP case skips parsing entirely.
+
+    Invalid entries are ignored, like in `is_ip_in_network`.
+    """
+
+    __slots__ = ("_hosts", "_v4", "_v6", "_v4_prefixes", "_v6_prefixes")
+
+    def __init__(self, networks: Optional[Iterable[str]] = None):
+        self._hosts: Set[str] = set()
+        self._v4: Dict[int, Set[int]] = {}
+        self._v6: Dict[int, Set[int]] = {}
+        self._v4_prefixes: Tuple[int, ...] = ()
+        self._v6_prefixes: Tuple[int, ...] = ()
+        for network in networks or []:
+            self.add(network)
+
+    def add(self, network: str) -> bool:
+        """
+        Add an IP address or CIDR network to the matcher.
+
+        Args:
+            network: IP address or network (e.g. "10.0.0.0/8")
+
+        Returns:
+            True if added, False if the entry is not a valid IP or network
+        """
+        try:
+            net = ipaddress.ip_network(network.strip(), strict=False)
+        except (ValueError, AttributeError):
+            return False
+
+        if net.num_addresses == 1:
+            self._hosts.add(str(net.network_address))
+
+        bits = net.max_prefixlen
+        table = self._v4 if net.version == 4 else self._v6
+        table.setdefault(net.prefixlen, set()).add(
+            int(net.network_address) >> (bits - net.prefixlen)
+        )
+        # Longest prefixes first: most specific entries are the common case
+        if net.version == 4:
+            self._v4_prefixes = tuple(sorted(table, reverse=True))
+        else:
+            self._v6_prefixes = tuple(sorted(table, reverse=True))
+        return True
+
+    def __contains__(self, ip: str) -> bool:
+        if ip in self._hosts:
+            return True
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+
+        if addr.version == 4:
+            table, prefixes, bits = self._v4, self._v4_prefixes, 32
+        else:
+            table, prefixes, bits = self._v6, self._v6_prefixes, 128
+
+        value = int(addr)
+        for prefixlen in prefixes:
+            if (value >> (bits - prefixlen)) in table[prefixlen]:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._v4.values()) + sum(len(s) for s in self._v6.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._v4_prefixes or self._v6_prefixes)
@@ -1,7 +1,11 @@
+from types import SimpleNamespace
+
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+from os_fastapi_middleware import middleware
+
 
 @pytest.fixture
 def app():
@@ -24,4 +28,27 @@ def app():
 
 @pytest.fixture
 def client(app):
-    return TestClient(app)
\ No newline at end of file
+    return TestClient(app)
+
+MIDDLEWARE_VARIANTS = {
+    "base_http": SimpleNamespace(
+        APIKeyMiddleware=middleware.APIKeyMiddleware,
+        RateLimitMiddleware=middleware.RateLimitMiddleware,
+        IPWhitelistMiddleware=middleware.IPWhitelistMiddleware,
+        RequestLoggingMiddleware=middleware.RequestLoggingMiddleware,
+        AdminIPBypassMiddleware=middleware.AdminIPBypassMiddleware,
+    ),
+    "asgi": SimpleNamespace(
+        APIKeyMiddleware=middleware.APIKeyASGIMiddleware,
+        RateLimitMiddleware=middleware.RateLimitASGIMiddleware,
+        IPWhitelistMiddleware=middleware.IPWhitelistASGIMiddleware,
+        RequestLoggingMiddleware=middleware.RequestLoggingASGIMiddleware,
+        AdminIPBypassMiddleware=middleware.AdminIPBypassASGIMiddleware,
+    ),
+}
+
+
+@pytest.fixture(params=sorted(MIDDLEWARE_VARIANTS))
+def mw(request):
+    """Middleware classes of one variant, so tests run against both implementations."""
+    return MIDDLEWARE_VARIANTS[request.param]
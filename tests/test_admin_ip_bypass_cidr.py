@@ -0,0 +1,87 @@
+import pytest
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import (
+    APIKeyMiddleware,
+    AdminIPBypassMiddleware,
+    AdminIPBypassDependency,
+    InMemoryAPIKeyProvider,
+    InMemoryIPWhitelistProvider,
+)
+from os_fastapi_middleware.utils import IPNetworkMatcher
+
+
+def test_matcher_supports_ips_and_cidrs():
+    matcher = IPNetworkMatcher(["203.0.113.10", "10.20.0.0/24", "2001:db8::/48", "not-an-ip"])
+
+    assert "203.0.113.10" in matcher
+    assert "10.20.0.77" in matcher
+    assert "10.20.1.1" not in matcher
+    assert "2001:db8:0:ffff::1" in matcher
+    assert "2001:db8:1::1" not in matcher
+    assert "garbage" not in matcher
+    assert len(matcher) == 3
+
+
+def make_app(**bypass_kwargs):
+    app = FastAPI()
+    app.add_middleware(
+        APIKeyMiddleware,
+        provider=InMemoryAPIKeyProvider({"acct": "valid-key"}),
+    )
+    app.add_middleware(AdminIPBypassMiddleware, **bypass_kwargs)
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    return app
+
+
+def test_middleware_cidr_admin_range():
+    client = TestClient(make_app(admin_ips=["10.20.0.0/24", "2001:db8::/48"]))
+
+    assert client.get("/", headers={"X-Real-IP": "10.20.0.5"}).status_code == 200
+    assert client.get("/", headers={"X-Real-IP": "2001:db8::5"}).status_code == 200
+    assert client.get("/", headers={"X-Real-IP": "10.21.0.5"}).status_code == 401
+
+
+def test_middleware_provider_can_be_refreshed():
+    provider = InMemoryIPWhitelistProvider(["10.20.0.0/24"])
+    client = TestClient(make_app(provider=provider))
+
+    assert client.get("/", headers={"X-Real-IP": "10.20.0.5"}).status_code == 200
+
+    provider.set_allowed_ips(["192.0.2.0/24"])
+    assert client.get("/", headers={"X-Real-IP": "10.20.0.5"}).status_code == 401
+    assert client.get("/", headers={"X-Real-IP": "192.0.2.1"}).status_code == 200
+
+
+def test_middleware_provider_error_does_not_grant_bypass():
+    provider = InMemoryIPWhitelistProvider([])
+
+    async def boom(_ip: str):
+        raise RuntimeError("provider down")
+
+    provider.is_ip_allowed = boom
+    client = TestClient(make_app(provider=provider))
+
+    assert client.get("/", headers={"X-Real-IP": "10.20.0.5"}).status_code == 401
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"admin_ips": ["10.20.0.0/24"]},
+    {"provider": InMemoryIPWhitelistProvider(["10.20.0.0/24"])},
+])
+def test_dependency_cidr_and_provider(kwargs):
+    app = FastAPI()
+    dep = AdminIPBypassDependency(auto_error=True, **kwargs)
+
+    @app.get("/admin")
+    async def admin(_: bool = Depends(dep)):
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/admin", headers={"X-Real-IP": "10.20.0.200"}).status_code == 200
+    assert client.get("/admin", headers={"X-Real-IP": "10.20.1.1"}).status_code == 403
@@ -3,9 +3,6 @@ from fastapi import FastAPI, Depends
 from fastapi.testclient import TestClient
 
 from os_fastapi_middleware import (
-    AdminIPBypassMiddleware,
-    APIKeyMiddleware,
-    RateLimitMiddleware,
     InMemoryAPIKeyProvider,
     InMemoryRateLimitProvider,
     AdminIPBypassDependency,
@@ -17,15 +14,15 @@ ADMIN_IP = "203.0.113.10"
 NON_ADMIN_IP = "198.51.100.23"
 
 
-def build_middleware_app():
+def build_middleware_app(mw):
     app = FastAPI()
 
     api_key_provider = InMemoryAPIKeyProvider({"acct": "valid-key"})
     rate_limit_provider = InMemoryRateLimitProvider()
 
-    app.add_middleware(APIKeyMiddleware, provider=api_key_provider, header_name="X-API-Key")
-    app.add_middleware(RateLimitMiddleware, provider=rate_limit_provider, requests_per_window=2, window_seconds=60)
-    app.add_middleware(AdminIPBypassMiddleware, admin_ips=[ADMIN_IP], trust_proxy_headers=True)
+    app.add_middleware(mw.APIKeyMiddleware, provider=api_key_provider, header_name="X-API-Key")
+    app.add_middleware(mw.RateLimitMiddleware, provider=rate_limit_provider, requests_per_window=2, window_seconds=60)
+    app.add_middleware(mw.AdminIPBypassMiddleware, admin_ips=[ADMIN_IP], trust_proxy_headers=True)
 
     @app.get("/")
     async def root():
@@ -49,8 +46,8 @@ def build_dependency_app():
     return app
 
 
-def test_admin_state_not_persisted_across_requests_middleware():
-    app = build_middleware_app()
+def test_admin_state_not_persisted_across_requests_middleware(mw):
+    app = build_middleware_app(mw)
     client = TestClient(app)
 
     # First request as admin should pass without API key
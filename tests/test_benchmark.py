@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+from os_fastapi_middleware.benchmark import (
+    API_KEY,
+    ASGIDriver,
+    Benchmark,
+    BenchmarkResult,
+    compare,
+    load_baseline,
+    main,
+    measure,
+    stack_benchmarks,
+)
+from os_fastapi_middleware.middleware import APIKeyASGIMiddleware
+from os_fastapi_middleware.providers import InMemoryAPIKeyProvider
+
+
+def test_driver_runs_requests_through_the_stack():
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": scope["client"][0].encode()})
+
+    app = APIKeyASGIMiddleware(endpoint, provider=InMemoryAPIKeyProvider({"acc": API_KEY}))
+
+    async def run():
+        allowed = await ASGIDriver(app, headers={"X-API-Key": API_KEY}).request(3)
+        rejected = await ASGIDriver(app).request(3)
+        return allowed, rejected
+
+    assert asyncio.run(run()) == (200, 401)
+
+
+def test_measure_counts_batched_operations():
+    calls = []
+
+    async def setup():
+        async def operation(i):
+            calls.append(i)
+
+        async def teardown():
+            calls.append("teardown")
+
+        return operation, teardown
+
+    result = asyncio.run(measure(Benchmark("noop", setup, batch=10), samples=5, warmup=2))
+    assert result.ops == 50
+    assert calls[:-1] == list(range(70))
+    assert calls[-1] == "teardown"
+    assert 0 < result.p50_us <= result.p99_us
+    assert result.ops_per_sec > 0
+
+
+def test_every_stack_accepts_the_benchmark_request():
+    # setup() raises if a stack rejects the request it is meant to time
+    async def run():
+        for benchmark in stack_benchmarks(clients=4):
+            operation, _ = await benchmark.setup()
+            assert await operation(1) == 200
+
+    asyncio.run(run())
+
+
+def test_compare_uses_the_metric_direction():
+    baseline = {"a": BenchmarkResult("a", 100, 10.0, 20.0, 1000.0)}
+    slower = {"a": BenchmarkResult("a", 100, 13.0, 20.0, 700.0)}
+    assert compare(slower, baseline, threshold=0.25) == [("a", 10.0, 13.0, pytest.approx(0.3))]
+    assert compare(slower, baseline, threshold=0.5) == []
+    assert compare(slower, baseline, threshold=0.25, metric="ops_per_sec")[0][3] == pytest.approx(-0.3)
+    assert compare({"b": slower["a"]}, baseline) == []
+
+
+def test_cli_saves_and_gates_on_a_baseline(tmp_path, capsys):
+    path = str(tmp_path / "baseline.json")
+    args = ["-k", "provider.memory.validate_key", "--cardinalities", "10", "--samples", "5", "--warmup", "1"]
+    assert main(args + ["--save", path]) == 0
+    assert list(load_baseline(path)) == ["provider.memory.validate_key[n=10]"]
+
+    with open(path) as fh:
+        data = json.load(fh)
+    # Impossibly fast p50, impossibly slow throughput
+    data["results"]["provider.memory.validate_key[n=10]"].update(p50_us=1e-6, ops_per_sec=1.0)
+    with open(path, "w") as fh:
+        json.dump(data, fh)
+
+    assert main(args + ["--compare", path]) == 1
+    assert "1 regression(s)" in capsys.readouterr().out
+    assert main(args + ["--compare", path, "--metric", "ops_per_sec"]) == 0
@@ -0,0 +1,153 @@
+from fastapi import FastAPI, Depends, Request
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import (
+    APIKeyDependency,
+    APIKeyMiddleware,
+    IPWhitelistDependency,
+    IPWhitelistMiddleware,
+    RateLimitDependency,
+    RateLimitMiddleware,
+    SecurityPipeline,
+    get_security_context,
+)
+from os_fastapi_middleware.config import SecurityConfig, APIKeyConfig
+from os_fastapi_middleware.dependencies.api_key import get_api_key_metadata
+from os_fastapi_middleware.providers import (
+    InMemoryAPIKeyProvider,
+    InMemoryIPWhitelistProvider,
+    InMemoryRateLimitProvider,
+)
+
+
+class CountingKeyProvider(InMemoryAPIKeyProvider):
+
+    def __init__(self, valid_keys):
+        super().__init__(valid_keys)
+        self.validations = 0
+        self.metadata_lookups = 0
+
+    def validate_key_sync(self, api_key):
+        self.validations += 1
+        return super().validate_key_sync(api_key)
+
+    def get_key_metadata_sync(self, api_key):
+        self.metadata_lookups += 1
+        return super().get_key_metadata_sync(api_key)
+
+
+class AsyncCountingIPProvider(InMemoryIPWhitelistProvider):
+
+    def __init__(self, allowed_ips):
+        super().__init__(allowed_ips)
+        self.checks = 0
+
+    async def is_ip_allowed(self, ip):
+        self.checks += 1
+        return await super().is_ip_allowed(ip)
+
+
+def test_middleware_and_dependency_validate_once():
+    provider = CountingKeyProvider({"acc": "secret"})
+    app = FastAPI()
+    app.add_middleware(APIKeyMiddleware, provider=provider, include_metadata=True)
+
+    @app.get("/")
+    async def root(request: Request, metadata=Depends(get_api_key_metadata(provider))):
+        context = get_security_context(request)
+        return {"metadata": metadata, "api_key": context.api_key}
+
+    client = TestClient(app)
+    r = client.get("/", headers={"X-API-Key": "secret"})
+    assert r.json() == {"metadata": {"account_id": "acc"}, "api_key": "secret"}
+    assert provider.validations == 1
+    assert provider.metadata_lookups == 1
+
+    # Memoisation is per request
+    client.get("/", headers={"X-API-Key": "secret"})
+    assert provider.validations == 2
+
+
+def test_ip_checked_once_with_async_provider():
+    provider = AsyncCountingIPProvider(["testclient", "127.0.0.1"])
+    app = FastAPI()
+    app.add_middleware(IPWhitelistMiddleware, provider=provider)
+
+    @app.get("/")
+    async def root(client_ip: str = Depends(IPWhitelistDependency(provider))):
+        return {"ip": client_ip}
+
+    client = TestClient(app)
+    assert client.get("/").status_code == 200
+    assert provider.checks == 1
+
+
+def test_rate_limit_counted_once_per_request():
+    provider = InMemoryRateLimitProvider()
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, provider=provider, requests_per_window=2, window_seconds=60)
+
+    @app.get("/same")
+    async def same(_=Depends(RateLimitDependency(provider, requests_per_window=2, window_seconds=60))):
+        return {"ok": True}
+
+    @app.get("/looser")
+    async def looser(_=Depends(RateLimitDependency(provider, requests_per_window=5, window_seconds=60))):
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/same").status_code == 200
+    assert client.get("/same").status_code == 200
+    assert client.get("/same").status_code == 429
+
+    # A different limit on the same key is a separate check
+    provider.storage.clear()
+    assert client.get("/looser").status_code == 200
+    assert [len(hits) for hits in provider.storage.values()] == [2]
+
+
+def test_dependency_reuses_pipeline_results():
+    provider = CountingKeyProvider({"acc": "secret"})
+    app = FastAPI()
+    app.add_middleware(
+        SecurityPipeline,
+        config=SecurityConfig(api_key=APIKeyConfig()),
+        api_key_provider=provider,
+    )
+
+    @app.get("/")
+    async def root(key=Depends(APIKeyDependency(provider))):
+        return {"key": key}
+
+    client = TestClient(app)
+    assert client.get("/", headers={"X-API-Key": "secret"}).json() == {"key": "secret"}
+    assert provider.validations == 1
+
+
+def test_provider_errors_are_not_memoised():
+    calls = []
+
+    class FlakyProvider(InMemoryAPIKeyProvider):
+        async def validate_key(self, api_key):
+            calls.append(api_key)
+            if len(calls) == 1:
+                raise RuntimeError("flaky")
+            return True
+
+    provider = FlakyProvider({})
+    app = FastAPI()
+
+    async def first_attempt(request: Request):
+        context = get_security_context(request)
+        try:
+            await context.decide("validate_key", provider, provider.validate_key, "k")
+        except RuntimeError:
+            pass
+
+    @app.get("/", dependencies=[Depends(first_attempt)])
+    async def root(key=Depends(APIKeyDependency(provider))):
+        return {"key": key}
+
+    client = TestClient(app)
+    assert client.get("/", headers={"X-API-Key": "k"}).json() == {"key": "k"}
+    assert calls == ["k", "k"]
@@ -0,0 +1,182 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware.benchmark import main as benchmark_main
+from os_fastapi_middleware.providers.redis import RedisAPIKeyProvider, RedisRateLimitProvider
+from os_fastapi_middleware.testing import FakeRedis, NoScriptError, ResponseError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_commands_and_expiry():
+    clock = Clock()
+    client = FakeRedis(clock=clock)
+
+    async def run():
+        assert await client.incr("hits") == 1
+        assert await client.incr("hits", 4) == 5
+        assert await client.expire("hits", 10)
+        assert await client.ttl("hits") == 10
+        assert await client.set("name", "value", nx=True)
+        assert await client.set("name", "other", nx=True) is None
+        assert await client.mget(["hits", "name", "missing"]) == ["5", "value", None]
+        clock.now += 10
+        assert await client.get("hits") is None
+        assert await client.delete("name", "missing") == 1
+        await client.set("text", "abc")
+        with pytest.raises(ResponseError):
+            await client.incr("text")
+        assert await client.dbsize() == 1
+
+    asyncio.run(run())
+    assert client.round_trips == 12
+    assert client.calls["incr"] == 3
+
+
+def test_scan_pages_and_match():
+    client = FakeRedis(decode_responses=False)
+
+    async def run():
+        await client.mset({f"apikey:{i}": i for i in range(25)})
+        await client.mset({f"other:{i}": i for i in range(5)})
+        cursor, pages = 0, []
+        while True:
+            cursor, keys = await client.scan(cursor, match="apikey:*", count=10)
+            pages.append(keys)
+            if cursor == 0:
+                return pages
+
+    pages = asyncio.run(run())
+    assert len(pages) == 3
+    assert sorted(key for page in pages for key in page) == sorted(f"apikey:{i}".encode() for i in range(25))
+    # MATCH filters after `count` keys were examined, so the last page is short
+    assert len(pages[-1]) == 5
+
+
+def test_pipeline_is_one_round_trip():
+    client = FakeRedis()
+
+    async def run():
+        async with client.pipeline() as pipe:
+            pipe.incr("a").expire("a", 60).set("b", "x").get("b").incr("b")
+            return await pipe.execute(raise_on_error=False)
+
+    replies = asyncio.run(run())
+    assert replies[:4] == [1, True, True, "x"]
+    assert isinstance(replies[4], ResponseError)
+    assert client.round_trips == 1
+    assert client.calls == {"incr": 2, "expire": 1, "set": 1, "get": 1}
+
+
+def test_scripts_run_registered_handlers():
+    source = "return redis.call('INCRBY', KEYS[1], ARGV[1])"
+    client = FakeRedis()
+    client.add_script(source, lambda redis, keys, args: redis._do_incr(keys[0], int(args[0])))
+
+    async def run():
+        with pytest.raises(NoScriptError):
+            await client.evalsha("0" * 40, 1, "k", 1)
+        sha = await client.script_load(source)
+        assert await client.evalsha(sha, 1, "counter", 3) == 3
+        assert await client.eval(source, 1, "counter", 2) == 5
+        with pytest.raises(ResponseError):
+            await client.script_load("return 1")
+
+    asyncio.run(run())
+
+
+def test_latency_is_paid_per_round_trip():
+    client = FakeRedis(latency=0.005, command_latency={"get": 0.02})
+
+    async def run():
+        started = time.perf_counter()
+        await client.incr("a")
+        incr = time.perf_counter() - started
+        started = time.perf_counter()
+        await client.get("a")
+        get = time.perf_counter() - started
+        started = time.perf_counter()
+        await client.pipeline().incr("a").incr("a").incr("a").execute()
+        pipeline = time.perf_counter() - started
+        return incr, get, pipeline
+
+    incr, get, pipeline = asyncio.run(run())
+    assert incr >= 0.005
+    assert get >= 0.02
+    assert 0.005 <= pipeline < 0.015
+
+
+def test_failure_injection():
+    client = FakeRedis(fail_rate=0.5, fail_commands=["incr"], seed=1)
+
+    async def run():
+        outcomes = []
+        for _ in range(40):
+            try:
+                await client.incr("a")
+                outcomes.append(True)
+            except ConnectionError:
+                outcomes.append(False)
+        # Other commands never fail randomly
+        for _ in range(20):
+            await client.get("a")
+
+        client.fail_next(2)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await client.get("a")
+        client.down = True
+        with pytest.raises(ConnectionError):
+            await client.ping()
+        client.down = False
+        assert await client.ping()
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    assert 5 < outcomes.count(False) < 35
+    assert client.failures == outcomes.count(False) + 3
+
+
+def test_redis_providers_against_the_fake(mw):
+    client = FakeRedis()
+    keys = RedisAPIKeyProvider(client)
+    asyncio.run(keys.set_key("acc_1", "secret"))
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    app.add_middleware(mw.RateLimitMiddleware, provider=RedisRateLimitProvider(client), requests_per_window=2)
+    app.add_middleware(mw.APIKeyMiddleware, provider=keys, include_metadata=True)
+    http = TestClient(app)
+    headers = {"X-API-Key": "secret"}
+
+    assert [http.get("/", headers=headers).status_code for _ in range(3)] == [200, 200, 429]
+    assert http.get("/", headers={"X-API-Key": "nope"}).status_code == 403
+
+    # An outage of the rate limit store fails open; key lookups fail closed
+    client.fail_commands = {"incr"}
+    client.fail_rate = 1.0
+    assert http.get("/", headers=headers).status_code == 200
+    client.down = True
+    assert http.get("/", headers=headers).status_code >= 500
+
+
+def test_benchmark_runs_redis_providers_on_the_fake(capsys):
+    args = ["-k", "provider.redis", "--fake-redis", "0", "--cardinalities", "50", "--samples", "3", "--warmup", "1"]
+    assert benchmark_main(args) == 0
+    out = capsys.readouterr().out
+    assert "provider.redis.validate_key[n=50]" in out
+    assert "provider.redis.check_rate_limit[n=50]" in out
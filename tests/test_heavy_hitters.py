@@ -0,0 +1,153 @@
+import random
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import (
+    HeavyHitterTracker,
+    SecurityConfig,
+    RateLimitConfig,
+    SecurityPipeline,
+    heavy_hitters_endpoint,
+)
+from os_fastapi_middleware.heavy_hitters import CountMinSketch, SpaceSaving
+from os_fastapi_middleware.providers import InMemoryRateLimitProvider
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _skewed_stream(n=50000, seed=7):
+    rng = random.Random(seed)
+    return [f"key-{int(rng.paretovariate(1.2))}" for _ in range(n)]
+
+
+def test_space_saving_finds_the_heavy_keys_in_bounded_memory():
+    stream = _skewed_stream()
+    truth = Counter(stream)
+    top = SpaceSaving(capacity=20)
+    for key in stream:
+        top.add(key)
+
+    assert len(top) == 20
+    tracked = {key: (count, error) for key, count, error in top.items()}
+    for key, true_count in truth.most_common(5):
+        count, error = tracked[key]
+        assert count - error <= true_count <= count
+    # Every key above total / capacity is guaranteed to be tracked
+    for key, true_count in truth.items():
+        if true_count > len(stream) / 20:
+            assert key in top
+
+
+def test_count_min_sketch_never_undercounts():
+    stream = _skewed_stream()
+    truth = Counter(stream)
+    sketch = CountMinSketch(width=256, depth=4)
+    for key in stream:
+        sketch.add(key)
+
+    bound = 2.72 / 256 * len(stream)
+    for key, true_count in truth.items():
+        estimate = sketch.estimate(key)
+        assert true_count <= estimate <= true_count + bound
+    assert sketch.total == len(stream)
+
+
+def test_count_min_rows_hash_independently():
+    sketch = CountMinSketch(width=64, depth=4)
+    seen = {}
+    pairs = full = 0
+    for i in range(20000):
+        cells = sketch.cells(f"key-{i}")
+        for other in seen.get(tuple(cells[:2]), []):
+            pairs += 1
+            full += other == cells
+        seen.setdefault(tuple(cells[:2]), []).append(cells)
+
+    # Sharing rows 0 and 1 says nothing about rows 2 and 3 (about 1 in 4096 also do)
+    assert pairs > 10000
+    assert full < pairs / 100
+
+
+def test_tracker_window_ages_out_old_traffic():
+    clock = Clock()
+    tracker = HeavyHitterTracker(capacity=10, window_seconds=10, clock=clock)
+    for _ in range(100):
+        tracker.record("noisy")
+    for _ in range(5):
+        tracker.record("quiet", limited=True)
+
+    top = tracker.top(2)
+    assert [entry["key"] for entry in top] == ["noisy", "quiet"]
+    assert top[0]["requests"] == 100
+    assert top[0]["rate"] == 10.0
+    assert top[1]["limited"] == 5
+
+    # Half of the previous epoch still overlaps the window
+    clock.now = 15
+    tracker.record("quiet")
+    assert tracker.estimate("noisy")["requests"] == 50
+    assert tracker.top(1)[0]["key"] == "noisy"
+
+    clock.now = 40
+    assert tracker.top() == []
+    assert tracker.stats()["requests"] == 0
+
+
+def test_rate_limit_middleware_feeds_the_tracker(mw):
+    tracker = HeavyHitterTracker()
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    app.add_middleware(
+        mw.RateLimitMiddleware,
+        provider=InMemoryRateLimitProvider(),
+        requests_per_window=3,
+        key_func=lambda request: request.headers.get("X-Client", "anonymous"),
+        heavy_hitters=tracker,
+    )
+    app.add_route("/admin/heavy-hitters", heavy_hitters_endpoint(tracker))
+    client = TestClient(app)
+
+    for _ in range(5):
+        client.get("/", headers={"X-Client": "scraper"})
+    client.get("/", headers={"X-Client": "browser"})
+
+    body = client.get("/admin/heavy-hitters?n=2", headers={"X-Client": "admin"}).json()
+    assert [entry["key"] for entry in body["top"]] == ["scraper", "browser"]
+    assert body["top"][0]["requests"] == 5
+    assert body["top"][0]["limited"] == 2
+    assert body["stats"]["requests"] == 7
+    assert client.get("/admin/heavy-hitters?n=x").status_code == 400
+
+
+def test_pipeline_feeds_the_tracker():
+    tracker = HeavyHitterTracker()
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    app.add_middleware(
+        SecurityPipeline,
+        config=SecurityConfig(rate_limit=RateLimitConfig(requests_per_window=1)),
+        rate_limit_provider=InMemoryRateLimitProvider(),
+        heavy_hitters=tracker,
+    )
+    client = TestClient(app)
+    assert [client.get("/").status_code for _ in range(3)] == [200, 429, 429]
+
+    (entry,) = tracker.top()
+    assert entry["key"].startswith("rate_limit:ip:")
+    assert (entry["requests"], entry["limited"]) == (3, 2)
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from os_fastapi_middleware.histogram import LogLinearHistogram
+
+
+def test_percentiles_within_relative_error():
+    rng = random.Random(7)
+    values = [int(rng.lognormvariate(8, 1.5)) for _ in range(20000)]
+    histogram = LogLinearHistogram()
+    for value in values:
+        histogram.record(value)
+
+    ordered = sorted(values)
+    for q in (50, 90, 99, 99.9):
+        exact = ordered[int(len(ordered) * q / 100) - 1]
+        assert histogram.percentile(q) == pytest.approx(exact, rel=0.02, abs=1)
+    assert histogram.percentile(0) == histogram.min == ordered[0]
+    assert histogram.percentile(100) == histogram.max == ordered[-1]
+    assert histogram.count == len(values)
+
+
+def test_small_values_are_exact_and_empty_is_none():
+    histogram = LogLinearHistogram()
+    assert histogram.percentile(50) is None
+    assert histogram.mean is None
+    for value in (1, 2, 3, 4, 100):
+        histogram.record(value)
+    assert histogram.percentiles([20, 60, 100]) == [1, 3, 100]
+    assert histogram.mean == 22
+
+
+def test_merge_and_round_trip_match_a_single_histogram():
+    left, right, combined = LogLinearHistogram(), LogLinearHistogram(), LogLinearHistogram()
+    for value in range(0, 50000, 13):
+        (left if value % 2 else right).record(value)
+        combined.record(value)
+
+    restored = LogLinearHistogram.from_dict(left.to_dict())
+    restored.merge(right)
+
+    assert restored.to_dict() == combined.to_dict()
+    with pytest.raises(ValueError):
+        restored.merge(LogLinearHistogram(precision_bits=5))
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import os_fastapi_middleware
+from os_fastapi_middleware import providers, middleware, dependencies
+
+# Generous wall-clock budget for `import os_fastapi_middleware` in a fresh
+# interpreter; the module-list checks below are the precise guard
+IMPORT_BUDGET_SECONDS = float(os.environ.get("OS_FASTAPI_IMPORT_BUDGET", "0.2"))
+
+HEAVY_MODULES = ["fastapi", "pydantic", "starlette", "asyncio"]
+
+
+def _run(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return json.loads(result.stdout)
+
+
+def _probe(statement: str) -> dict:
+    return _run(
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+
+
+def test_package_import_is_lazy():
+    probe = _probe("import os_fastapi_middleware")
+    assert probe["heavy"] == []
+    assert probe["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+def test_provider_import_does_not_load_fastapi():
+    probe = _probe("from os_fastapi_middleware.providers import InMemoryAPIKeyProvider")
+    assert "fastapi" not in probe["heavy"]
+    assert "pydantic" not in probe["heavy"]
+
+
+@pytest.mark.parametrize("module", [os_fastapi_middleware, providers, middleware, dependencies])
+def test_public_names_resolve(module):
+    for name in module.__all__:
+        assert getattr(module, name) is not None
+    assert set(module.__all__) <= set(dir(module))
+
+
+def test_unknown_attribute_raises_attribute_error():
+    with pytest.raises(AttributeError):
+        os_fastapi_middleware.DoesNotExist
+    assert not hasattr(providers, "NoSuchProvider")
@@ -0,0 +1,151 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import (
+    APIKeyDependency,
+    MetricsRegistry,
+    SecurityMetrics,
+    SecurityPipeline,
+    metrics_endpoint,
+)
+from os_fastapi_middleware.config import SecurityConfig, APIKeyConfig, RateLimitConfig
+from os_fastapi_middleware.providers import InMemoryAPIKeyProvider, InMemoryRateLimitProvider
+
+
+def _decisions(metrics):
+    return {labels: child.value for labels, child in metrics.decisions._values.items()}
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    return app
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["path"])
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    registry.gauge("queue_depth", "Depth").labels().set(3.5)
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.labels().observe(value)
+
+    assert registry.counter("requests_total", "Requests", ["path"]) is requests
+    text = registry.render()
+    assert "# TYPE requests_total counter\n" in text
+    assert 'requests_total{path="/a\\"b"} 3\n' in text
+    assert "queue_depth 3.5\n" in text
+    assert 'latency_seconds_bucket{le="0.1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="1"} 3\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4\n' in text
+    assert "latency_seconds_count 4\n" in text
+    assert "latency_seconds_sum 3.65\n" in text
+
+
+def test_registry_rejects_conflicting_families():
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "Hits", ["a"])
+    for register in (lambda: registry.gauge("hits_total", "Hits", ["a"]),
+                     lambda: registry.counter("hits_total", "Hits", ["b"])):
+        try:
+            register()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("conflicting registration accepted")
+
+
+def test_middleware_decisions_and_provider_latency(mw):
+    metrics = SecurityMetrics()
+    app = _app()
+    app.add_middleware(mw.APIKeyMiddleware, provider=InMemoryAPIKeyProvider({"acc": "secret"}),
+                       exempt_paths=["/health"], metrics=metrics)
+    client = TestClient(app)
+
+    client.get("/", headers={"X-API-Key": "secret"})
+    client.get("/", headers={"X-API-Key": "wrong"})
+    client.get("/")
+    client.get("/health")
+
+    assert _decisions(metrics) == {
+        ("api_key", "allow", "valid_key"): 1,
+        ("api_key", "reject", "invalid_key"): 1,
+        ("api_key", "reject", "missing_key"): 1,
+        ("api_key", "skip", "exempt"): 1,
+    }
+    latency = metrics.provider_seconds.labels("InMemoryAPIKeyProvider", "validate_key")
+    assert latency.count == 2
+
+
+def test_rate_limit_provider_errors_are_counted(mw):
+    class BrokenRateLimit(InMemoryRateLimitProvider):
+        async def check_rate_limit(self, key, limit, window):
+            raise ConnectionError("redis down")
+
+    metrics = SecurityMetrics()
+    app = _app()
+    app.add_middleware(mw.RateLimitMiddleware, provider=BrokenRateLimit(), metrics=metrics)
+
+    # Still fails open, but no longer silently
+    assert TestClient(app).get("/").status_code == 200
+    assert _decisions(metrics) == {("rate_limit", "error", "provider_error"): 1}
+
+
+def test_context_hits_and_near_exhaustion(mw):
+    provider = InMemoryAPIKeyProvider({"acc": "secret"})
+    metrics = SecurityMetrics(near_exhaustion=0.5)
+    app = FastAPI()
+    app.add_middleware(mw.RateLimitMiddleware, provider=InMemoryRateLimitProvider(), requests_per_window=4,
+                       key_func=lambda request: "client", metrics=metrics)
+    app.add_middleware(mw.APIKeyMiddleware, provider=provider, metrics=metrics)
+    app.add_route("/metrics", metrics_endpoint(metrics))
+
+    @app.get("/", dependencies=[Depends(APIKeyDependency(provider))])
+    async def root():
+        return {"ok": True}
+
+    client = TestClient(app)
+    client.get("/", headers={"X-API-Key": "secret"})
+    lookups = metrics.context_lookups
+    assert lookups.labels("validate_key", "miss").value == 1
+    assert lookups.labels("validate_key", "hit").value == 1
+    # One hit of four: not near exhaustion yet
+    assert 'near_exhaustion{stage="rate_limit"}' not in metrics.registry.render()
+
+    client.get("/", headers={"X-API-Key": "secret"})
+    response = client.get("/metrics", headers={"X-API-Key": "secret"})
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'os_fastapi_security_rate_limit_near_exhaustion{stage="rate_limit"} 1' in response.text
+
+
+def test_pipeline_records_same_series():
+    metrics = SecurityMetrics()
+    app = _app()
+    app.add_middleware(
+        SecurityPipeline,
+        config=SecurityConfig(api_key=APIKeyConfig(exempt_paths=["/health"]), rate_limit=RateLimitConfig()),
+        api_key_provider=InMemoryAPIKeyProvider({"acc": "secret"}),
+        rate_limit_provider=InMemoryRateLimitProvider(),
+        metrics=metrics,
+    )
+    client = TestClient(app)
+
+    client.get("/", headers={"X-API-Key": "secret"})
+    client.get("/", headers={"X-API-Key": "wrong"})
+
+    decisions = _decisions(metrics)
+    assert decisions[("api_key", "allow", "valid_key")] == 1
+    assert decisions[("api_key", "reject", "invalid_key")] == 1
+    assert decisions[("rate_limit", "allow", "within_limit")] == 1
+    assert metrics.context_lookups.labels("validate_key", "miss").value == 2
+    assert metrics.provider_seconds.labels("InMemoryAPIKeyProvider", "validate_key").count == 2
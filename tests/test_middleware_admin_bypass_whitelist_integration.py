@@ -3,9 +3,6 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from os_fastapi_middleware import (
-    AdminIPBypassMiddleware,
-    IPWhitelistMiddleware,
-    APIKeyMiddleware,
     InMemoryIPWhitelistProvider,
     InMemoryAPIKeyProvider,
 )
@@ -16,7 +13,7 @@ WHITELISTED_IP = "203.0.113.10"
 
 
 @pytest.fixture()
-def make_app():
+def make_app(mw):
     def _factory():
         app = FastAPI()
 
@@ -27,19 +24,19 @@ def make_app():
         # Add middlewares so that Admin runs first, then whitelist, then API key
         # (Starlette executes in reverse order of addition)
         app.add_middleware(
-            APIKeyMiddleware,
+            mw.APIKeyMiddleware,
             provider=api_key_provider,
             header_name="X-API-Key",
             exempt_paths=["/health"],
         )
         app.add_middleware(
-            IPWhitelistMiddleware,
+            mw.IPWhitelistMiddleware,
             provider=whitelist_provider,
             exempt_paths=["/health"],
             trust_proxy_headers=True,
         )
         app.add_middleware(
-            AdminIPBypassMiddleware,
+            mw.AdminIPBypassMiddleware,
             admin_ips=[ADMIN_IP],
             trust_proxy_headers=True,
         )
@@ -3,9 +3,6 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from os_fastapi_middleware import (
-    APIKeyMiddleware,
-    RateLimitMiddleware,
-    AdminIPBypassMiddleware,
     InMemoryAPIKeyProvider,
     InMemoryRateLimitProvider,
 )
@@ -16,7 +13,7 @@ NON_ADMIN_IP = "198.51.100.23"
 
 
 @pytest.fixture()
-def make_app():
+def make_app(mw):
     def _factory():
         app = FastAPI()
 
@@ -28,20 +25,20 @@ def make_app():
 
         # Middlewares: add security first, then AdminIPBypass last so it runs first
         app.add_middleware(
-            APIKeyMiddleware,
+            mw.APIKeyMiddleware,
             provider=api_key_provider,
             header_name="X-API-Key",
             exempt_paths=["/health"],
         )
         app.add_middleware(
-            RateLimitMiddleware,
+            mw.RateLimitMiddleware,
             provider=rate_limit_provider,
             requests_per_window=2,
             window_seconds=60,
             add_headers=False,
         )
         app.add_middleware(
-            AdminIPBypassMiddleware,
+            mw.AdminIPBypassMiddleware,
             admin_ips=[ADMIN_IP],
             trust_proxy_headers=True,
         )
@@ -104,9 +101,6 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from os_fastapi_middleware import (
-    APIKeyMiddleware,
-    RateLimitMiddleware,
-    AdminIPBypassMiddleware,
     InMemoryAPIKeyProvider,
     InMemoryRateLimitProvider,
 )
@@ -117,7 +111,7 @@ NON_ADMIN_IP = "198.51.100.23"
 
 
 @pytest.fixture()
-def make_app():
+def make_app(mw):
     def _factory():
         app = FastAPI()
 
@@ -129,20 +123,20 @@ def make_app():
 
         # Middlewares: add security first, then AdminIPBypass last so it runs first
         app.add_middleware(
-            APIKeyMiddleware,
+            mw.APIKeyMiddleware,
             provider=api_key_provider,
             header_name="X-API-Key",
             exempt_paths=["/health"],
         )
         app.add_middleware(
-            RateLimitMiddleware,
+            mw.RateLimitMiddleware,
             provider=rate_limit_provider,
             requests_per_window=2,
             window_seconds=60,
             add_headers=False,
         )
         app.add_middleware(
-            AdminIPBypassMiddleware,
+            mw.AdminIPBypassMiddleware,
             admin_ips=[ADMIN_IP],
             trust_proxy_headers=True,
         )
@@ -201,7 +195,7 @@ def test_non_admin_rate_limited(make_app):
     assert r.status_code == 429
 
 
-def test_no_admin_ips_configured_behaves_normally():
+def test_no_admin_ips_configured_behaves_normally(mw):
     """
     When AdminIPBypassMiddleware is added with no admin IPs configured,
     it should not bypass other middlewares. Normal security applies.
@@ -214,12 +208,12 @@ def test_no_admin_ips_configured_behaves_normally():
 
     # Security middlewares
     app.add_middleware(
-        APIKeyMiddleware,
+        mw.APIKeyMiddleware,
         provider=api_key_provider,
         header_name="X-API-Key",
     )
     app.add_middleware(
-        RateLimitMiddleware,
+        mw.RateLimitMiddleware,
         provider=rate_limit_provider,
         requests_per_window=2,
         window_seconds=60,
@@ -228,7 +222,7 @@ def test_no_admin_ips_configured_behaves_normally():
 
     # Add AdminIPBypassMiddleware without admin_ips configured
     app.add_middleware(
-        AdminIPBypassMiddleware,
+        mw.AdminIPBypassMiddleware,
         trust_proxy_headers=True,
     )
 
@@ -2,11 +2,11 @@ import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from os_fastapi_middleware import APIKeyMiddleware, InMemoryAPIKeyProvider
+from os_fastapi_middleware import InMemoryAPIKeyProvider
 
 
 @pytest.fixture
-def app_with_api_key():
+def app_with_api_key(mw):
     app = FastAPI()
     
     provider = InMemoryAPIKeyProvider(
@@ -17,7 +17,7 @@ def app_with_api_key():
     )
     
     app.add_middleware(
-        APIKeyMiddleware,
+        mw.APIKeyMiddleware,
         provider=provider,
         include_metadata=True,
         exempt_paths=["/health"]
@@ -2,13 +2,12 @@ import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from os_fastapi_middleware import IPWhitelistMiddleware
 from os_fastapi_middleware import InMemoryIPWhitelistProvider
 from fastapi import status
 
 
 @pytest.fixture()
-def make_app():
+def make_app(mw):
     def _factory(provider, **mw_kwargs):
         app = FastAPI()
 
@@ -20,7 +19,7 @@ def make_app():
         async def protected():
             return {"protected": True}
 
-        app.add_middleware(IPWhitelistMiddleware, provider=provider, **mw_kwargs)
+        app.add_middleware(mw.IPWhitelistMiddleware, provider=provider, **mw_kwargs)
         return app
 
     return _factory
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import (
+    SecurityPipeline,
+    SecurityConfig,
+    APIKeyConfig,
+    RateLimitConfig,
+    IPWhitelistConfig,
+    AdminIPBypassConfig,
+    InMemoryAPIKeyProvider,
+    InMemoryRateLimitProvider,
+)
+
+ADMIN_IP = "127.0.0.1"
+NON_ADMIN_IP = "198.51.100.23"
+WHITELISTED_IP = "203.0.113.10"
+
+
+def make_app(api_key_provider=None, **pipeline_kwargs):
+    config = SecurityConfig(
+        api_key=APIKeyConfig(include_metadata=True),
+        rate_limit=RateLimitConfig(requests_per_window=2, window_seconds=60),
+        ip_whitelist=IPWhitelistConfig(allowed_ips=["203.0.113.0/24"]),
+        admin_bypass=AdminIPBypassConfig(admin_ips=[ADMIN_IP]),
+    )
+    app = FastAPI()
+    app.add_middleware(
+        SecurityPipeline,
+        config=config,
+        api_key_provider=api_key_provider or InMemoryAPIKeyProvider({"acct": "valid-key"}),
+        rate_limit_provider=InMemoryRateLimitProvider(),
+        **pipeline_kwargs
+    )
+
+    @app.get("/")
+    async def root(request: Request):
+        return {
+            "api_key": getattr(request.state, "api_key", None),
+            "metadata": getattr(request.state, "api_key_metadata", None),
+            "admin_bypass": getattr(request.state, "admin_bypass", None),
+        }
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+def test_admin_bypasses_all_stages():
+    client = TestClient(make_app())
+    for _ in range(3):
+        r = client.get("/", headers={"X-Real-IP": ADMIN_IP})
+        assert r.status_code == 200
+        assert r.json()["admin_bypass"] is True
+
+
+def test_whitelist_runs_before_api_key():
+    client = TestClient(make_app())
+    r = client.get("/", headers={"X-Real-IP": NON_ADMIN_IP})
+    assert r.status_code == 403
+    assert r.json()["detail"] == f"IP {NON_ADMIN_IP} is not whitelisted"
+
+
+def test_api_key_checks():
+    client = TestClient(make_app())
+    headers = {"X-Real-IP": WHITELISTED_IP}
+
+    assert client.get("/", headers=headers).status_code == 401
+    assert client.get("/", headers={**headers, "X-API-Key": "bad"}).status_code == 403
+
+    r = client.get("/", headers={**headers, "X-API-Key": "valid-key"})
+    assert r.status_code == 200
+    assert r.json()["api_key"] == "valid-key"
+    assert r.json()["metadata"] == {"account_id": "acct"}
+
+
+def test_rate_limit_and_headers():
+    client = TestClient(make_app())
+    headers = {"X-Real-IP": WHITELISTED_IP, "X-API-Key": "valid-key"}
+
+    r = client.get("/", headers=headers)
+    assert r.headers["X-RateLimit-Limit"] == "2"
+    assert r.headers["X-RateLimit-Remaining"] == "1"
+    assert client.get("/", headers=headers).status_code == 200
+
+    r = client.get("/", headers=headers)
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "60"
+
+
+def test_exempt_paths():
+    client = TestClient(make_app())
+    assert client.get("/health", headers={"X-Real-IP": NON_ADMIN_IP}).status_code == 200
+
+
+def test_whitelist_and_api_key_run_concurrently():
+    events = []
+
+    class SlowProvider(InMemoryAPIKeyProvider):
+        async def validate_key(self, api_key):
+            events.append("key-start")
+            await asyncio.sleep(0.01)
+            events.append("key-end")
+            return await super().validate_key(api_key)
+
+    class SlowWhitelist:
+        async def is_ip_allowed(self, ip):
+            events.append("ip-start")
+            await asyncio.sleep(0.01)
+            events.append("ip-end")
+            return True
+
+    client = TestClient(make_app(
+        api_key_provider=SlowProvider({"acct": "valid-key"}),
+        ip_whitelist_provider=SlowWhitelist(),
+    ))
+    r = client.get("/", headers={"X-Real-IP": NON_ADMIN_IP, "X-API-Key": "valid-key"})
+    assert r.status_code == 200
+    assert events[:2] == ["ip-start", "key-start"]
+
+
+def test_missing_provider_is_rejected():
+    with pytest.raises(ValueError):
+        SecurityPipeline(FastAPI(), config=SecurityConfig(api_key=APIKeyConfig()))
@@ -2,17 +2,17 @@ import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from os_fastapi_middleware import RateLimitMiddleware, InMemoryRateLimitProvider
+from os_fastapi_middleware import InMemoryRateLimitProvider
 
 
 @pytest.fixture
-def app_with_rate_limit():
+def app_with_rate_limit(mw):
     app = FastAPI()
     
     provider = InMemoryRateLimitProvider()
     
     app.add_middleware(
-        RateLimitMiddleware,
+        mw.RateLimitMiddleware,
         provider=provider,
         requests_per_window=5,
         window_seconds=60,
@@ -53,4 +53,21 @@ def test_rate_limit_headers(app_with_rate_limit):
     
     response = client.get("/")
     assert response.headers["X-RateLimit-Limit"] == "5"
-    assert int(response.headers["X-RateLimit-Remaining"]) <= 5
\ No newline at end of file
+    assert int(response.headers["X-RateLimit-Remaining"]) <= 5
+
+def test_rate_limit_headers_on_streaming_response(mw):
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+    app.add_middleware(mw.RateLimitMiddleware, provider=InMemoryRateLimitProvider(), requests_per_window=5)
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i};".encode()
+        return StreamingResponse(chunks())
+
+    response = TestClient(app).get("/stream")
+    assert response.text == "chunk-0;chunk-1;chunk-2;"
+    assert response.headers["X-RateLimit-Remaining"] == "4"
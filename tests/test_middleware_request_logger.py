@@ -0,0 +1,138 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture()
+def make_app(mw):
+    def _factory(**mw_kwargs):
+        records = []
+        app = FastAPI()
+        app.add_middleware(mw.RequestLoggingMiddleware, provider=records.append, **mw_kwargs)
+
+        @app.get("/items")
+        async def items():
+            return {"ok": True}
+
+        @app.post("/echo")
+        async def echo(request: Request):
+            return {"size": len(await request.body())}
+
+        @app.get("/boom")
+        async def boom():
+            raise RuntimeError("handler failure")
+
+        @app.get("/health")
+        async def health():
+            return {"status": "ok"}
+
+        @app.get("/stream")
+        async def stream():
+            async def chunks():
+                for i in range(3):
+                    yield f"chunk-{i};".encode()
+
+            return StreamingResponse(chunks(), media_type="text/plain")
+
+        return app, records
+
+    return _factory
+
+
+def test_logs_request_record(make_app):
+    app, records = make_app(extra_fields={"service": "api"})
+    client = TestClient(app)
+
+    r = client.get("/items?x=1", headers={"X-Forwarded-For": "203.0.113.10", "User-Agent": "tests"})
+    assert r.status_code == 200
+
+    assert len(records) == 1
+    record = records[0]
+    assert record["method"] == "GET"
+    assert record["path"] == "/items"
+    assert record["query"] == "x=1"
+    assert record["client_ip"] == "203.0.113.10"
+    assert record["user_agent"] == "tests"
+    assert record["status_code"] == 200
+    assert record["response_length"] == len(r.content)
+    assert record["headers"]["forwarded_for"] == "203.0.113.10"
+    assert record["service"] == "api"
+
+
+def test_exempt_path_not_logged(make_app):
+    app, records = make_app()
+    TestClient(app).get("/health")
+    assert records == []
+
+
+def test_capture_body_keeps_body_readable(make_app):
+    app, records = make_app(capture_body=True, max_body_bytes=4)
+    client = TestClient(app)
+
+    r = client.post("/echo", content=b"0123456789")
+    assert r.json() == {"size": 10}
+    assert records[0]["request_body"] == "0123"
+
+
+def test_handler_exception_is_logged_as_500(make_app):
+    app, records = make_app()
+    client = TestClient(app, raise_server_exceptions=False)
+
+    r = client.get("/boom")
+    assert r.status_code == 500
+    assert records[0]["status_code"] == 500
+
+
+def test_capture_body_is_bounded_for_chunked_uploads(make_app):
+    app, records = make_app(capture_body=True, max_body_bytes=5)
+    client = TestClient(app)
+
+    def upload():
+        for _ in range(100):
+            yield b"abc" * 1000
+
+    r = client.post("/echo", content=upload())
+    assert r.json() == {"size": 300000}
+    assert records[0]["request_body"] == "abcab"
+
+
+def test_capture_body_only_sees_what_the_app_reads(make_app):
+    app, records = make_app(capture_body=True)
+    TestClient(app).post("/items", content=b"ignored")
+    assert records[0]["request_body"] is None
+
+
+def test_capture_response_body(make_app):
+    app, records = make_app(capture_response_body=True, max_body_bytes=12)
+    client = TestClient(app)
+
+    assert client.get("/stream").text == "chunk-0;chunk-1;chunk-2;"
+    assert records[0]["response_body"] == "chunk-0;chun"
+    assert records[0]["request_body"] is None
+
+    client.get("/items")
+    assert records[1]["response_body"] == '{"ok":true}'
+
+
+def test_response_body_not_captured_by_default(make_app):
+    app, records = make_app()
+    TestClient(app).get("/items")
+    assert records[0]["response_body"] is None
+
+
+def test_streaming_response_length_and_ttfb(make_app):
+    app, records = make_app()
+    r = TestClient(app).get("/stream")
+
+    record = records[0]
+    assert record["response_length"] == len(r.content) == 24
+    assert record["ttfb_ms"] is not None
+    assert 0 <= record["ttfb_ms"] <= record["duration_ms"]
+
+
+def test_failed_request_without_response_has_no_length(make_app):
+    app, records = make_app()
+    TestClient(app, raise_server_exceptions=False).get("/boom")
+    assert records[0]["response_length"] is None
+    assert records[0]["ttfb_ms"] is None
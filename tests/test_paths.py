@@ -0,0 +1,86 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import APIKeyMiddleware, InMemoryAPIKeyProvider
+from os_fastapi_middleware.paths import PathMatcher, compile_path_rules
+
+
+@pytest.fixture
+def matcher():
+    return PathMatcher([
+        "/health",
+        "/internal/metrics/**",
+        "/static/*",
+        "/api/*/ping",
+        r"re:/v[0-9]+/status",
+    ])
+
+
+@pytest.mark.parametrize("path", [
+    "/health",
+    "/internal/metrics",
+    "/internal/metrics/",
+    "/internal/metrics/http/latency",
+    "/static/app.js",
+    "/api/v2/ping",
+    "/v12/status",
+])
+def test_matching_paths(matcher, path):
+    assert matcher.matches(path)
+    assert path in matcher
+
+
+@pytest.mark.parametrize("path", [
+    "/",
+    "/health/",
+    "/healthz",
+    "/internal/metricsx",
+    "/internal",
+    "/static/js/app.js",
+    "/api/v2/pong",
+    "/v1/status/extra",
+])
+def test_non_matching_paths(matcher, path):
+    assert not matcher.matches(path)
+
+
+def test_compile_returns_shared_matcher(matcher):
+    assert compile_path_rules(matcher) is matcher
+    assert not compile_path_rules(None).matches("/health")
+
+
+@pytest.mark.parametrize("rule", ["/api/v1/admin/**", "/api/*/admin/**"])
+def test_subtree_rule_covers_its_prefix(rule):
+    matcher = PathMatcher([rule])
+    assert [matcher.matches(path) for path in ("/api/v1/admin", "/api/v1/admin/", "/api/v1/admin/users/7")] == [
+        True, True, True,
+    ]
+    assert not matcher.matches("/api/v1/administrator")
+    assert not matcher.matches("/api/v1")
+
+
+def test_invalid_regex_fails_at_construction():
+    with pytest.raises(Exception):
+        PathMatcher(["re:("])
+
+
+def test_middleware_accepts_glob_rules():
+    app = FastAPI()
+    app.add_middleware(
+        APIKeyMiddleware,
+        provider=InMemoryAPIKeyProvider({"acct": "valid-key"}),
+        exempt_paths=["/static/**"],
+    )
+
+    @app.get("/static/css/{name}")
+    async def static(name: str):
+        return {"name": name}
+
+    @app.get("/secure")
+    async def secure():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/static/css/site.css").status_code == 200
+    assert client.get("/secure").status_code == 401
@@ -0,0 +1,163 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import (
+    SecurityPipeline,
+    SecurityConfig,
+    APIKeyConfig,
+    RateLimitConfig,
+    InMemoryAPIKeyProvider,
+    InMemoryRateLimitProvider,
+)
+from os_fastapi_middleware.config import RoutePolicy
+from os_fastapi_middleware.policies import PolicyRegistry, security_policy
+
+
+def make_app():
+    registry = PolicyRegistry(policies={
+        "/items/{item_id}": RoutePolicy(requests_per_window=1, tier="items"),
+        "status": RoutePolicy(api_key=False, rate_limit=False),
+    })
+    app = FastAPI()
+    app.add_middleware(
+        SecurityPipeline,
+        config=SecurityConfig(
+            api_key=APIKeyConfig(),
+            rate_limit=RateLimitConfig(requests_per_window=3),
+        ),
+        api_key_provider=InMemoryAPIKeyProvider({"acct": "valid-key"}),
+        rate_limit_provider=InMemoryRateLimitProvider(),
+        policies=registry,
+    )
+
+    @app.get("/public")
+    @security_policy(api_key=False)
+    async def public():
+        return {"ok": True}
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"item_id": item_id}
+
+    @app.get("/status", name="status")
+    async def status_route():
+        return {"ok": True}
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    return app, registry
+
+
+def test_registry_compiles_static_and_dynamic_routes():
+    app, registry = make_app()
+    registry.compile(app)
+
+    scope = {"type": "http", "method": "GET", "path": "/public"}
+    assert registry.lookup(scope).api_key is False
+    scope = {"type": "http", "method": "GET", "path": "/items/7"}
+    assert registry.lookup(scope).tier == "items"
+    scope = {"type": "http", "method": "GET", "path": "/nowhere"}
+    assert registry.lookup(scope) is registry.default
+
+
+def test_decorated_route_skips_api_key():
+    app, _ = make_app()
+    client = TestClient(app)
+    assert client.get("/public").status_code == 200
+    assert client.get("/").status_code == 401
+
+
+def test_named_route_policy_disables_rate_limit():
+    app, _ = make_app()
+    client = TestClient(app)
+    for _ in range(5):
+        r = client.get("/status")
+        assert r.status_code == 200
+        assert "X-RateLimit-Limit" not in r.headers
+
+
+def test_route_tier_has_its_own_limit():
+    app, _ = make_app()
+    client = TestClient(app)
+    headers = {"X-API-Key": "valid-key"}
+
+    r = client.get("/items/1", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["X-RateLimit-Limit"] == "1"
+    assert client.get("/items/2", headers=headers).status_code == 429
+
+    # The default tier keeps its own, larger budget
+    assert client.get("/", headers=headers).headers["X-RateLimit-Limit"] == "3"
+
+
+def test_tierless_overrides_have_independent_counters():
+    app = FastAPI()
+    app.add_middleware(
+        SecurityPipeline,
+        config=SecurityConfig(rate_limit=RateLimitConfig(requests_per_window=3)),
+        rate_limit_provider=InMemoryRateLimitProvider(),
+        policies=PolicyRegistry(),
+    )
+
+    @app.get("/strict")
+    @security_policy(requests_per_window=1)
+    async def strict():
+        return {"ok": True}
+
+    @app.get("/slow")
+    @security_policy(window_seconds=600)
+    async def slow():
+        return {"ok": True}
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert [client.get("/strict").status_code for _ in range(2)] == [200, 429]
+    assert [client.get("/slow").status_code for _ in range(4)] == [200, 200, 200, 429]
+    assert [client.get("/").status_code for _ in range(4)] == [200, 200, 200, 429]
+
+
+def test_custom_key_func_is_namespaced_per_tier():
+    provider = InMemoryRateLimitProvider()
+    app = FastAPI()
+    app.add_middleware(
+        SecurityPipeline,
+        config=SecurityConfig(rate_limit=RateLimitConfig(requests_per_window=3)),
+        rate_limit_provider=provider,
+        rate_limit_key_func=lambda request: request.headers["X-Account"],
+        policies=PolicyRegistry(),
+    )
+
+    @app.get("/reports")
+    @security_policy(requests_per_window=1, tier="reports")
+    async def reports():
+        return {"ok": True}
+
+    @app.get("/exports")
+    @security_policy(requests_per_window=2, tier="exports")
+    async def exports():
+        return {"ok": True}
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    client = TestClient(app)
+    headers = {"X-Account": "acme"}
+    assert [client.get("/reports", headers=headers).status_code for _ in range(2)] == [200, 429]
+    assert [client.get("/exports", headers=headers).status_code for _ in range(3)] == [200, 200, 429]
+    # Untiered routes keep the key exactly as the key_func returns it
+    assert [client.get("/", headers=headers).status_code for _ in range(4)] == [200, 200, 200, 429]
+    assert asyncio.run(provider.get_remaining_requests("acme", 3, 60)) == 0
+
+
+def test_policies_compiled_on_lifespan_startup():
+    app, registry = make_app()
+    with TestClient(app):
+        assert registry.compiled
@@ -0,0 +1,147 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import RequestLoggingMiddleware
+from os_fastapi_middleware.histogram import LogLinearHistogram
+from os_fastapi_middleware.providers import AggregatingRequestLogProvider
+from os_fastapi_middleware.providers.base import BaseRequestLogProvider
+
+
+class RecordingProvider(BaseRequestLogProvider):
+
+    def __init__(self, fail=False):
+        self.records = []
+        self.fail = fail
+
+    async def log(self, record):
+        self.records.append(record)
+
+    async def log_batch(self, records):
+        if self.fail:
+            raise RuntimeError("backend down")
+        self.records.extend(records)
+
+
+def _record(route, status_code=200, duration_us=1000, method="GET"):
+    return {
+        "method": method,
+        "route": route,
+        "path": "/raw",
+        "status_code": status_code,
+        "duration_us": duration_us,
+        "response_length": 10,
+    }
+
+
+def test_rolls_up_by_method_route_and_status_class():
+    target = RecordingProvider()
+    provider = AggregatingRequestLogProvider(target, interval=60, include_histogram=True)
+
+    async def scenario():
+        for duration in range(1, 101):
+            await provider.log(_record("/items/{item_id}", duration_us=duration * 1000))
+        await provider.log(_record("/items/{item_id}", status_code=404))
+        await provider.log(_record(None, status_code=404))
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    rollups = {(r["method"], r["route"], r["status_class"]): r for r in target.records}
+    assert set(rollups) == {
+        ("GET", "/items/{item_id}", "2xx"),
+        ("GET", "/items/{item_id}", "4xx"),
+        ("GET", "<unmatched>", "4xx"),
+    }
+    ok = rollups[("GET", "/items/{item_id}", "2xx")]
+    assert ok["count"] == 100
+    assert ok["response_bytes"] == 1000
+    assert ok["duration_ms"]["min"] == 1
+    assert ok["duration_ms"]["max"] == 100
+    assert abs(ok["duration_ms"]["p50"] - 50) <= 0.5
+    assert abs(ok["duration_ms"]["p99"] - 99) <= 1
+    assert LogLinearHistogram.from_dict(ok["histogram_us"]).count == 100
+    assert provider.stats()["rollups"] == 3
+
+
+def test_sample_weights_apply_to_latency_and_bytes():
+    target = RecordingProvider()
+    provider = AggregatingRequestLogProvider(target, interval=60, include_histogram=True)
+
+    async def scenario():
+        # A tail sampler keeps 1 in 10 fast requests (weight 10) and every slow one
+        for _ in range(9):
+            await provider.log({**_record("/a", duration_us=1000), "sample_weight": 10.0})
+        for _ in range(10):
+            await provider.log(_record("/a", duration_us=100000))
+        # Fractional weights are carried over: 4 x 2.5 = 10 requests
+        for _ in range(4):
+            await provider.log({**_record("/b"), "sample_weight": 2.5})
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    rollups = {r["route"]: r for r in target.records}
+    a = rollups["/a"]
+    assert (a["count"], a["weighted_count"], a["response_bytes"]) == (19, 100.0, 1000)
+    assert a["duration_ms"]["p50"] <= 1.01
+    assert a["duration_ms"]["p90"] <= 1.01
+    assert a["duration_ms"]["p99"] >= 99
+    assert LogLinearHistogram.from_dict(a["histogram_us"]).count == 100
+
+    b = rollups["/b"]
+    assert (b["count"], b["weighted_count"], b["response_bytes"]) == (4, 10.0, 100)
+    assert LogLinearHistogram.from_dict(b["histogram_us"]).count == 10
+
+
+def test_windows_reset_and_series_are_capped():
+    target = RecordingProvider()
+    provider = AggregatingRequestLogProvider(target, interval=60, max_series=2)
+
+    async def scenario():
+        for route in ("/a", "/b", "/c", "/d"):
+            await provider.log(_record(route))
+        assert len(provider.snapshot()) == 3
+        await provider.flush()
+        await provider.log(_record("/a"))
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    first, second = target.records[:3], target.records[3:]
+    assert {r["route"]: r["count"] for r in first} == {"/a": 1, "/b": 1, "<other>": 2}
+    assert [(r["route"], r["count"]) for r in second] == [("/a", 1)]
+
+
+def test_flushes_periodically_and_reports_errors():
+    errors = []
+    provider = AggregatingRequestLogProvider(RecordingProvider(fail=True), interval=0.01, on_error=errors.append)
+
+    async def scenario():
+        await provider.log(_record("/a"))
+        await asyncio.sleep(0.05)
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    assert provider.stats()["failed"] == 1
+    assert isinstance(errors[0], RuntimeError)
+
+
+def test_middleware_records_route_templates():
+    target = RecordingProvider()
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, provider=AggregatingRequestLogProvider(target, interval=60))
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    with TestClient(app) as client:
+        for item_id in range(5):
+            client.get(f"/items/{item_id}")
+        client.get("/missing")
+
+    counts = {(r["route"], r["status_class"]): r["count"] for r in target.records}
+    assert counts == {("/items/{item_id}", "2xx"): 5, ("<unmatched>", "4xx"): 1}
@@ -0,0 +1,92 @@
+import math
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware.providers import ApproximateRateLimitProvider, InMemoryRateLimitProvider
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_limits_each_key_independently():
+    provider = ApproximateRateLimitProvider(clock=Clock())
+    assert [provider.check_rate_limit_sync("a", 3, 60) for _ in range(4)] == [True, True, True, False]
+    assert provider.check_rate_limit_sync("b", 3, 60)
+    assert provider.get_remaining_requests_sync("a", 3, 60) == 0
+    assert provider.get_remaining_requests_sync("b", 3, 60) == 2
+    assert provider.get_remaining_requests_sync("never-seen", 3, 60) == 3
+
+
+def test_memory_is_fixed_whatever_the_key_count():
+    provider = ApproximateRateLimitProvider(width=1024, depth=4, clock=Clock())
+    provider.check_rate_limit_sync("first", 10, 60)
+    memory = provider.stats()["memory_bytes"]
+    assert memory == 2 * 1024 * 4 * 4
+
+    for i in range(100000):
+        provider.check_rate_limit_sync(f"2001:db8::{i:x}", 10, 60)
+    assert provider.stats()["memory_bytes"] == memory
+
+
+def test_overcount_stays_within_the_documented_bound():
+    width = 512
+    provider = ApproximateRateLimitProvider(width=width, depth=4, clock=Clock())
+    flood = 20000
+    for i in range(flood):
+        provider.check_rate_limit_sync(f"spoofed-{i}", 1000, 60)
+
+    bound = provider.stats()["max_overcount"][60]
+    assert bound == round(math.e / width * flood, 1)
+    # A key seen three times is never undercounted, and overcounted by at most the bound
+    for _ in range(3):
+        provider.check_rate_limit_sync("client", 1000, 60)
+    used = 1000 - provider.get_remaining_requests_sync("client", 1000, 60)
+    assert 3 <= used <= 3 + math.ceil(bound) + 1
+
+
+def test_sliding_window_across_epochs():
+    clock = Clock()
+    clock.now = 600.0
+    provider = ApproximateRateLimitProvider(clock=clock)
+    for _ in range(10):
+        assert provider.check_rate_limit_sync("k", 10, 60)
+    assert not provider.check_rate_limit_sync("k", 10, 60)
+
+    # 15s into the next epoch, 75% of the previous one still counts
+    clock.now = 675.0
+    assert provider.get_remaining_requests_sync("k", 10, 60) == 2
+    assert provider.check_rate_limit_sync("k", 10, 60)
+    assert provider.check_rate_limit_sync("k", 10, 60)
+    assert not provider.check_rate_limit_sync("k", 10, 60)
+
+    # Idle for over two windows: everything expired
+    clock.now = 900.0
+    assert provider.get_remaining_requests_sync("k", 10, 60) == 10
+    assert provider.stats()["limited"] == 2
+
+
+def test_first_line_limiter_in_front_of_the_exact_provider(mw):
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    # Exact per-key limit inside, coarse per-IP limit outside
+    app.add_middleware(mw.RateLimitMiddleware, provider=InMemoryRateLimitProvider(), requests_per_window=5,
+                       key_func=lambda request: request.headers["X-Account"])
+    app.add_middleware(mw.RateLimitMiddleware, provider=ApproximateRateLimitProvider(), requests_per_window=8,
+                       key_func=lambda request: request.client.host, add_headers=False)
+    client = TestClient(app)
+
+    statuses = [client.get("/", headers={"X-Account": "a"}).status_code for _ in range(6)]
+    assert statuses == [200] * 5 + [429]
+    # The approximate limiter counted all six; two more from the same IP pass it
+    statuses = [client.get("/", headers={"X-Account": "b"}).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
@@ -0,0 +1,194 @@
+import asyncio
+from collections import deque
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware.providers import BatchingRequestLogProvider
+from os_fastapi_middleware.providers.base import BaseRequestLogProvider
+
+
+class RecordingProvider(BaseRequestLogProvider):
+
+    def __init__(self, delay=0.0, fail=False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+
+    async def log(self, record):
+        await self.log_batch([record])
+
+    async def log_batch(self, records):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend down")
+        self.batches.append(list(records))
+
+
+def test_default_log_batch_calls_log():
+    seen = []
+
+    class Single(BaseRequestLogProvider):
+        async def log(self, record):
+            seen.append(record)
+
+    asyncio.run(Single().log_batch([{"a": 1}, {"a": 2}]))
+    assert seen == [{"a": 1}, {"a": 2}]
+
+
+def test_flushes_by_size_and_on_close():
+    target = RecordingProvider()
+    provider = BatchingRequestLogProvider(target, batch_size=2, flush_interval=60)
+
+    async def scenario():
+        async with provider:
+            for i in range(5):
+                await provider.log({"i": i})
+            await asyncio.sleep(0.01)
+            # Two full batches went out without waiting for the interval
+            assert len(target.batches) >= 1
+
+    asyncio.run(scenario())
+    assert [r["i"] for batch in target.batches for r in batch] == [0, 1, 2, 3, 4]
+    assert all(len(batch) <= 2 for batch in target.batches)
+    stats = provider.stats()
+    assert stats["flushed"] == 5
+    assert stats["queued"] == 0
+
+
+def test_flushes_by_time():
+    target = RecordingProvider()
+    provider = BatchingRequestLogProvider(target, batch_size=100, flush_interval=0.02)
+
+    async def scenario():
+        await provider.start()
+        await provider.log({"i": 1})
+        await asyncio.sleep(0.1)
+        assert target.batches == [[{"i": 1}]]
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("overflow, kept", [
+    ("drop_oldest", [2, 3]),
+    ("drop_newest", [0, 1]),
+])
+def test_drop_policies(overflow, kept):
+    target = RecordingProvider()
+    provider = BatchingRequestLogProvider(target, batch_size=10, flush_interval=60, max_queue=2, overflow=overflow)
+
+    async def scenario():
+        await provider.start()
+        for i in range(4):
+            await provider.log({"i": i})
+        assert provider.stats()["dropped"] == 2
+        await provider.aclose()
+
+    asyncio.run(scenario())
+    assert [r["i"] for batch in target.batches for r in batch] == kept
+
+
+def test_block_policy_waits_for_room():
+    target = RecordingProvider(delay=0.01)
+    provider = BatchingRequestLogProvider(target, batch_size=2, flush_interval=60, max_queue=2, overflow="block")
+
+    async def scenario():
+        async with provider:
+            for i in range(6):
+                await provider.log({"i": i})
+
+    asyncio.run(scenario())
+    assert [r["i"] for batch in target.batches for r in batch] == list(range(6))
+    assert provider.stats()["dropped"] == 0
+
+
+def test_block_policy_never_exceeds_max_queue_while_closing():
+    gate = asyncio.Event()
+
+    class Gated(RecordingProvider):
+        async def log_batch(self, records):
+            await gate.wait()
+            await super().log_batch(records)
+
+    class Tracked(deque):
+        peak = 0
+
+        def append(self, item):
+            super().append(item)
+            Tracked.peak = max(Tracked.peak, len(self))
+
+    target = Gated()
+    provider = BatchingRequestLogProvider(target, batch_size=1, flush_interval=60, max_queue=1, overflow="block")
+
+    async def scenario():
+        await provider.start()
+        provider._queue = Tracked()
+        await provider.log({"i": 0})
+        await asyncio.sleep(0.01)  # the flusher is now stuck shipping record 0
+        await provider.log({"i": 1})
+        waiters = [asyncio.create_task(provider.log({"i": i})) for i in (2, 3)]
+        await asyncio.sleep(0.01)
+        closing = asyncio.create_task(provider.aclose())
+        await asyncio.sleep(0.01)
+        gate.set()
+        await asyncio.gather(closing, *waiters)
+
+    asyncio.run(scenario())
+    assert Tracked.peak == 1
+    assert sorted(r["i"] for batch in target.batches for r in batch) == [0, 1, 2, 3]
+    assert provider.stats()["dropped"] == 0
+
+
+def test_records_logged_after_close_reach_the_target():
+    target = RecordingProvider()
+    provider = BatchingRequestLogProvider(target, flush_interval=60)
+
+    async def scenario():
+        async with provider:
+            await provider.log({"i": 1})
+        await provider.log({"i": 2})
+
+    asyncio.run(scenario())
+    assert target.batches == [[{"i": 1}], [{"i": 2}]]
+    stats = provider.stats()
+    assert (stats["queued"], stats["enqueued"], stats["flushed"]) == (0, 2, 2)
+
+
+def test_failed_batches_are_counted():
+    errors = []
+    provider = BatchingRequestLogProvider(RecordingProvider(fail=True), on_error=errors.append)
+
+    async def scenario():
+        async with provider:
+            await provider.log({"i": 1})
+
+    asyncio.run(scenario())
+    assert provider.stats()["failed"] == 1
+    assert len(errors) == 1
+
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        BatchingRequestLogProvider(RecordingProvider(), overflow="explode")
+
+
+def test_middleware_drains_on_lifespan_shutdown(mw):
+    target = RecordingProvider()
+    provider = BatchingRequestLogProvider(target, batch_size=100, flush_interval=60)
+    app = FastAPI()
+    app.add_middleware(mw.RequestLoggingMiddleware, provider=provider)
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        for _ in range(3):
+            assert client.get("/").status_code == 200
+        assert target.batches == []
+
+    assert [r["path"] for batch in target.batches for r in batch] == ["/", "/", "/"]
+    assert provider.stats()["flushed"] == 3
@@ -0,0 +1,197 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import RequestLoggingMiddleware
+from os_fastapi_middleware.providers import RotatingFileRequestLogProvider
+from os_fastapi_middleware.providers.file import default_serializer, json_serializer
+
+
+def _read_lines(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_writes_ndjson_in_background(tmp_path):
+    path = tmp_path / "logs" / "requests.ndjson"
+    provider = RotatingFileRequestLogProvider(str(path), flush_interval=60, flush_records=3)
+
+    async def scenario():
+        async with provider:
+            for i in range(3):
+                await provider.log({"i": i, "path": "/é"})
+            # flush_records reached: written without waiting for the interval
+            for _ in range(100):
+                if provider.stats()["written"] == 3:
+                    break
+                await asyncio.sleep(0.01)
+            assert provider.stats()["written"] == 3
+            await provider.log({"i": 3})
+
+    asyncio.run(scenario())
+
+    assert _read_lines(path) == [{"i": 0, "path": "/é"}, {"i": 1, "path": "/é"}, {"i": 2, "path": "/é"}, {"i": 3}]
+    assert provider.stats()["queued"] == 0
+
+
+def test_rotates_by_size_and_keeps_backup_count(tmp_path):
+    path = tmp_path / "requests.ndjson"
+    provider = RotatingFileRequestLogProvider(
+        str(path), max_bytes=40, backup_count=2, serializer=json_serializer, flush_interval=60
+    )
+
+    async def scenario():
+        for i in range(10):
+            await provider.log({"n": f"{i:010d}"})
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    segments = provider.segments()
+    assert len(segments) == 2
+    # Each line is 17 bytes: two per file before the 40 byte limit
+    assert _read_lines(segments[0]) == [{"n": "0000000004"}, {"n": "0000000005"}]
+    assert _read_lines(segments[1]) == [{"n": "0000000006"}, {"n": "0000000007"}]
+    assert _read_lines(path) == [{"n": "0000000008"}, {"n": "0000000009"}]
+    assert provider.stats()["rotations"] == 4
+
+
+def test_colliding_segment_names_keep_their_order(tmp_path):
+    path = tmp_path / "requests.ndjson"
+    stamp = "20200101T000000000000"
+    # Segments rotated within the same microsecond get a "-n" suffix
+    for name in (f"{stamp}", f"{stamp}-1", f"{stamp}-2", f"{stamp}-10"):
+        (tmp_path / f"requests.{name}.ndjson").write_text("{}\n")
+    provider = RotatingFileRequestLogProvider(
+        str(path), max_bytes=20, backup_count=3, serializer=json_serializer, flush_interval=60
+    )
+
+    async def scenario():
+        for i in range(2):
+            await provider.log({"n": f"{i:010d}"})
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    names = [os.path.basename(segment) for segment in provider.segments()]
+    assert names[:2] == [f"requests.{stamp}-2.ndjson", f"requests.{stamp}-10.ndjson"]
+    assert len(names) == 3 and not names[2].startswith(f"requests.{stamp}")
+
+
+def test_rotates_by_time_and_compresses(tmp_path):
+    path = tmp_path / "requests.ndjson"
+    provider = RotatingFileRequestLogProvider(
+        str(path), max_bytes=None, rotate_interval=0.05, compress=True, flush_interval=60
+    )
+
+    async def scenario():
+        await provider.log({"segment": 1})
+        await provider.flush()
+        await asyncio.sleep(0.06)
+        await provider.log({"segment": 2})
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    (segment,) = provider.segments()
+    assert segment.endswith(".ndjson.gz")
+    assert _read_lines(segment) == [{"segment": 1}]
+    assert _read_lines(path) == [{"segment": 2}]
+
+
+def test_drops_oldest_when_full_and_reports_serializer_errors(tmp_path):
+    errors = []
+
+    def serializer(record):
+        if record.get("bad"):
+            raise TypeError("not serialisable")
+        return json_serializer(record)
+
+    path = tmp_path / "requests.ndjson"
+    provider = RotatingFileRequestLogProvider(
+        str(path), serializer=serializer, max_queue=2, flush_interval=60, on_error=errors.append
+    )
+    provider._start_thread = lambda: None  # keep records queued
+
+    async def scenario():
+        for record in ({"i": 0}, {"bad": True}, {"i": 2}):
+            await provider.log(record)
+        await provider.flush()
+
+    asyncio.run(scenario())
+    provider.close()
+
+    assert _read_lines(path) == [{"i": 2}]
+    assert provider.stats()["dropped"] == 1
+    assert provider.stats()["failed"] == 1
+    assert isinstance(errors[0], TypeError)
+
+
+def test_writer_survives_drops_while_draining(tmp_path):
+    class RacyDeque(deque):
+        def __len__(self):
+            length = super().__len__()
+            if length and threading.current_thread() is not threading.main_thread():
+                # log() drops the oldest record right after the writer measured the queue
+                super().popleft()
+                provider._dropped += 1
+            return length
+
+    errors = []
+    path = tmp_path / "requests.ndjson"
+    provider = RotatingFileRequestLogProvider(
+        str(path), serializer=json_serializer, max_queue=8, flush_records=4, flush_interval=0.001,
+        on_error=errors.append,
+    )
+    provider._queue = RacyDeque()
+
+    async def scenario():
+        for i in range(5000):
+            await provider.log({"i": i})
+            if i % 100 == 0:
+                await asyncio.sleep(0.002)
+        assert provider._thread.is_alive()
+        await provider.aclose()
+
+    asyncio.run(scenario())
+
+    stats = provider.stats()
+    assert errors == []
+    assert stats["queued"] == 0
+    assert stats["written"] == len(_read_lines(path)) == stats["enqueued"] - stats["dropped"]
+
+
+def test_default_serializer_prefers_orjson():
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        assert default_serializer() is json_serializer
+    else:
+        assert default_serializer() is not json_serializer
+    assert json.loads(default_serializer()({"a": 1, "when": time}))["a"] == 1
+
+
+def test_middleware_lifespan_drains_file(tmp_path):
+    path = tmp_path / "requests.ndjson"
+    provider = RotatingFileRequestLogProvider(str(path), flush_interval=60)
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, provider=provider)
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        client.get("/")
+        client.get("/")
+
+    records = _read_lines(path)
+    assert [record["path"] for record in records] == ["/", "/"]
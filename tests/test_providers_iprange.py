@@ -0,0 +1,97 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import IPWhitelistMiddleware
+from os_fastapi_middleware.iprange import IPRangeIndex, compile_ip_ranges, main
+from os_fastapi_middleware.providers import MMapIPWhitelistProvider, MMapIPDenylistProvider
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / "ranges.ipr")
+    compile_ip_ranges(
+        [
+            "# threat feed",
+            "10.0.0.0/24",
+            "10.0.1.0/24",  # adjacent, merged with the range above
+            "192.0.2.7",
+            "198.51.100.10-198.51.100.20",
+            "2001:db8::/48",
+            "not-an-ip",
+        ],
+        path,
+    )
+    return path
+
+
+def test_index_lookup(index_path):
+    index = IPRangeIndex(index_path)
+    try:
+        assert index.ipv4_count == 3
+        assert index.ipv6_count == 1
+        assert "10.0.1.255" in index
+        assert "10.0.2.0" not in index
+        assert "192.0.2.7" in index
+        assert "192.0.2.8" not in index
+        assert "198.51.100.15" in index
+        assert "198.51.100.21" not in index
+        assert "2001:db8:0:1234::1" in index
+        assert "2001:db9::1" not in index
+        assert "0.0.0.0" not in index
+        assert "garbage" not in index
+    finally:
+        index.close()
+
+
+def test_compile_strict_rejects_invalid(tmp_path):
+    with pytest.raises(ValueError):
+        compile_ip_ranges(["bad"], str(tmp_path / "x.ipr"), strict=True)
+
+
+def test_cli_writes_index(tmp_path, capsys):
+    feed = tmp_path / "feed.txt"
+    feed.write_text("203.0.113.0/24\n")
+    out = str(tmp_path / "out.ipr")
+
+    assert main([str(feed), "-o", out]) == 0
+    assert "1 IPv4 ranges" in capsys.readouterr().out
+    assert "203.0.113.9" in IPRangeIndex(out)
+
+
+def test_provider_reloads_swapped_file(tmp_path):
+    path = str(tmp_path / "allow.ipr")
+    compile_ip_ranges(["203.0.113.10"], path)
+    provider = MMapIPWhitelistProvider(path, check_interval=0)
+
+    assert provider.contains("203.0.113.10")
+    in_flight = provider._index
+
+    compile_ip_ranges(["198.51.100.0/24"], path)
+    assert not provider.contains("203.0.113.10")
+    assert provider.contains("198.51.100.1")
+    # A lookup still holding the old index keeps working
+    assert "203.0.113.10" in in_flight
+
+    # A broken file is ignored and the current index keeps serving
+    junk = str(tmp_path / "junk.ipr")
+    with open(junk, "wb") as fh:
+        fh.write(b"junk")
+    os.replace(junk, path)
+    assert provider.contains("198.51.100.1")
+    provider.close()
+
+
+def test_denylist_with_whitelist_middleware(index_path):
+    app = FastAPI()
+    app.add_middleware(IPWhitelistMiddleware, provider=MMapIPDenylistProvider(index_path))
+
+    @app.get("/protected")
+    async def protected():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/protected", headers={"X-Forwarded-For": "10.0.0.5"}).status_code == 403
+    assert client.get("/protected", headers={"X-Forwarded-For": "203.0.113.5"}).status_code == 200
@@ -0,0 +1,131 @@
+import asyncio
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import RedisConfig
+from os_fastapi_middleware.providers import RedisConnectionManager
+from os_fastapi_middleware.testing import FakeRedis
+
+
+class Factory:
+    def __init__(self, **options):
+        self.options = options
+        self.configs = []
+        self.clients = []
+
+    def __call__(self, config):
+        self.configs.append(config)
+        self.clients.append(FakeRedis(**self.options))
+        return self.clients[-1]
+
+
+def test_providers_share_one_client_for_the_app_lifespan(mw):
+    factory = Factory()
+    redis = RedisConnectionManager.from_url("redis://cache:6379/1", client_factory=factory, max_connections=8)
+    app = FastAPI(lifespan=redis.lifespan)
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    keys = redis.api_key_provider()
+    app.add_middleware(mw.RateLimitMiddleware, provider=redis.rate_limit_provider(), requests_per_window=2)
+    app.add_middleware(mw.APIKeyMiddleware, provider=keys)
+
+    with TestClient(app) as client:
+        (fake,) = factory.clients
+        assert factory.configs[0].url == "redis://cache:6379/1"
+        assert factory.configs[0].max_connections == 8
+        assert fake.calls["ping"] == 4
+        assert redis.stats()["started"]
+
+        asyncio.run(keys.set_key("acme", "secret"))
+        statuses = [client.get("/", headers={"X-API-Key": "secret"}).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        # A provider never closes the shared client
+        asyncio.run(keys.close())
+        assert client.get("/", headers={"X-API-Key": "secret"}).status_code == 429
+
+        stats = redis.stats()
+        assert (stats["providers"], stats["warmed"], stats["last_error"]) == (2, 4, None)
+
+    assert not redis.stats()["started"]
+    with pytest.raises(ConnectionError):
+        asyncio.run(fake.get("anything"))
+
+
+def test_redis_down_at_startup_does_not_stop_the_app():
+    factory = Factory()
+    redis = RedisConnectionManager(RedisConfig(warm_connections=2), client_factory=factory)
+    redis.client.down = True
+
+    asyncio.run(redis.start())
+    stats = redis.stats()
+    assert stats["started"] and stats["warmed"] == 0
+    assert "ConnectionError" in stats["last_error"]
+
+
+def test_install_wraps_an_existing_lifespan():
+    events = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        events.append(("app startup", redis.stats()["warmed"]))
+        yield {"ready": True}
+        events.append(("app shutdown", redis.stats()["started"]))
+
+    app = FastAPI(lifespan=lifespan)
+    redis = RedisConnectionManager(RedisConfig(warm_connections=1), client_factory=Factory())
+    redis.install(app)
+
+    @app.get("/")
+    async def root(request: Request):
+        return {"ready": request.state.ready}
+
+    with TestClient(app) as client:
+        assert client.get("/").json() == {"ready": True}
+    # Redis is up before the app starts and closed after it stops
+    assert events == [("app startup", 1), ("app shutdown", True)]
+    assert not redis.stats()["started"]
+
+
+def test_pool_usage_stats_and_disconnect():
+    class Pool:
+        # The attributes of redis.asyncio.ConnectionPool (redis-py >= 5)
+        def __init__(self):
+            self._in_use_connections = {object(), object()}
+            self._available_connections = [object(), object(), object()]
+            self.disconnected = False
+
+        async def disconnect(self):
+            self.disconnected = True
+
+    class Client(FakeRedis):
+        connection_pool = Pool()
+
+    redis = RedisConnectionManager(RedisConfig(max_connections=10), client_factory=lambda config: Client())
+    redis.rate_limit_provider()
+    stats = redis.stats()
+    assert {key: stats[key] for key in ("max_connections", "created", "in_use", "idle", "providers")} == {
+        "max_connections": 10, "created": 5, "in_use": 2, "idle": 3, "providers": 1,
+    }
+
+    asyncio.run(redis.aclose())
+    assert Client.connection_pool.disconnected
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("SECURITY_REDIS_URL", "rediss://cache:6380/2")
+    monkeypatch.setenv("SECURITY_REDIS_MAX_CONNECTIONS", "64")
+    config = RedisConfig.from_env()
+    assert (config.url, config.max_connections, config.warm_connections) == ("rediss://cache:6380/2", 64, 4)
+
+
+@pytest.mark.skipif(find_spec("redis") is not None, reason="redis is installed")
+def test_default_client_needs_the_redis_extra():
+    with pytest.raises(ImportError, match="os-fastapi-middleware\\[redis\\]"):
+        RedisConnectionManager().client
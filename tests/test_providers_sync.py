@@ -0,0 +1,139 @@
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import (
+    APIKeyDependency,
+    APIKeyMiddleware,
+    RateLimitMiddleware,
+    SecurityPipeline,
+)
+from os_fastapi_middleware.config import SecurityConfig, APIKeyConfig, RateLimitConfig
+from os_fastapi_middleware.providers import (
+    InMemoryAPIKeyProvider,
+    InMemoryIPWhitelistProvider,
+    InMemoryRateLimitProvider,
+)
+from os_fastapi_middleware.providers.base import resolve_sync_method
+
+
+class CountingKeyProvider(InMemoryAPIKeyProvider):
+    """Counts which variant the callers use."""
+
+    def __init__(self, valid_keys):
+        super().__init__(valid_keys)
+        self.sync_calls = 0
+        self.async_calls = 0
+
+    def validate_key_sync(self, api_key):
+        self.sync_calls += 1
+        return super().validate_key_sync(api_key)
+
+    async def validate_key(self, api_key):
+        self.async_calls += 1
+        return await super().validate_key(api_key)
+
+
+class OverridingKeyProvider(InMemoryAPIKeyProvider):
+    """Overrides only the async method; the inherited sync variant must be ignored."""
+
+    async def validate_key(self, api_key):
+        return api_key == "override"
+
+
+def test_resolve_sync_method():
+    provider = InMemoryAPIKeyProvider({"acc": "k"})
+    assert resolve_sync_method(provider, "validate_key") == provider.validate_key_sync
+    assert resolve_sync_method(InMemoryRateLimitProvider(), "check_rate_limit") is not None
+    assert resolve_sync_method(InMemoryIPWhitelistProvider([]), "is_ip_allowed") is not None
+    assert resolve_sync_method(None, "validate_key") is None
+
+
+def test_resolve_sync_method_respects_async_overrides():
+    assert resolve_sync_method(OverridingKeyProvider({}), "validate_key") is None
+
+    provider = InMemoryIPWhitelistProvider(["127.0.0.1"])
+
+    async def patched(_ip):
+        return False
+
+    provider.is_ip_allowed = patched
+    assert resolve_sync_method(provider, "is_ip_allowed") is None
+
+
+def _app_with_key_middleware(provider):
+    app = FastAPI()
+    app.add_middleware(APIKeyMiddleware, provider=provider)
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    return app
+
+
+def test_middleware_uses_sync_variant():
+    provider = CountingKeyProvider({"acc": "secret"})
+    client = TestClient(_app_with_key_middleware(provider))
+
+    assert client.get("/", headers={"X-API-Key": "secret"}).status_code == 200
+    assert client.get("/", headers={"X-API-Key": "wrong"}).status_code == 403
+    assert provider.sync_calls == 2
+    assert provider.async_calls == 0
+
+
+def test_middleware_honours_async_override():
+    client = TestClient(_app_with_key_middleware(OverridingKeyProvider({"acc": "secret"})))
+
+    assert client.get("/", headers={"X-API-Key": "override"}).status_code == 200
+    assert client.get("/", headers={"X-API-Key": "secret"}).status_code == 403
+
+
+def test_dependency_uses_sync_variant():
+    provider = CountingKeyProvider({"acc": "secret"})
+    app = FastAPI()
+
+    @app.get("/")
+    async def root(key=Depends(APIKeyDependency(provider))):
+        return {"key": key}
+
+    client = TestClient(app)
+    assert client.get("/", headers={"X-API-Key": "secret"}).json() == {"key": "secret"}
+    assert provider.sync_calls == 1
+    assert provider.async_calls == 0
+
+
+def test_sync_rate_limit_headers():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, provider=InMemoryRateLimitProvider(), requests_per_window=2)
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/").headers["X-RateLimit-Remaining"] == "1"
+    assert client.get("/").headers["X-RateLimit-Remaining"] == "0"
+    assert client.get("/").status_code == 429
+
+
+def test_pipeline_mixes_sync_and_async_providers():
+    provider = OverridingKeyProvider({})
+    app = FastAPI()
+    app.add_middleware(
+        SecurityPipeline,
+        config=SecurityConfig(
+            api_key=APIKeyConfig(),
+            rate_limit=RateLimitConfig(requests_per_window=1),
+        ),
+        api_key_provider=provider,
+        rate_limit_provider=InMemoryRateLimitProvider(),
+    )
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/", headers={"X-API-Key": "nope"}).status_code == 403
+    assert client.get("/", headers={"X-API-Key": "override"}).status_code == 200
+    assert client.get("/", headers={"X-API-Key": "override"}).status_code == 429
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import APIKeyMiddleware
+from os_fastapi_middleware.providers import (
+    BlockingProviderExecutor,
+    ProviderSaturatedError,
+    ProviderTimeoutError,
+    ThreadedAPIKeyProvider,
+    ThreadedIPWhitelistProvider,
+)
+
+
+class BlockingKeyStore:
+    """Plain synchronous provider, like one backed by a blocking DB driver."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.threads = set()
+
+    def validate_key(self, api_key):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return api_key == "secret"
+
+    def get_key_metadata(self, api_key):
+        return {"account_id": "acc"} if api_key == "secret" else None
+
+
+class BlockingIPList:
+
+    def is_ip_allowed(self, ip):
+        return ip == "10.0.0.1"
+
+    def get_allowed_ips(self):
+        return ["10.0.0.1"]
+
+
+def test_calls_run_off_the_event_loop():
+    store = BlockingKeyStore()
+    provider = ThreadedAPIKeyProvider(store, max_workers=2, thread_name_prefix="db")
+
+    async def scenario():
+        assert await provider.validate_key("secret") is True
+        assert await provider.validate_key("other") is False
+        assert await provider.get_key_metadata("secret") == {"account_id": "acc"}
+
+    asyncio.run(scenario())
+    assert all(name.startswith("db") for name in store.threads)
+    stats = provider.stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    provider.executor.shutdown()
+
+
+def test_ip_whitelist_adapter():
+    provider = ThreadedIPWhitelistProvider(BlockingIPList())
+
+    async def scenario():
+        return await provider.is_ip_allowed("10.0.0.1"), await provider.get_allowed_ips()
+
+    assert asyncio.run(scenario()) == (True, ["10.0.0.1"])
+    provider.executor.shutdown()
+
+
+def test_saturation_rejects_extra_calls():
+    executor = BlockingProviderExecutor(max_workers=1, max_queue=1, timeout=None)
+    provider = ThreadedAPIKeyProvider(BlockingKeyStore(delay=0.2), executor=executor)
+
+    async def scenario():
+        return await asyncio.gather(*(provider.validate_key("secret") for _ in range(4)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert results.count(True) == 2
+    assert sum(isinstance(r, ProviderSaturatedError) for r in results) == 2
+
+    stats = executor.stats()
+    assert stats["rejected"] == 2
+    assert stats["peak_in_flight"] == 2
+    executor.shutdown()
+
+
+def test_timeout_keeps_slot_until_thread_finishes():
+    release = threading.Event()
+    executor = BlockingProviderExecutor(max_workers=1, max_queue=0, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(ProviderTimeoutError):
+            await executor.run(release.wait)
+        # The blocked worker still counts, so the pool is saturated
+        with pytest.raises(ProviderSaturatedError):
+            await executor.run(lambda: None)
+        release.set()
+        await asyncio.sleep(0.05)
+        assert await executor.run(lambda: "ok") == "ok"
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats["timeouts"] == 1
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    executor.shutdown()
+
+
+def test_provider_exceptions_are_counted():
+    executor = BlockingProviderExecutor()
+
+    def boom():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(executor.run(boom))
+    assert executor.stats()["errors"] == 1
+    executor.shutdown()
+
+
+def test_middleware_with_threaded_provider():
+    app = FastAPI()
+    app.add_middleware(APIKeyMiddleware, provider=ThreadedAPIKeyProvider(BlockingKeyStore()))
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/", headers={"X-API-Key": "secret"}).status_code == 200
+    assert client.get("/", headers={"X-API-Key": "nope"}).status_code == 403
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import RequestLoggingMiddleware
+from os_fastapi_middleware.providers import BatchingRequestLogProvider, RotatingFileRequestLogProvider
+from os_fastapi_middleware.providers.base import BaseRequestLogProvider
+from os_fastapi_middleware.providers.file import json_serializer
+from os_fastapi_middleware.records import RequestLogRecord, record_to_dict
+
+
+class CompactProvider(BaseRequestLogProvider):
+    accepts_compact_records = True
+
+    def __init__(self):
+        self.records = []
+
+    async def log(self, record):
+        self.records.append(record)
+
+
+def _app(provider, **options):
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, provider=provider, extra_fields={"service": "api"}, **options)
+
+    @app.post("/items/{item_id}")
+    async def item(item_id: int, request: Request):
+        await request.body()
+        return {"id": item_id}
+
+    return app
+
+
+def _call(app):
+    TestClient(app).post(
+        "/items/1?full=1",
+        content=b"payload",
+        headers={"X-Forwarded-For": "203.0.113.7, 10.0.0.1", "User-Agent": "probe", "X-Request-ID": "r1"},
+    )
+
+
+def test_compact_record_converts_to_the_dict_providers_get():
+    compact, plain = CompactProvider(), []
+    _call(_app(compact, capture_body=True))
+    _call(_app(plain.append, capture_body=True))
+
+    (record,) = compact.records
+    assert isinstance(record, RequestLogRecord)
+    assert isinstance(record.started_ns, int) and record.duration_ns > 0
+    converted, expected = record.to_dict(), plain[0]
+    assert converted.keys() == expected.keys()
+    for key in ("method", "path", "route", "query", "client_ip", "user_agent", "status_code",
+                "content_length", "response_length", "headers", "request_body", "service", "sample_weight"):
+        assert converted[key] == expected[key], key
+    assert converted["client_ip"] == "203.0.113.7"
+    assert converted["route"] == "/items/{item_id}"
+    assert converted["query"] == "full=1"
+    assert converted["request_body"] == "payload"
+    assert converted["timestamp"].endswith("+00:00")
+    assert record_to_dict(expected) is expected
+
+
+def test_batching_converts_for_dict_targets():
+    class Target(BaseRequestLogProvider):
+        def __init__(self):
+            self.records = []
+
+        async def log(self, record):
+            self.records.append(record)
+
+    target = Target()
+    provider = BatchingRequestLogProvider(target, flush_interval=60)
+    with TestClient(_app(provider)) as client:
+        client.post("/items/1")
+
+    (record,) = target.records
+    assert isinstance(record, dict)
+    assert record["route"] == "/items/{item_id}"
+
+
+def test_file_provider_serialises_in_a_process_pool(tmp_path):
+    path = tmp_path / "requests.ndjson"
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        provider = RotatingFileRequestLogProvider(
+            str(path), serializer=json_serializer, executor=executor, compress=True, max_bytes=300
+        )
+        with TestClient(_app(provider)) as client:
+            for item_id in range(4):
+                client.post(f"/items/{item_id}")
+
+        async def unpicklable():
+            provider.serializer = lambda record: b"{}"
+            await provider.log({"a": 1})
+            await provider.aclose()
+
+        asyncio.run(unpicklable())
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert all(line["service"] == "api" for line in lines)
+    assert provider.segments() and all(segment.endswith(".gz") for segment in provider.segments())
+    assert provider.stats()["written"] == 4
+    assert provider.stats()["failed"] == 1
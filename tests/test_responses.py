@@ -0,0 +1,113 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse
+
+from os_fastapi_middleware import InMemoryIPWhitelistProvider, InMemoryRateLimitProvider
+from os_fastapi_middleware.responses import RejectionTemplate, rate_limit_rejections
+
+
+def send_to_list(response):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(response({"type": "http"}, None, send))
+    return messages
+
+
+def test_default_rejection_matches_json_response():
+    expected = JSONResponse(
+        status_code=429,
+        content={"detail": "Rate limit exceeded. Maximum 5 requests per 60 seconds.", "retry_after": 60},
+        headers={"Retry-After": "60"},
+    )
+    rendered = rate_limit_rejections(5, 60)["rate_limited"].render()
+
+    assert rendered.status_code == expected.status_code
+    assert rendered.body == expected.body
+    assert rendered.raw_headers == expected.raw_headers
+
+
+def test_static_template_is_cached_and_headers_not_shared():
+    template = RejectionTemplate(403, {"detail": "Invalid API key"})
+    assert template.render() is template.render()
+
+    first = send_to_list(template.render())
+    first[0]["headers"].append((b"x-extra", b"1"))
+    second = send_to_list(template.render())
+    assert (b"x-extra", b"1") not in second[0]["headers"]
+
+
+def test_template_splices_and_escapes_values():
+    template = RejectionTemplate(403, {"detail": "IP {ip} blocked", "code": "{missing}"})
+    rendered = template.render(ip='1.2.3.4"\n')
+
+    assert rendered.body == b'{"detail":"IP 1.2.3.4\\"\\n blocked","code":"{missing}"}'
+    assert rendered.headers["content-length"] == str(len(rendered.body))
+
+
+def test_text_templates_escape_values_for_their_media_type():
+    payload = '<script>alert("x")</script>'
+    page = RejectionTemplate(403, "<p>{ip} is blocked</p>", media_type="text/html")
+    assert page.render(ip=payload).body == (
+        b"<p>&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; is blocked</p>"
+    )
+
+    document = RejectionTemplate(403, b'{"ip": "{ip}"}', media_type="application/problem+json")
+    assert document.render(ip='"}, "admin": true, "x": "').body == (
+        b'{"ip": "\\"}, \\"admin\\": true, \\"x\\": \\""}'
+    )
+    assert RejectionTemplate(403, "{ip}", media_type="text/plain").render(ip=payload).body == payload.encode()
+
+
+def test_html_rejection_escapes_client_controlled_key(mw):
+    app = FastAPI()
+    app.add_middleware(
+        mw.RateLimitMiddleware,
+        provider=InMemoryRateLimitProvider(),
+        requests_per_window=0,
+        key_func=lambda request: request.headers["X-Client"],
+        rejections={"rate_limited": RejectionTemplate(429, "<h1>{key}</h1>", media_type="text/html")},
+    )
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    r = TestClient(app).get("/", headers={"X-Client": "<img src=x onerror=alert(1)>"})
+    assert r.status_code == 429
+    assert r.text == "<h1>&lt;img src=x onerror=alert(1)&gt;</h1>"
+
+
+def test_custom_rejections_in_middlewares(mw):
+    app = FastAPI()
+    app.add_middleware(
+        mw.RateLimitMiddleware,
+        provider=InMemoryRateLimitProvider(),
+        requests_per_window=1,
+        rejections={"rate_limited": RejectionTemplate(429, "slow down", media_type="text/plain")},
+    )
+    app.add_middleware(
+        mw.IPWhitelistMiddleware,
+        provider=InMemoryIPWhitelistProvider(["203.0.113.10"]),
+        rejections={"ip_not_allowed": RejectionTemplate(403, {"error": "blocked", "ip": "{ip}"})},
+    )
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    client = TestClient(app)
+    r = client.get("/", headers={"X-Forwarded-For": "198.51.100.1"})
+    assert r.status_code == 403
+    assert r.json() == {"error": "blocked", "ip": "198.51.100.1"}
+
+    headers = {"X-Forwarded-For": "203.0.113.10"}
+    assert client.get("/", headers=headers).status_code == 200
+    r = client.get("/", headers=headers)
+    assert r.status_code == 429
+    assert r.text == "slow down"
+    assert r.headers["content-type"] == "text/plain; charset=utf-8"
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware.sampling import FixedRateSampler, PathRateSampler, TailSampler
+
+
+def test_fixed_rate_sampler_weights():
+    sampler = FixedRateSampler(0.25, rng=random.Random(7))
+    decisions = [sampler.sample("/", 200, 1.0) for _ in range(4000)]
+    kept = [weight for weight in decisions if weight is not None]
+
+    assert set(kept) == {4.0}
+    # The weights re-scale the kept records to the real count
+    assert abs(sum(kept) - 4000) < 400
+
+
+def test_fixed_rate_bounds():
+    assert FixedRateSampler(1.0).sample("/", 200, 0) == 1.0
+    assert FixedRateSampler(0.0).sample("/", 200, 0) is None
+    with pytest.raises(ValueError):
+        FixedRateSampler(1.5)
+
+
+def test_path_rate_sampler_first_match_wins():
+    sampler = PathRateSampler(
+        {"/health": 0.0, "/api/search/**": 1.0, "/api/**": 0.0},
+        default_rate=1.0,
+    )
+    assert sampler.sample("/health", 200, 0) is None
+    assert sampler.sample("/api/search/q", 200, 0) == 1.0
+    assert sampler.sample("/api/items", 200, 0) is None
+    assert sampler.sample("/other", 200, 0) == 1.0
+
+
+def test_tail_sampler_keeps_errors_and_slow_requests():
+    sampler = TailSampler(FixedRateSampler(0.0), slow_ms=100)
+    assert sampler.sample("/", 200, 5) is None
+    assert sampler.sample("/", 404, 5) == 1.0
+    assert sampler.sample("/", 503, 5) == 1.0
+    assert sampler.sample("/", 200, 150) == 1.0
+
+    assert TailSampler(FixedRateSampler(0.0), keep_errors=False).sample("/", 500, 5) is None
+
+
+def test_middleware_applies_sampler(mw):
+    records = []
+    app = FastAPI()
+    app.add_middleware(
+        mw.RequestLoggingMiddleware,
+        provider=records.append,
+        sampler=TailSampler(PathRateSampler({"/quiet": 0.0}, default_rate=0.5, rng=random.Random(1))),
+    )
+
+    @app.get("/quiet")
+    async def quiet():
+        return {"ok": True}
+
+    @app.get("/missing")
+    async def missing():
+        return {"ok": False}
+
+    @app.get("/sampled")
+    async def sampled_route():
+        return {"ok": True}
+
+    client = TestClient(app)
+    for _ in range(5):
+        client.get("/quiet")
+    client.get("/nope")
+    for _ in range(20):
+        client.get("/sampled")
+
+    paths = [record["path"] for record in records]
+    assert "/quiet" not in paths
+    assert records[0]["path"] == "/nope" and records[0]["sample_weight"] == 1.0
+    sampled = [record for record in records if record["path"] == "/sampled"]
+    assert 0 < len(sampled) < 20
+    assert all(record["sample_weight"] == 2.0 for record in sampled)
+
+
+def test_records_have_unit_weight_without_sampler(mw):
+    records = []
+    app = FastAPI()
+    app.add_middleware(mw.RequestLoggingMiddleware, provider=records.append)
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    TestClient(app).get("/")
+    assert records[0]["sample_weight"] == 1.0
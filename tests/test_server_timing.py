@@ -0,0 +1,107 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from os_fastapi_middleware import SecurityPipeline, ServerTimingMiddleware
+from os_fastapi_middleware.config import SecurityConfig, APIKeyConfig, IPWhitelistConfig, RateLimitConfig
+from os_fastapi_middleware.providers import (
+    InMemoryAPIKeyProvider,
+    InMemoryIPWhitelistProvider,
+    InMemoryRateLimitProvider,
+)
+
+
+def _stages(header):
+    return {part.split(";")[0].strip(): float(part.split("dur=")[1]) for part in header.split(",")}
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    @app.get("/open")
+    async def open_route():
+        return {"ok": True}
+
+    return app
+
+
+def test_middlewares_report_each_stage(mw):
+    app = _app()
+    app.add_middleware(mw.RateLimitMiddleware, provider=InMemoryRateLimitProvider(), requests_per_window=10)
+    app.add_middleware(mw.APIKeyMiddleware, provider=InMemoryAPIKeyProvider({"acc": "secret"}))
+    app.add_middleware(mw.IPWhitelistMiddleware, provider=InMemoryIPWhitelistProvider(["127.0.0.1"]))
+    app.add_middleware(mw.AdminIPBypassMiddleware, admin_ips=["10.0.0.1"])
+    app.add_middleware(ServerTimingMiddleware)
+
+    response = TestClient(app).get("/", headers={"X-API-Key": "secret", "X-Forwarded-For": "127.0.0.1"})
+
+    assert response.status_code == 200
+    stages = _stages(response.headers["server-timing"])
+    assert set(stages) == {"ip_resolve", "admin_bypass", "ip_whitelist", "api_key", "rate_limit"}
+    assert all(duration >= 0 for duration in stages.values())
+
+
+def test_rejected_request_reports_stages_run_so_far(mw):
+    app = _app()
+    app.add_middleware(mw.RateLimitMiddleware, provider=InMemoryRateLimitProvider(), requests_per_window=10)
+    app.add_middleware(mw.APIKeyMiddleware, provider=InMemoryAPIKeyProvider({"acc": "secret"}))
+    app.add_middleware(ServerTimingMiddleware)
+
+    response = TestClient(app).get("/", headers={"X-API-Key": "wrong"})
+
+    assert response.status_code == 403
+    assert set(_stages(response.headers["server-timing"])) == {"api_key"}
+
+
+def test_pipeline_reports_stages():
+    app = _app()
+    config = SecurityConfig(
+        api_key=APIKeyConfig(),
+        ip_whitelist=IPWhitelistConfig(allowed_ips=["testclient", "127.0.0.1"]),
+        rate_limit=RateLimitConfig(default_limit=10),
+    )
+    app.add_middleware(
+        SecurityPipeline,
+        config=config,
+        api_key_provider=InMemoryAPIKeyProvider({"acc": "secret"}),
+        rate_limit_provider=InMemoryRateLimitProvider(),
+    )
+    app.add_middleware(ServerTimingMiddleware)
+
+    response = TestClient(app).get("/", headers={"X-API-Key": "secret", "X-Forwarded-For": "127.0.0.1"})
+
+    assert response.status_code == 200
+    assert set(_stages(response.headers["server-timing"])) == {"ip_resolve", "ip_whitelist", "api_key", "rate_limit"}
+
+
+def test_no_header_without_security_stages_or_outside_include_paths(mw):
+    app = _app()
+    app.add_middleware(mw.APIKeyMiddleware, provider=InMemoryAPIKeyProvider({"acc": "secret"}), exempt_paths=["/open"])
+    app.add_middleware(ServerTimingMiddleware, include_paths=["/"])
+    client = TestClient(app)
+
+    assert "server-timing" not in client.get("/open").headers
+    assert "server-timing" in client.get("/", headers={"X-API-Key": "secret"}).headers
+
+    app = _app()
+    app.add_middleware(mw.APIKeyMiddleware, provider=InMemoryAPIKeyProvider({"acc": "secret"}))
+    app.add_middleware(ServerTimingMiddleware, include_paths=["/open"])
+
+    assert "server-timing" not in TestClient(app).get("/", headers={"X-API-Key": "secret"}).headers
+
+
+def test_request_log_records_security_timings(mw):
+    records = []
+    app = _app()
+    app.add_middleware(mw.APIKeyMiddleware, provider=InMemoryAPIKeyProvider({"acc": "secret"}), exempt_paths=["/open"])
+    app.add_middleware(mw.RequestLoggingMiddleware, provider=records.append)
+    client = TestClient(app)
+
+    client.get("/", headers={"X-API-Key": "secret"})
+    client.get("/open")
+
+    assert set(records[0]["security_timings"]) == {"api_key"}
+    assert records[1]["security_timings"] is None